@@ -7,7 +7,7 @@ Universal batch splitting utilities for LLM calls.
 Provides token-aware batching and binary-split fallback for parse failures.
 
 Features:
-- Token budget estimation (len(text)/4 heuristic)
+- Token budget estimation (per-script calibrated estimator, see token_estimator.py)
 - Configurable max_items_per_batch, max_tokens_per_batch
 - Order preservation
 - Binary-split fallback on parse failure
@@ -19,7 +19,12 @@ import re
 from dataclasses import dataclass, field
 from typing import List, Dict, Any, Optional, Tuple, Callable
 
-# Token estimation: ~4 chars per token (conservative for CJK/Cyrillic mix)
+try:
+    from scripts.token_estimator import estimate_tokens as _estimate_model_tokens
+except ImportError:
+    from token_estimator import estimate_tokens as _estimate_model_tokens
+
+# Legacy heuristic (TOKEN_ESTIMATOR=chars4): ~4 chars per token
 CHARS_PER_TOKEN = 4
 
 
@@ -32,20 +37,22 @@ class BatchConfig:
     
     # Token estimation fields to sum
     text_fields: List[str] = field(default_factory=lambda: ["tokenized_zh", "source_zh", "target_text"])
+    # Model the batch is sent to (selects the estimator's model family)
+    model: Optional[str] = None
 
 
-def estimate_tokens(text: str) -> int:
-    """Estimate token count from text using chars/4 heuristic."""
-    return max(1, len(text or "") // CHARS_PER_TOKEN)
+def estimate_tokens(text: str, model: Optional[str] = None) -> int:
+    """Estimate token count from text (token_estimator, per script and model family)."""
+    return max(1, _estimate_model_tokens(text or "", model))
 
 
-def estimate_row_tokens(row: Dict[str, Any], text_fields: List[str]) -> int:
+def estimate_row_tokens(row: Dict[str, Any], text_fields: List[str], model: Optional[str] = None) -> int:
     """Estimate total tokens for a row by summing text fields."""
     total = 0
     for field in text_fields:
         val = row.get(field, "")
         if isinstance(val, str):
-            total += estimate_tokens(val)
+            total += estimate_tokens(val, model)
     # Add overhead for JSON structure (~20 tokens per item)
     return total + 20
 
@@ -76,7 +83,7 @@ def split_into_batches(
     current_tokens = 0
     
     for row in rows:
-        row_tokens = estimate_row_tokens(row, config.text_fields)
+        row_tokens = estimate_row_tokens(row, config.text_fields, config.model)
         
         # Check if adding this row would exceed limits
         would_exceed_items = len(current_batch) >= config.max_items
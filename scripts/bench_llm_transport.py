@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bench_llm_transport.py
+
+Compare per-call latency of a bare requests.post against the pooled
+runtime_adapter session, using a local mock OpenAI-compatible server.
+
+Usage:
+    python scripts/bench_llm_transport.py --calls 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import runtime_adapter  # noqa: E402
+
+
+class _MockChatHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", "0")))
+        body = json.dumps({
+            "id": "bench",
+            "choices": [{"message": {"content": "{\"items\": []}"}}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 2, "total_tokens": 12},
+        }).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _measure(post, url: str, payload: dict, calls: int) -> list:
+    latencies = []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        resp = post(url, payload)
+        resp.json()
+        latencies.append((time.perf_counter() - t0) * 1000)
+    return latencies
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark pooled vs bare HTTP transport")
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _MockChatHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+    payload = {"model": "bench", "messages": [{"role": "user", "content": "测试" * 200}]}
+    headers = {"Authorization": "Bearer bench", "Content-Type": "application/json"}
+
+    try:
+        bare = _measure(
+            lambda u, p: requests.post(u, headers=headers, json=p, timeout=10),
+            url, payload, args.calls,
+        )
+        pooled = _measure(
+            lambda u, p: runtime_adapter._http_post(u, headers=headers, payload=p, timeout=10),
+            url, payload, args.calls,
+        )
+    finally:
+        server.shutdown()
+
+    for name, values in (("bare requests.post", bare), ("pooled session", pooled)):
+        print(f"{name:20s} p50={statistics.median(values):.2f}ms "
+              f"p95={sorted(values)[int(len(values) * 0.95) - 1]:.2f}ms n={len(values)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+bench_normalize_guard.py
+
+Throughput benchmark for the normalize stage: generates a synthetic source
+CSV (mixed CJK text, brace/printf placeholders, rich-text tags) and reports
+rows/s for placeholder freezing alone and for the full process_csv pass.
+
+Usage:
+    python scripts/bench_normalize_guard.py --rows 100000
+    python scripts/bench_normalize_guard.py --rows 100000 --source-lang en-US   # skip jieba
+    python scripts/bench_normalize_guard.py --rows 200000 --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import csv
+import io
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from normalize_guard import NormalizeGuard, PlaceholderFreezer  # noqa: E402
+from segmenter_factory import segmentation_cache_stats  # noqa: E402
+
+DEFAULT_SCHEMA = Path(__file__).resolve().parent.parent / "workflow" / "placeholder_schema.yaml"
+
+_FRAGMENTS = [
+    "提升自身攻击力", "造成", "点伤害", "持续", "秒", "获得", "奖励", "冷却时间",
+    "{0}", "{1}", "{playerName}", "%s", "%d", "%1$d", "[NAME]", "\\n",
+    "<color=#FFD700>", "</color>", "<b>", "</b>", "【", "】",
+]
+
+
+def write_synthetic_csv(path: Path, rows: int, seed: int = 7) -> None:
+    rng = random.Random(seed)
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["string_id", "source_zh", "module_tag"])
+        writer.writeheader()
+        for i in range(rows):
+            text = "".join(rng.choice(_FRAGMENTS) for _ in range(rng.randint(2, 12)))
+            writer.writerow({"string_id": f"BENCH_{i:07d}", "source_zh": text, "module_tag": "bench"})
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark normalize_guard throughput")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--schema", default=str(DEFAULT_SCHEMA))
+    parser.add_argument("--source-lang", default="zh-CN")
+    parser.add_argument("--workers", type=int, default=1, help="NormalizeGuard --workers for process_csv")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_dir = Path(tmp)
+        source = tmp_dir / "source.csv"
+        write_synthetic_csv(source, args.rows)
+        with open(source, "r", encoding="utf-8-sig", newline="") as f:
+            texts = [row["source_zh"] for row in csv.DictReader(f)]
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            freezer = PlaceholderFreezer(args.schema)
+            t0 = time.perf_counter()
+            for text in texts:
+                freezer.freeze_text(text, args.source_lang)
+            freeze_s = time.perf_counter() - t0
+
+            guard = NormalizeGuard(
+                input_path=str(source),
+                output_draft_path=str(tmp_dir / "draft.csv"),
+                output_map_path=str(tmp_dir / "placeholder_map.json"),
+                schema_path=args.schema,
+                source_lang=args.source_lang,
+                workers=args.workers,
+            )
+            t0 = time.perf_counter()
+            ok, rows = guard.process_csv()
+            process_s = time.perf_counter() - t0
+
+    if not ok:
+        print(f"process_csv failed: {guard.errors}")
+        return 1
+    print(f"rows={args.rows} source_lang={args.source_lang}")
+    print(f"freeze_text   {args.rows / freeze_s:10.0f} rows/s ({freeze_s:.2f}s)")
+    print(f"process_csv   {len(rows) / process_s:10.0f} rows/s ({process_s:.2f}s, workers={args.workers})")
+    print(f"segmentation cache {segmentation_cache_stats()}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+checkpoint_journal.py
+
+Crash-safe incremental output for row-level LLM steps (translate_llm).
+
+Each committed batch is appended to the output CSV and its ids to an
+append-only journal next to the checkpoint (<checkpoint>.journal.jsonl).
+Both files are flushed on every commit and fsync'ed in groups, CSV first.
+On a clean finish the journal is folded into the JSON snapshot
+({"done_ids": [...]}) with an atomic temp+rename and removed.
+
+On resume, recover_checkpoint() reconciles the three files after a crash:
+  done = snapshot ids | (journal ids & ids present in the CSV)
+CSV rows outside `done` (torn tail, rows written but never journaled) are
+dropped by rewriting the CSV atomically, so a crash loses at most the
+batches that were in flight.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+CSV_ENCODING = "utf-8-sig"
+DEFAULT_FSYNC_EVERY = 8
+DEFAULT_FSYNC_INTERVAL_S = 5.0
+
+
+def journal_path_for(checkpoint_path: str) -> Path:
+    return Path(checkpoint_path).with_suffix(".journal.jsonl")
+
+
+def _fsync_dir(path: Path) -> None:
+    try:
+        fd = os.open(str(path), os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write_text(path: str, text: str, encoding: str = "utf-8") -> None:
+    """Write via a sibling temp file + fsync + os.replace."""
+    target = Path(path)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    tmp = target.with_name(f".{target.name}.tmp-{os.getpid()}")
+    with open(tmp, "w", encoding=encoding, newline="") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, target)
+    _fsync_dir(target.parent)
+
+
+def read_snapshot_ids(checkpoint_path: str) -> Set[str]:
+    path = Path(checkpoint_path)
+    if not path.exists():
+        return set()
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return set(json.load(f).get("done_ids", []))
+    except (OSError, ValueError):
+        return set()
+
+
+def read_journal_ids(checkpoint_path: str) -> Set[str]:
+    """Ids from the journal; a torn trailing line is ignored."""
+    path = journal_path_for(checkpoint_path)
+    ids: Set[str] = set()
+    if not path.exists():
+        return ids
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            ids.update(str(sid) for sid in record.get("ids", []))
+    return ids
+
+
+def write_snapshot(checkpoint_path: str, done_ids: Iterable[str]) -> None:
+    atomic_write_text(checkpoint_path, json.dumps({"done_ids": sorted(done_ids)}, ensure_ascii=False))
+
+
+def _read_csv(path: Path) -> tuple:
+    with open(path, "r", encoding=CSV_ENCODING, newline="") as f:
+        reader = csv.DictReader(f)
+        rows = list(reader)
+        return list(reader.fieldnames or []), rows
+
+
+def _render_csv(fieldnames: Sequence[str], rows: Iterable[Dict[str, str]], header: bool) -> str:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=list(fieldnames))
+    if header:
+        writer.writeheader()
+    writer.writerows(rows)
+    return buf.getvalue()
+
+
+def recover_checkpoint(output_path: str, checkpoint_path: str, id_field: str = "string_id") -> Set[str]:
+    """Return done ids, repairing output/snapshot first if a journal was left behind."""
+    snapshot_ids = read_snapshot_ids(checkpoint_path)
+    journal = journal_path_for(checkpoint_path)
+    if not journal.exists():
+        return snapshot_ids
+
+    journal_ids = read_journal_ids(checkpoint_path)
+    output = Path(output_path)
+    done = set(snapshot_ids)
+    if output.exists():
+        fieldnames, rows = _read_csv(output)
+        # A torn final line parses with missing (None) cells
+        whole = [r for r in rows if None not in r.values() and None not in r]
+        present = {str(r.get(id_field) or "") for r in whole}
+        done |= journal_ids & present
+        kept = [r for r in whole if str(r.get(id_field) or "") in done]
+        if len(kept) != len(rows):
+            atomic_write_text(str(output), _render_csv(fieldnames, kept, header=True), encoding=CSV_ENCODING)
+    write_snapshot(checkpoint_path, done)
+    journal.unlink()
+    return done
+
+
+class CheckpointJournal:
+    """Append committed rows to the output CSV and their ids to the journal."""
+
+    def __init__(
+        self,
+        output_path: str,
+        checkpoint_path: str,
+        fieldnames: Sequence[str],
+        done_ids: Optional[Set[str]] = None,
+        id_field: str = "string_id",
+        fsync_every: int = DEFAULT_FSYNC_EVERY,
+        fsync_interval_s: float = DEFAULT_FSYNC_INTERVAL_S,
+    ):
+        self.output_path = Path(output_path)
+        self.checkpoint_path = checkpoint_path
+        self.fieldnames = list(fieldnames)
+        self.done_ids: Set[str] = set(done_ids or ())
+        self.id_field = id_field
+        self.fsync_every = max(1, fsync_every)
+        self.fsync_interval_s = fsync_interval_s
+        self.committed_rows = 0
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        write_header = not self.output_path.exists() or self.output_path.stat().st_size == 0
+        self._csv = open(self.output_path, "a", encoding=CSV_ENCODING, newline="")
+        if write_header:
+            self._csv.write(_render_csv(self.fieldnames, [], header=True))
+            self._csv.flush()
+        journal = journal_path_for(checkpoint_path)
+        journal.parent.mkdir(parents=True, exist_ok=True)
+        self._journal = open(journal, "a", encoding="utf-8")
+
+    def commit(self, rows: List[Dict[str, str]]) -> None:
+        """Durably record a finished batch: CSV rows first, then the journal line."""
+        if not rows:
+            return
+        ids = [str(r.get(self.id_field) or "") for r in rows]
+        text = _render_csv(self.fieldnames, rows, header=False)
+        with self._lock:
+            self._csv.write(text)
+            self._csv.flush()
+            self._journal.write(json.dumps({"ids": ids, "ts": time.time()}, ensure_ascii=False) + "\n")
+            self._journal.flush()
+            self.done_ids.update(ids)
+            self.committed_rows += len(rows)
+            self._unsynced += 1
+            if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval_s:
+                self._sync_locked()
+
+    def _sync_locked(self) -> None:
+        os.fsync(self._csv.fileno())
+        os.fsync(self._journal.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def close(self, order: Optional[Sequence[str]] = None) -> None:
+        """Fold the journal into the snapshot; optionally restore input row order in the CSV."""
+        with self._lock:
+            self._sync_locked()
+            self._csv.close()
+            self._journal.close()
+            if order is not None:
+                position = {sid: idx for idx, sid in enumerate(order)}
+                fieldnames, rows = _read_csv(self.output_path)
+                rows.sort(key=lambda r: position.get(str(r.get(self.id_field) or ""), len(position)))
+                atomic_write_text(str(self.output_path), _render_csv(fieldnames, rows, header=True), encoding=CSV_ENCODING)
+            write_snapshot(self.checkpoint_path, self.done_ids)
+            journal_path_for(self.checkpoint_path).unlink(missing_ok=True)
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+embedding_store.py
+
+Embedding cache in one directory with two files, replacing the
+one-.npy-per-text layout under cache/embeddings/:
+
+  vectors.<generation>.bin  append-only row-major matrix (float32 or float16)
+  index.sqlite              key -> row, plus meta (dim, dtype, rows, generation)
+
+Keys are EmbeddingClient._cache_key() digests (md5 of "<text>_<model>"), so a
+legacy .npy cache can be imported as-is. Lookups take a list of keys and return
+one matrix plus a found mask (one SQL pass per 500 keys, fancy indexing into a
+memory map). Writes append rows to the matrix first and then commit the index
+inside a SQLite write transaction, so concurrent processes (sharded runs) never
+see a row before its bytes exist. Re-writing a key appends a new row; compact()
+rewrites only the live rows into the next generation file.
+
+Env:
+  EMBEDDING_STORE_DTYPE=float16   dtype for a newly created store (default float32)
+
+CLI:
+    python scripts/embedding_store.py stats   cache/embeddings
+    python scripts/embedding_store.py compact cache/embeddings
+    python scripts/embedding_store.py import-npy cache/embeddings [legacy_dir]
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sqlite3
+import sys
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+STORE_FORMAT = 1
+INDEX_FILE = "index.sqlite"
+LOOKUP_CHUNK = 500
+SUPPORTED_DTYPES = ("float32", "float16")
+
+
+class EmbeddingStore:
+    """Memory-mapped embedding matrix with a SQLite key -> row index."""
+
+    def __init__(self, path: str, dim: int, dtype: Optional[str] = None):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path / INDEX_FILE), timeout=60, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS vectors (key TEXT PRIMARY KEY, row INTEGER NOT NULL) WITHOUT ROWID"
+        )
+        requested = (dtype or os.getenv("EMBEDDING_STORE_DTYPE") or "float32").strip().lower()
+        if requested not in SUPPORTED_DTYPES:
+            raise ValueError(f"Unsupported embedding store dtype: {requested}")
+        self._conn.executemany(
+            "INSERT OR IGNORE INTO meta (key, value) VALUES (?, ?)",
+            [("format", str(STORE_FORMAT)), ("dim", str(int(dim))), ("dtype", requested),
+             ("rows", "0"), ("generation", "0")],
+        )
+        meta = self._meta()
+        if int(meta["dim"]) != int(dim):
+            raise ValueError(f"Embedding store {self.path} holds dim={meta['dim']}, requested dim={dim}")
+        # 已存在的 store 以其 meta 中的 dtype 为准
+        self.dim = int(dim)
+        self.dtype = np.dtype(meta["dtype"])
+        self.row_bytes = self.dim * self.dtype.itemsize
+        self._map: Optional[np.memmap] = None
+        self._map_key: Tuple[int, int] = (-1, 0)
+
+    def _meta(self) -> Dict[str, str]:
+        return dict(self._conn.execute("SELECT key, value FROM meta").fetchall())
+
+    def _vectors_path(self, generation: int) -> Path:
+        return self.path / f"vectors.{generation}.bin"
+
+    def _matrix(self, generation: int, rows: int) -> np.ndarray:
+        """当前 generation 前 rows 行的只读映射 (文件增长或压缩后重新映射)"""
+        if rows == 0:
+            return np.zeros((0, self.dim), dtype=self.dtype)
+        if self._map is None or self._map_key[0] != generation or self._map_key[1] < rows:
+            self._map = np.memmap(self._vectors_path(generation), dtype=self.dtype, mode="r", shape=(rows, self.dim))
+            self._map_key = (generation, rows)
+        return self._map
+
+    def __len__(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM vectors").fetchone()[0])
+
+    def get_many(self, keys: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Bulk lookup.
+
+        Returns:
+            (vectors, found): float32 matrix (len(keys), dim) with zero rows for
+            misses, and a bool mask of the keys that were present.
+        """
+        out = np.zeros((len(keys), self.dim), dtype=np.float32)
+        found = np.zeros(len(keys), dtype=bool)
+        if not keys:
+            return out, found
+        positions: Dict[str, List[int]] = {}
+        for i, key in enumerate(keys):
+            positions.setdefault(key, []).append(i)
+        unique = list(positions)
+
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                meta = self._meta()
+                hits: List[Tuple[str, int]] = []
+                for start in range(0, len(unique), LOOKUP_CHUNK):
+                    chunk = unique[start:start + LOOKUP_CHUNK]
+                    marks = ",".join("?" * len(chunk))
+                    hits.extend(self._conn.execute(f"SELECT key, row FROM vectors WHERE key IN ({marks})", chunk))
+                if hits:
+                    matrix = self._matrix(int(meta["generation"]), int(meta["rows"]))
+                    rows = np.fromiter((row for _, row in hits), dtype=np.int64, count=len(hits))
+                    vectors = np.asarray(matrix[rows], dtype=np.float32)
+            finally:
+                self._conn.execute("COMMIT")
+
+        for n, (key, _) in enumerate(hits):
+            for i in positions[key]:
+                out[i] = vectors[n]
+                found[i] = True
+        return out, found
+
+    def put_many(self, keys: Sequence[str], vectors: np.ndarray) -> None:
+        """Append vectors (later duplicates of a key win); the previous row of a re-written key becomes garbage."""
+        if not len(keys):
+            return
+        latest: Dict[str, int] = {}
+        for i, key in enumerate(keys):
+            latest[key] = i
+        order = list(latest.values())
+        data = np.ascontiguousarray(np.asarray(vectors)[order], dtype=self.dtype)
+        if data.shape != (len(order), self.dim):
+            raise ValueError(f"Expected vectors of shape (n, {self.dim}), got {np.asarray(vectors).shape}")
+
+        with self._lock:
+            # BEGIN IMMEDIATE 同时作为跨进程的追加锁
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                meta = self._meta()
+                generation, rows = int(meta["generation"]), int(meta["rows"])
+                path = self._vectors_path(generation)
+                with open(path, "r+b" if path.exists() else "wb") as f:
+                    # 从已提交的行数处写入, 覆盖崩溃写入者留下的半截尾部
+                    f.seek(rows * self.row_bytes)
+                    f.write(data.tobytes())
+                    f.flush()
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO vectors (key, row) VALUES (?, ?)",
+                    [(key, rows + n) for n, key in enumerate(latest)],
+                )
+                self._conn.execute("UPDATE meta SET value = ? WHERE key = 'rows'", (str(rows + len(order)),))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            meta = self._meta()
+            live = int(self._conn.execute("SELECT COUNT(*) FROM vectors").fetchone()[0])
+        rows = int(meta["rows"])
+        return {
+            "dim": self.dim,
+            "generation": int(meta["generation"]),
+            "rows": rows,
+            "live": live,
+            "dead": rows - live,
+            "bytes": rows * self.row_bytes,
+        }
+
+    def compact(self) -> Dict[str, int]:
+        """Rewrite live rows (in row order) into the next generation file and drop the old one."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                meta = self._meta()
+                generation, rows = int(meta["generation"]), int(meta["rows"])
+                live = self._conn.execute("SELECT key, row FROM vectors ORDER BY row").fetchall()
+                target = self._vectors_path(generation + 1)
+                tmp = target.with_name(f".{target.name}.tmp-{os.getpid()}")
+                old = self._matrix(generation, rows)
+                with open(tmp, "wb") as f:
+                    for start in range(0, len(live), 65536):
+                        chunk = [row for _, row in live[start:start + 65536]]
+                        f.write(np.ascontiguousarray(old[chunk], dtype=self.dtype).tobytes())
+                os.replace(tmp, target)
+                self._conn.executemany(
+                    "UPDATE vectors SET row = ? WHERE key = ?",
+                    [(n, key) for n, (key, _) in enumerate(live)],
+                )
+                self._conn.execute("UPDATE meta SET value = ? WHERE key = 'rows'", (str(len(live)),))
+                self._conn.execute("UPDATE meta SET value = ? WHERE key = 'generation'", (str(generation + 1),))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._map = None
+            self._map_key = (-1, 0)
+        try:
+            self._vectors_path(generation).unlink()
+        except OSError:
+            pass  # Windows 上其他进程仍映射着旧文件; 下次压缩时不再引用
+        return {"rows_before": rows, "rows_after": len(live)}
+
+    def import_npy_dir(self, legacy_dir: str, batch: int = 2048) -> int:
+        """Import a legacy cache/embeddings/<key>.npy directory (file stem = key); returns rows imported."""
+        files = sorted(Path(legacy_dir).glob("*.npy"))
+        imported = 0
+        for start in range(0, len(files), batch):
+            chunk = files[start:start + batch]
+            keys, vectors = [], []
+            for path in chunk:
+                try:
+                    vector = np.load(path)
+                except (OSError, ValueError):
+                    continue
+                if vector.shape == (self.dim,):
+                    keys.append(path.stem)
+                    vectors.append(vector)
+            if keys:
+                self.put_many(keys, np.stack(vectors))
+                imported += len(keys)
+        return imported
+
+    def close(self) -> None:
+        with self._lock:
+            self._map = None
+            self._conn.close()
+
+
+# Both `embedding_store` and `scripts.embedding_store` resolve to this file;
+# the later import shares the earlier one's registry, keeping one store (and
+# one SQLite connection) per directory in the process.
+_twin = sys.modules.get("scripts.embedding_store" if __name__ == "embedding_store" else "embedding_store")
+if _twin is not None and hasattr(_twin, "_stores_lock"):
+    _stores: Dict[str, EmbeddingStore] = _twin._stores
+    _stores_lock = _twin._stores_lock
+else:
+    _stores = {}
+    _stores_lock = threading.Lock()
+
+
+def get_embedding_store(path: str, dim: int) -> EmbeddingStore:
+    """Process-wide store per directory, shared by every EmbeddingClient."""
+    key = os.path.abspath(path)
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = EmbeddingStore(path, dim)
+            _stores[key] = store
+        return store
+
+
+def reset_embedding_stores() -> None:
+    with _stores_lock:
+        for store in _stores.values():
+            store.close()
+        _stores.clear()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Inspect or maintain the embedding store")
+    parser.add_argument("command", choices=["stats", "compact", "import-npy"])
+    parser.add_argument("store", help="Store directory (e.g. cache/embeddings)")
+    parser.add_argument("legacy_dir", nargs="?", help="import-npy: directory of <key>.npy files (default: store dir)")
+    parser.add_argument("--dim", type=int, default=1536)
+    args = parser.parse_args(argv)
+
+    store = EmbeddingStore(args.store, args.dim)
+    if args.command == "compact":
+        result = store.compact()
+        print(f"✅ Compacted {args.store}: {result['rows_before']} -> {result['rows_after']} rows")
+    elif args.command == "import-npy":
+        count = store.import_npy_dir(args.legacy_dir or args.store)
+        print(f"✅ Imported {count} .npy embeddings into {args.store}")
+    print(store.stats())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
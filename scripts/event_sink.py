@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+event_sink.py
+
+Process-wide JSONL event writer shared by every trace / progress producer
+(runtime_adapter._trace -> data/llm_trace.jsonl, log_llm_progress and
+ProgressReporter -> <dir>/<step>_progress.jsonl).
+
+Producers serialise the record on their own thread and enqueue one line; a
+single background writer keeps one open handle per file (LRU-capped), writes
+whole lines only, and flushes when the buffered bytes or the flush interval
+is exceeded, when flush() is called, and at process exit. Files can be
+rotated by size and the rotated parts gzip-compressed.
+
+Env:
+  EVENT_SINK_MODE               buffered (default) | sync (write on the caller thread)
+  EVENT_SINK_FLUSH_BYTES        buffered bytes that trigger a flush (default 65536)
+  EVENT_SINK_FLUSH_INTERVAL_MS  max age of buffered lines (default 500)
+  EVENT_SINK_ROTATE_MB          rotate a file once it exceeds this size (default 0 = off)
+  EVENT_SINK_COMPRESS           "1" to gzip rotated files
+"""
+
+from __future__ import annotations
+
+import atexit
+import gzip
+import json
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+DEFAULT_FLUSH_BYTES = 64 * 1024
+DEFAULT_FLUSH_INTERVAL_MS = 500
+MAX_OPEN_FILES = 32
+
+
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, "").strip() or default)
+    except ValueError:
+        return default
+
+
+class EventSink:
+    """Thread-safe buffered JSONL writer; see module docstring."""
+
+    def __init__(self, mode: str = "buffered", flush_bytes: int = DEFAULT_FLUSH_BYTES,
+                 flush_interval_ms: int = DEFAULT_FLUSH_INTERVAL_MS, rotate_bytes: int = 0,
+                 compress: bool = False, max_open_files: int = MAX_OPEN_FILES):
+        self.mode = mode if mode in ("buffered", "sync") else "buffered"
+        self.flush_bytes = max(1, int(flush_bytes))
+        self.flush_interval_s = max(0.0, flush_interval_ms / 1000.0)
+        self.rotate_bytes = max(0, int(rotate_bytes))
+        self.compress = compress
+        self.max_open_files = max(1, int(max_open_files))
+        self.rotations: List[str] = []
+        self._queue: "queue.Queue" = queue.Queue()
+        self._handles: "OrderedDict[str, Any]" = OrderedDict()
+        self._io_lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    @classmethod
+    def from_env(cls) -> "EventSink":
+        return cls(
+            mode=os.getenv("EVENT_SINK_MODE", "buffered").strip().lower(),
+            flush_bytes=_env_int("EVENT_SINK_FLUSH_BYTES", DEFAULT_FLUSH_BYTES),
+            flush_interval_ms=_env_int("EVENT_SINK_FLUSH_INTERVAL_MS", DEFAULT_FLUSH_INTERVAL_MS),
+            rotate_bytes=_env_int("EVENT_SINK_ROTATE_MB", 0) * 1024 * 1024,
+            compress=os.getenv("EVENT_SINK_COMPRESS", "0").strip() == "1",
+        )
+
+    # ---------------- producer side ----------------
+
+    def emit(self, path: str, record: Dict[str, Any]) -> None:
+        """Queue one JSON line for path (resolved against the current cwd now)."""
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        target = os.path.abspath(path)
+        if self.mode == "sync" or self._closed or not self._ensure_writer():
+            with self._io_lock:
+                self._write_batch({target: [line]})
+            return
+        self._queue.put((target, line))
+
+    def flush(self, timeout: Optional[float] = 10.0) -> bool:
+        """Block until every line queued before this call is on disk."""
+        if self._thread is None or not self._thread.is_alive():
+            self._drain_inline()
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self) -> None:
+        self.flush()
+        self._closed = True
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            self._queue.put(None)
+            thread.join(timeout=5.0)
+        self._drain_inline()
+        with self._io_lock:
+            for handle in self._handles.values():
+                try:
+                    handle.close()
+                except OSError:
+                    pass
+            self._handles.clear()
+
+    # ---------------- writer side ----------------
+
+    def _ensure_writer(self) -> bool:
+        if self._thread is not None and self._thread.is_alive():
+            return True
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return True
+            try:
+                thread = threading.Thread(target=self._run, name="event-sink", daemon=True)
+                thread.start()
+            except RuntimeError:  # interpreter shutting down
+                return False
+            self._thread = thread
+        return True
+
+    def _run(self) -> None:
+        pending: Dict[str, List[str]] = {}
+        pending_bytes = 0
+        oldest = 0.0
+        while True:
+            wait = None
+            if pending:
+                wait = max(0.0, oldest + self.flush_interval_s - time.monotonic())
+            try:
+                item = self._queue.get(timeout=wait)
+            except queue.Empty:
+                item = ()
+            if isinstance(item, tuple) and item:
+                path, line = item
+                if not pending:
+                    oldest = time.monotonic()
+                pending.setdefault(path, []).append(line)
+                pending_bytes += len(line)
+                if pending_bytes < self.flush_bytes and time.monotonic() - oldest < self.flush_interval_s:
+                    continue
+            if pending:
+                with self._io_lock:
+                    self._write_batch(pending)
+                pending = {}
+                pending_bytes = 0
+            if isinstance(item, threading.Event):
+                item.set()
+            elif item is None:
+                return
+
+    def _drain_inline(self) -> None:
+        """Write whatever is queued without the writer thread (exit / after fork)."""
+        pending: Dict[str, List[str]] = {}
+        events = []
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if isinstance(item, tuple) and item:
+                pending.setdefault(item[0], []).append(item[1])
+            elif isinstance(item, threading.Event):
+                events.append(item)
+        if pending:
+            with self._io_lock:
+                self._write_batch(pending)
+        for event in events:
+            event.set()
+
+    def _handle(self, path: str):
+        handle = self._handles.pop(path, None)
+        if handle is not None and not handle.closed:
+            # one stat per flushed batch: reopen if the file was removed or replaced meanwhile
+            try:
+                current, opened = os.stat(path), os.fstat(handle.fileno())
+                if (current.st_dev, current.st_ino) == (opened.st_dev, opened.st_ino):
+                    self._handles[path] = handle
+                    return handle
+            except OSError:
+                pass
+            handle.close()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        handle = open(path, "a", encoding="utf-8")
+        self._handles[path] = handle
+        while len(self._handles) > self.max_open_files:
+            _, old = self._handles.popitem(last=False)
+            old.close()
+        return handle
+
+    def _write_batch(self, pending: Dict[str, List[str]]) -> None:
+        for path, lines in pending.items():
+            try:
+                handle = self._handle(path)
+                handle.write("".join(lines))
+                handle.flush()
+                if self.rotate_bytes and handle.tell() >= self.rotate_bytes:
+                    self._rotate(path)
+            except OSError:
+                # Tracing should never break the main flow; drop the handle and retry next time
+                stale = self._handles.pop(path, None)
+                if stale is not None:
+                    try:
+                        stale.close()
+                    except OSError:
+                        pass
+
+    def _rotate(self, path: str) -> None:
+        self._handles.pop(path).close()
+        stamp = datetime.now().strftime("%Y%m%dT%H%M%S")
+        rotated = f"{path}.{stamp}"
+        suffix = 1
+        while os.path.exists(rotated) or os.path.exists(rotated + ".gz"):
+            rotated = f"{path}.{stamp}-{suffix}"
+            suffix += 1
+        os.replace(path, rotated)
+        if self.compress:
+            with open(rotated, "rb") as src, gzip.open(rotated + ".gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            os.remove(rotated)
+            rotated += ".gz"
+        self.rotations.append(rotated)
+
+
+class _SinkState:
+    """Slot for the process-wide sink."""
+
+    def __init__(self):
+        self.sink: Optional[EventSink] = None
+        self.lock = threading.Lock()
+
+
+# This file is imported both as `event_sink` and `scripts.event_sink`. The copy
+# loaded first owns the sink slot and the other adopts it, so a process only
+# ever has one sink to flush.
+_twin = sys.modules.get("scripts.event_sink" if __name__ == "event_sink" else "event_sink")
+_state: _SinkState = getattr(_twin, "_state", None) or _SinkState()
+
+
+def get_event_sink() -> EventSink:
+    sink = _state.sink
+    if sink is None:
+        with _state.lock:
+            if _state.sink is None:
+                _state.sink = EventSink.from_env()
+            sink = _state.sink
+    return sink
+
+
+def emit_event(path: str, record: Dict[str, Any]) -> None:
+    get_event_sink().emit(path, record)
+
+
+def flush_events(timeout: Optional[float] = 10.0) -> bool:
+    """Make every event emitted so far visible to readers of the files."""
+    sink = _state.sink
+    if sink is None:
+        return True
+    return sink.flush(timeout)
+
+
+def reset_event_sink() -> None:
+    """Close the shared sink; the next emit re-reads the EVENT_SINK_* env."""
+    with _state.lock:
+        sink, _state.sink = _state.sink, None
+    if sink is not None:
+        sink.close()
+
+
+def _after_fork_in_child() -> None:
+    # The writer thread does not survive fork; the child starts its own sink
+    _state.lock = threading.Lock()
+    _state.sink = None
+
+
+def _flush_at_exit() -> None:
+    sink, _state.sink = _state.sink, None
+    if sink is not None:
+        sink.close()
+
+
+atexit.register(_flush_at_exit)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
@@ -18,7 +18,7 @@ from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Set, Tuple, Any
 
-from segmenter_factory import segment_text, build_segmenter_chain
+from segmenter_factory import chain_names, segment_text, segmentation_cache_stats
 
 try:
     import yaml
@@ -246,7 +246,7 @@ class SegmentedExtractor(BaseExtractor):
                 'evidence': {
                     'sources': evidence[term],
                     'domain_hint': self.domain_hint,
-                    'backend_chain': [s.name for s in build_segmenter_chain(self.seg_backend)],
+                    'backend_chain': chain_names(self.seg_backend),
                 },
                 'policy': 'forbidden_term_review' if self._is_forbidden_term(term) else None,
             })
@@ -333,7 +333,7 @@ class HeuristicExtractor(BaseExtractor):
                 'evidence': {
                     'sources': evidence[term],
                     'domain_hint': self.domain_hint,
-                    'backend_chain': [s.name for s in build_segmenter_chain(self.seg_backend)],
+                    'backend_chain': chain_names(self.seg_backend),
                 },
                 'policy': 'forbidden_term_review' if self._is_forbidden_term(term) else None,
             })
@@ -459,7 +459,7 @@ class WeightedExtractor(BaseExtractor):
                 'evidence': {
                     'sources': evidence[term],
                     'domain_hint': self.domain_hint,
-                    'backend_chain': [s.name for s in build_segmenter_chain(self.seg_backend)],
+                    'backend_chain': chain_names(self.seg_backend),
                 },
                 'policy': 'forbidden_term_review' if self._is_forbidden_term(term) else None,
             })
@@ -547,7 +547,7 @@ class LLMExtractor(BaseExtractor):
                 'evidence': {
                     'sources': examples[term],
                     'domain_hint': self.domain_hint,
-                    'backend_chain': [s.name for s in build_segmenter_chain(self.seg_backend)],
+                    'backend_chain': chain_names(self.seg_backend),
                 },
                 'policy': 'forbidden_term_review' if self._is_forbidden_term(term) else None,
             })
@@ -785,6 +785,9 @@ def main():
         candidates = extractor.extract(texts)
 
     print(f'✅ 提取候选: {len(candidates)}')
+    seg_stats = segmentation_cache_stats()
+    if seg_stats['hits'] or seg_stats['misses']:
+        print(f"   分词缓存命中率: {seg_stats['hit_rate']:.1%} ({seg_stats['hits']} hits / {seg_stats['misses']} misses)")
     b = _bucket(candidates)
     print(f"   critical={len(b['critical'])}, proposed={len(b['proposed'])}, low_confidence={len(b['low_confidence'])}")
 
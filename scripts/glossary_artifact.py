@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+glossary_artifact.py
+
+Binary sidecar for compiled glossaries, so every stage does not re-parse
+glossary/compiled.yaml with the pure-Python YAML loader at startup.
+
+glossary_compile.py writes <compiled>.bin (pickle protocol 5) next to the
+YAML. It holds:
+  - data         the exact yaml.safe_load() result of the compiled YAML
+  - locale_maps  normalized locale -> {term_zh: target} (term_ru fills ru-RU)
+  - compiled_hash / source_sha256  the lock hash and the YAML bytes digest
+
+Loaders (translate_llm.load_glossary, glossary_delta.load_compiled,
+glossary_autopromote.load_glossary_entries, GlossaryVectorStore) call
+load_glossary_data(); the sidecar is used only when both the lock hash
+(compiled.lock.json "hash") and the YAML digest match, otherwise the YAML
+is parsed (C loader when available). The sidecar is a local build artifact
+and is trusted like the YAML next to it.
+
+Env:
+  GLOSSARY_SIDECAR=0   always parse the YAML
+
+Rebuild by hand:
+    python scripts/glossary_artifact.py glossary/compiled.yaml
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+SIDECAR_FORMAT = 1
+SIDECAR_SUFFIX = ".bin"
+
+
+def sidecar_path(yaml_path: str) -> Path:
+    return Path(yaml_path).with_suffix(SIDECAR_SUFFIX)
+
+
+def _sidecar_enabled() -> bool:
+    return os.getenv("GLOSSARY_SIDECAR", "1").strip().lower() not in ("0", "false", "off", "no")
+
+
+def _normalize_locale(locale: str) -> str:
+    value = str(locale or "").strip().replace("_", "-")
+    parts = [part for part in value.split("-") if part]
+    if not parts:
+        return ""
+    if len(parts) == 1:
+        return parts[0].lower()
+    return "-".join([parts[0].lower(), parts[1].upper(), *parts[2:]])
+
+
+def lock_hash(yaml_path: str) -> str:
+    """"hash" from <compiled>.lock.json, "" when there is no lock."""
+    lock_path = Path(yaml_path).with_suffix(".lock.json")
+    try:
+        return str(json.loads(lock_path.read_text(encoding="utf-8")).get("hash") or "")
+    except (OSError, ValueError, AttributeError):
+        return ""
+
+
+def _parse_yaml(raw: bytes) -> Dict[str, Any]:
+    if yaml is None:
+        return {}
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    return yaml.load(raw.decode("utf-8"), Loader=loader) or {}
+
+
+def build_locale_maps(data: Dict[str, Any]) -> Dict[str, Dict[str, str]]:
+    """Same resolution as translate_llm._entry_targets / glossary_delta._legacy_target_from_entry."""
+    entries = data.get("entries", []) if isinstance(data, dict) else []
+    maps: Dict[str, Dict[str, str]] = {"ru-RU": {}}
+    for entry in entries or []:
+        if not isinstance(entry, dict):
+            continue
+        term_zh = str(entry.get("term_zh") or "").strip()
+        if not term_zh:
+            continue
+        targets: Dict[str, str] = {}
+        raw_targets = entry.get("targets")
+        if isinstance(raw_targets, dict):
+            for locale, value in raw_targets.items():
+                locale_key = _normalize_locale(str(locale))
+                term_value = str(value or "").strip()
+                if locale_key and term_value:
+                    targets[locale_key] = term_value
+        legacy_ru = str(entry.get("term_ru") or "").strip()
+        if "ru-RU" not in targets and legacy_ru:
+            targets["ru-RU"] = legacy_ru
+        for locale_key, term_value in targets.items():
+            maps.setdefault(locale_key, {})[term_zh] = term_value
+    return maps
+
+
+def write_sidecar(yaml_path: str) -> Path:
+    """Parse the YAML once and write the sidecar (atomic temp + replace)."""
+    raw = Path(yaml_path).read_bytes()
+    data = _parse_yaml(raw)
+    payload = {
+        "format": SIDECAR_FORMAT,
+        "compiled_hash": lock_hash(yaml_path),
+        "source_sha256": hashlib.sha256(raw).hexdigest(),
+        "data": data,
+        "locale_maps": build_locale_maps(data),
+    }
+    target = sidecar_path(yaml_path)
+    tmp = target.with_name(f".{target.name}.tmp-{os.getpid()}")
+    with open(tmp, "wb") as f:
+        pickle.dump(payload, f, protocol=5)
+    os.replace(tmp, target)
+    return target
+
+
+def load_glossary_artifact(yaml_path: str) -> Optional[Dict[str, Any]]:
+    """Sidecar payload if it matches the YAML on disk (and its lock), else None."""
+    if not _sidecar_enabled():
+        return None
+    sidecar = sidecar_path(yaml_path)
+    if not sidecar.exists():
+        return None
+    try:
+        raw = Path(yaml_path).read_bytes()
+        with open(sidecar, "rb") as f:
+            payload = pickle.load(f)
+    except Exception:
+        return None
+    if not isinstance(payload, dict) or payload.get("format") != SIDECAR_FORMAT:
+        return None
+    if payload.get("compiled_hash") != lock_hash(yaml_path):
+        return None
+    if payload.get("source_sha256") != hashlib.sha256(raw).hexdigest():
+        return None
+    return payload
+
+
+def load_glossary_data(yaml_path: str) -> Dict[str, Any]:
+    """The YAML document of a glossary file, from the sidecar when it is current."""
+    artifact = load_glossary_artifact(yaml_path)
+    if artifact is not None:
+        return artifact["data"]
+    return _parse_yaml(Path(yaml_path).read_bytes())
+
+
+def main() -> int:
+    if len(sys.argv) < 2:
+        print("Usage: python scripts/glossary_artifact.py <compiled.yaml> [...]")
+        return 1
+    for path in sys.argv[1:]:
+        target = write_sidecar(path)
+        print(f"✅ Wrote {target}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
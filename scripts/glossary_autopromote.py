@@ -39,6 +39,7 @@ except ImportError:
     yaml = None
 
 from runtime_adapter import LLMClient, LLMError
+from glossary_artifact import load_glossary_artifact
 
 try:
     from batch_utils import BatchConfig, split_into_batches, format_progress
@@ -109,7 +110,8 @@ class GlossaryEntry:
 def load_glossary_entries(path: str) -> List[GlossaryEntry]:
     if not path or not Path(path).exists():
         return []
-    g = load_yaml_file(path)
+    artifact = load_glossary_artifact(path)
+    g = artifact["data"] if artifact is not None else load_yaml_file(path)
     entries = []
     entry_list = g.get("entries") or g.get("candidates") or []
     if isinstance(entry_list, list):
@@ -442,7 +444,7 @@ def main():
     llm = LLMClient()
     print(f"✅ LLM: {llm.default_model}")
 
-    config = BatchConfig(max_items=args.batch_size, max_tokens=4000)
+    config = BatchConfig(max_items=args.batch_size, max_tokens=4000, model=llm.default_model)
     config.text_fields = ["source_zh", "before_ru", "after_ru"]
     batches = split_into_batches(candidate_rows, config)
     print(f"   Batches: {len(batches)}")
@@ -18,6 +18,7 @@ Usage:
 Outputs:
     - glossary/compiled.yaml (on success)
     - glossary/compiled.lock.json (on success)
+    - glossary/compiled.bin (on success; binary sidecar for fast loads, see glossary_artifact.py)
     - glossary/conflicts_report.json (if conflicts and no --resolve_by_scope)
 
 Conflict handling:
@@ -41,6 +42,11 @@ except ImportError:
     print("❌ Error: PyYAML is required. Install with: pip install pyyaml")
     sys.exit(1)
 
+try:
+    from scripts.glossary_artifact import write_sidecar
+except ImportError:
+    from glossary_artifact import write_sidecar
+
 
 # Scope priority (higher = more specific, wins)
 SCOPE_PRIORITY = {
@@ -437,10 +443,13 @@ def main():
         args.language_pair, args.genre, args.franchise,
         ",".join(approved_paths), args.tag
     )
+    # 写在 lock 之后: sidecar 以 lock hash + YAML 摘要为键
+    sidecar = write_sidecar(args.out_compiled)
     
     print()
     print(f"✅ Saved compiled glossary to: {args.out_compiled}")
     print(f"✅ Saved lock file to: {lock_path}")
+    print(f"✅ Saved binary sidecar to: {sidecar}")
     
     return 0
 
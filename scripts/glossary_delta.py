@@ -23,6 +23,13 @@ except ImportError:
     print("PyYAML is required. Install with: pip install pyyaml")
     sys.exit(1)
 
+try:
+    from scripts.glossary_matcher import GlossaryMatcher, get_glossary_matcher
+    from scripts.glossary_artifact import load_glossary_artifact
+except ImportError:  # pragma: no cover
+    from glossary_matcher import GlossaryMatcher, get_glossary_matcher
+    from glossary_artifact import load_glossary_artifact
+
 
 GLOSSARY_RULE = "glossary"
 STYLE_RULE = "style_profile"
@@ -138,6 +145,11 @@ def _legacy_target_from_entry(entry: Dict[str, Any], target_locale: str) -> str:
 
 
 def load_compiled(path: str, target_locale: str = "ru-RU") -> Tuple[Dict[str, str], str, Dict[str, Any]]:
+    artifact = load_glossary_artifact(path) if path and Path(path).exists() else None
+    if artifact is not None:
+        # 二进制 sidecar 已预建 locale -> term map
+        term_map = dict(artifact["locale_maps"].get(_normalize_locale(target_locale), {}))
+        return term_map, _load_hash_with_lock(path), artifact["data"]
     data = _read_yaml(path)
     entries = data.get("entries", []) if isinstance(data, dict) else []
     term_map: Dict[str, str] = {}
@@ -344,6 +356,32 @@ def _build_recommended_action(delta_types: Iterable[str], content_class: str, ri
     return "skip", False, ""
 
 
+class _TermIndex:
+    """Matcher over one key per item; maps a string to the indices of items whose key occurs in it."""
+
+    def __init__(self, keys: List[str], empty_matches: bool = False):
+        self.positions: Dict[str, List[int]] = {}
+        self.always: List[int] = []
+        for idx, key in enumerate(keys):
+            if key:
+                self.positions.setdefault(str(key), []).append(idx)
+            elif empty_matches:
+                self.always.append(idx)
+        self.matcher: GlossaryMatcher = get_glossary_matcher(self.positions)
+
+    def match(self, text: str) -> List[int]:
+        hits = [idx for term in self.matcher.find_all(text) for idx in self.positions[term]]
+        return sorted(hits + self.always) if self.always else sorted(hits)
+
+
+def _old_target_index(items: List[Dict[str, Any]], locale: str, cache: Dict[str, _TermIndex]) -> _TermIndex:
+    index = cache.get(locale)
+    if index is None:
+        index = _TermIndex([str((item.get("old_targets") or {}).get(locale) or "").strip() for item in items])
+        cache[locale] = index
+    return index
+
+
 def build_row_impacts(
     rows: List[Dict[str, str]],
     target_locale: str,
@@ -354,11 +392,24 @@ def build_row_impacts(
     change_events: List[Dict[str, Any]],
 ) -> List[Dict[str, Any]]:
     impacts: List[Dict[str, Any]] = []
+    added = glossary_delta.get("added", [])
+    changed = glossary_delta.get("changed", [])
+    removed = glossary_delta.get("removed", [])
     preferred_changed = style_delta.get("preferred_term_changed", [])
-    banned_terms = set(style_delta.get("banned_term_changed", []))
-    aliases = set(style_delta.get("prohibited_alias_changed", []))
+    banned_terms = sorted(set(style_delta.get("banned_term_changed", [])))
+    aliases = sorted(set(style_delta.get("prohibited_alias_changed", [])))
     normalized_target_locale = _normalize_locale(target_locale)
 
+    # One automaton per term list instead of a substring scan per term per row
+    added_index = _TermIndex([item["term_zh"] for item in added], empty_matches=True)
+    changed_index = _TermIndex([item["term_zh"] for item in changed], empty_matches=True)
+    removed_index = _TermIndex([item["term_zh"] for item in removed], empty_matches=True)
+    preferred_index = _TermIndex([item["term_zh"] for item in preferred_changed], empty_matches=True)
+    banned_index = _TermIndex(banned_terms)
+    alias_index = _TermIndex(aliases)
+    changed_old_targets: Dict[str, _TermIndex] = {}
+    removed_old_targets: Dict[str, _TermIndex] = {}
+
     for row in rows:
         string_id = str(row.get("string_id") or "").strip()
         if not string_id:
@@ -377,31 +428,30 @@ def build_row_impacts(
 
         glossary_locale_matches = _normalize_locale(row_locale) == normalized_target_locale
 
-        for item in glossary_delta.get("added", []):
-            if glossary_locale_matches and item["term_zh"] in source_zh:
+        if glossary_locale_matches:
+            for idx in added_index.match(source_zh):
+                item = added[idx]
                 _append_reason(bucket, "term_added", "GLOSSARY_TERM_ADDED", f"source contains newly added glossary term {item['term_zh']}", GLOSSARY_RULE)
 
-        for item in glossary_delta.get("changed", []):
-            old_target = str((item.get("old_targets") or {}).get(row_locale) or "").strip()
-            if glossary_locale_matches and (item["term_zh"] in source_zh or (old_target and old_target in current_target)):
+            old_target_hits = _old_target_index(changed, row_locale, changed_old_targets).match(current_target)
+            for idx in sorted(set(changed_index.match(source_zh)).union(old_target_hits)):
+                item = changed[idx]
                 _append_reason(bucket, "term_changed", "GLOSSARY_TERM_CHANGED", f"source depends on changed glossary term {item['term_zh']}", GLOSSARY_RULE)
 
-        for item in glossary_delta.get("removed", []):
-            old_target = str((item.get("old_targets") or {}).get(row_locale) or "").strip()
-            if glossary_locale_matches and (item["term_zh"] in source_zh or (old_target and old_target in current_target)):
+            old_target_hits = _old_target_index(removed, row_locale, removed_old_targets).match(current_target)
+            for idx in sorted(set(removed_index.match(source_zh)).union(old_target_hits)):
+                item = removed[idx]
                 _append_reason(bucket, "term_removed", "GLOSSARY_TERM_REMOVED", f"row depends on removed glossary term {item['term_zh']}", GLOSSARY_RULE)
 
-        for item in preferred_changed:
-            if item["term_zh"] in source_zh:
-                _append_reason(bucket, "preferred_term_changed", "STYLE_PREFERRED_TERM_CHANGED", f"preferred term changed for {item['term_zh']}", STYLE_RULE)
+        for idx in preferred_index.match(source_zh):
+            item = preferred_changed[idx]
+            _append_reason(bucket, "preferred_term_changed", "STYLE_PREFERRED_TERM_CHANGED", f"preferred term changed for {item['term_zh']}", STYLE_RULE)
 
-        for banned_term in banned_terms:
-            if banned_term and banned_term in current_target:
-                _append_reason(bucket, "banned_term_changed", "STYLE_BANNED_TERM_CHANGED", f"current target contains banned term {banned_term}", STYLE_RULE)
+        for idx in banned_index.match(current_target):
+            _append_reason(bucket, "banned_term_changed", "STYLE_BANNED_TERM_CHANGED", f"current target contains banned term {banned_terms[idx]}", STYLE_RULE)
 
-        for alias in aliases:
-            if alias and alias in current_target:
-                _append_reason(bucket, "prohibited_alias_changed", "STYLE_PROHIBITED_ALIAS_CHANGED", f"current target contains prohibited alias {alias}", STYLE_RULE)
+        for idx in alias_index.match(current_target):
+            _append_reason(bucket, "prohibited_alias_changed", "STYLE_PROHIBITED_ALIAS_CHANGED", f"current target contains prohibited alias {aliases[idx]}", STYLE_RULE)
 
         if style_delta.get("style_contract_changed") and current_target:
             _append_reason(bucket, "style_contract_changed", "STYLE_CONTRACT_CHANGED", "style contract changed for active locale", STYLE_RULE)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+glossary_matcher.py
+
+Aho–Corasick multi-pattern matcher for glossary lookups.
+
+Replaces per-row loops of the form `for term in glossary: if term in text`
+(translate_refresh, glossary_delta, soft_qa_llm). The automaton is compiled
+once per distinct term set (keyed by its hash) and reports every term that
+occurs in a string in a single pass over that string.
+
+find_all() returns the distinct matched terms in registration order, so a
+caller iterating the result sees hits in the same order its original loop
+over the glossary would have produced them.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Sequence
+
+MATCHER_CACHE_SIZE = 32
+
+
+class GlossaryMatcher:
+    """Compiled automaton over a fixed list of non-empty terms."""
+
+    __slots__ = ("terms", "_goto", "_fail", "_out", "_dict_link")
+
+    def __init__(self, terms: Iterable[str]):
+        ordered: Dict[str, int] = {}
+        for term in terms:
+            term = str(term or "")
+            if term and term not in ordered:
+                ordered[term] = len(ordered)
+        self.terms: List[str] = list(ordered)
+        # state 0 is the root; _out[state] = index of the term ending there or -1
+        self._goto: List[Dict[str, int]] = [{}]
+        self._out: List[int] = [-1]
+        for idx, term in enumerate(self.terms):
+            state = 0
+            for ch in term:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._out.append(-1)
+                state = nxt
+            self._out[state] = idx
+        self._fail: List[int] = [0] * len(self._goto)
+        # nearest proper suffix state that ends a term (0 = none)
+        self._dict_link: List[int] = [0] * len(self._goto)
+        self._build_links()
+
+    def _build_links(self) -> None:
+        goto, fail, out, dict_link = self._goto, self._fail, self._out, self._dict_link
+        queue = list(goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                f = fail[state]
+                while f and ch not in goto[f]:
+                    f = fail[f]
+                target = goto[f].get(ch, 0) if state else 0
+                fail[nxt] = target if target != nxt else 0
+                link = fail[nxt]
+                dict_link[nxt] = link if out[link] >= 0 else dict_link[link]
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def find_indices(self, text: str) -> List[int]:
+        """Sorted indices (into self.terms) of every term occurring in text."""
+        if not text or not self.terms:
+            return []
+        goto, fail, out, dict_link = self._goto, self._fail, self._out, self._dict_link
+        found = set()
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            hit = state if out[state] >= 0 else dict_link[state]
+            while hit and out[hit] not in found:
+                found.add(out[hit])
+                hit = dict_link[hit]
+        return sorted(found)
+
+    def find_all(self, text: str) -> List[str]:
+        """Distinct terms occurring in text, in registration order."""
+        terms = self.terms
+        return [terms[idx] for idx in self.find_indices(text)]
+
+
+def glossary_terms_hash(terms: Sequence[str]) -> str:
+    digest = hashlib.sha256()
+    for term in terms:
+        digest.update(str(term).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()
+
+
+_cache: "OrderedDict[str, GlossaryMatcher]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def get_glossary_matcher(terms: Iterable[str]) -> GlossaryMatcher:
+    """Matcher for terms (order significant), compiled once per term-set hash."""
+    term_list = [str(term or "") for term in terms]
+    key = glossary_terms_hash(term_list)
+    with _cache_lock:
+        matcher = _cache.get(key)
+        if matcher is not None:
+            _cache.move_to_end(key)
+            return matcher
+    matcher = GlossaryMatcher(term_list)
+    with _cache_lock:
+        _cache[key] = matcher
+        while len(_cache) > MATCHER_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return matcher
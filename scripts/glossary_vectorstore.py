@@ -8,7 +8,8 @@ glossary_vectorstore.py (v1.0)
 
 Features:
 - 加载术语表并计算向量
-- 缓存向量到本地 .npz 文件
+- 向量缓存走 EmbeddingClient 的共享 embedding store (与 SemanticScorer 同一份),
+  术语表变动时只为新增术语请求 API
 - 检索与源文本相关的术语 (Top-K)
 - 格式化为 Prompt 注入格式
 
@@ -42,11 +43,11 @@ except ImportError:
     yaml = None
 
 from runtime_adapter import EmbeddingClient, LLMError
+from glossary_artifact import load_glossary_artifact
 
 # Configuration
 DEFAULT_TOP_K = 15
 SIMILARITY_THRESHOLD = 0.3  # Minimum similarity to include
-GLOSSARY_CACHE_FILE = "cache/glossary_embeddings.npz"
 
 
 class GlossaryVectorStore:
@@ -82,17 +83,21 @@ class GlossaryVectorStore:
         Returns:
             int: 加载的术语数量
         """
-        if yaml is None:
-            print("[Warning] PyYAML not installed. Cannot load glossary.")
-            return 0
-        
         if not os.path.exists(self.glossary_path):
             print(f"[Warning] Glossary not found: {self.glossary_path}")
             return 0
         
+        artifact = load_glossary_artifact(self.glossary_path)
+        if artifact is None and yaml is None:
+            print("[Warning] PyYAML not installed. Cannot load glossary.")
+            return 0
+        
         try:
-            with open(self.glossary_path, 'r', encoding='utf-8') as f:
-                data = yaml.safe_load(f)
+            if artifact is not None:
+                data = artifact["data"]
+            else:
+                with open(self.glossary_path, 'r', encoding='utf-8') as f:
+                    data = yaml.safe_load(f)
         except Exception as e:
             print(f"[Error] Failed to load glossary: {e}")
             return 0
@@ -115,48 +120,21 @@ class GlossaryVectorStore:
         构建向量索引
         
         Args:
-            force_rebuild: 强制重建 (忽略缓存)
+            force_rebuild: 强制重建 (绕过 embedding store, 全部重新请求)
         """
-        cache_path = GLOSSARY_CACHE_FILE
-        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
-        
-        # Check cache validity
-        if not force_rebuild and os.path.exists(cache_path):
-            try:
-                cached = np.load(cache_path, allow_pickle=True)
-                cached_texts = cached['texts'].tolist()
-                
-                # Validate cache matches current glossary
-                if cached_texts == self.term_texts:
-                    self.embeddings = cached['embeddings']
-                    print(f"[GlossaryVectorStore] Loaded cached embeddings ({len(self.terms)} terms)")
-                    return
-            except Exception as e:
-                print(f"[GlossaryVectorStore] Cache load error, rebuilding: {e}")
-        
-        # Build new index
         if not self.term_texts:
             self.embeddings = np.array([]).reshape(0, 1536)
             return
         
-        print(f"[GlossaryVectorStore] Computing embeddings for {len(self.term_texts)} terms...")
+        print(f"[GlossaryVectorStore] Embedding {len(self.term_texts)} terms...")
         
         try:
             client = self._get_client()
-            self.embeddings = client.embed_batch(self.term_texts, use_cache=False)
+            self.embeddings = client.embed_batch(self.term_texts, use_cache=not force_rebuild)
         except LLMError as e:
             print(f"[Error] Embedding API failed: {e}")
             self.embeddings = np.array([]).reshape(0, 1536)
             return
-        
-        # Save cache
-        try:
-            np.savez(cache_path,
-                     texts=np.array(self.term_texts, dtype=object),
-                     embeddings=self.embeddings)
-            print(f"[GlossaryVectorStore] Cached embeddings to {cache_path}")
-        except Exception as e:
-            print(f"[Warning] Failed to cache embeddings: {e}")
     
     def retrieve_relevant_terms(self, source_texts: List[str], top_k: int = DEFAULT_TOP_K) -> List[Dict]:
         """
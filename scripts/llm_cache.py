@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+llm_cache.py
+
+Content-addressed LLM response cache backed by a local SQLite file.
+
+Key = sha256(model, system, user, temperature, max_tokens, response_format).
+Entries expire after a TTL and the table is trimmed back to max_entries by
+least-recent access (LRU). WAL mode lets sharded processes share one file.
+
+Env:
+  LLM_CACHE_PATH          SQLite path; empty/unset disables the cache (opt-in)
+                          (--no-llm-cache overrides it in-process, see disable_response_cache)
+  LLM_CACHE_TTL_S         entry lifetime in seconds (default 604800 = 7 days)
+  LLM_CACHE_MAX_ENTRIES   LRU size bound (default 50000)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+DEFAULT_TTL_S = 7 * 24 * 3600
+DEFAULT_MAX_ENTRIES = 50000
+# Evict at most once every N writes to keep put() cheap
+EVICT_EVERY = 200
+
+
+def cache_key(model: str, system: str, user: str, temperature: Any,
+              max_tokens: Any = None, response_format: Any = None) -> str:
+    """Stable content hash for one chat request."""
+    material = json.dumps(
+        {
+            "model": model,
+            "system": system,
+            "user": user,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "response_format": response_format,
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """Thread-safe SQLite response cache with TTL and LRU eviction."""
+
+    def __init__(self, path: str, ttl_s: int = DEFAULT_TTL_S, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.ttl_s = ttl_s
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " model TEXT,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL,"
+            " payload TEXT NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses(accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached payload dict, or None on miss/expiry."""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT created_at, payload FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            created_at, payload = row
+            if self.ttl_s and now - created_at > self.ttl_s:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                self.misses += 1
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(payload)
+
+    def put(self, key: str, model: str, payload: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses(key, model, created_at, accessed_at, payload) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, model, now, now, json.dumps(payload, ensure_ascii=False)),
+            )
+            self._writes += 1
+            if self._writes % EVICT_EVERY == 0:
+                self._evict_locked(now)
+            self._conn.commit()
+
+    def evict(self) -> None:
+        """Drop expired rows and trim to max_entries (least recently accessed first)."""
+        with self._lock:
+            self._evict_locked(time.time())
+            self._conn.commit()
+
+    def _evict_locked(self, now: float) -> None:
+        if self.ttl_s:
+            self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.ttl_s,))
+        if self.max_entries:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses}
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_cache_instances: Dict[str, LLMResponseCache] = {}
+_cache_lock = threading.Lock()
+# --no-llm-cache 的进程内开关; 不改 os.environ, 避免泄漏到同进程的其他阶段
+_cache_disabled = False
+
+
+def get_response_cache() -> Optional[LLMResponseCache]:
+    """Process-wide cache for LLM_CACHE_PATH, or None when caching is off."""
+    path = os.getenv("LLM_CACHE_PATH", "").strip()
+    if _cache_disabled or not path:
+        return None
+    with _cache_lock:
+        cache = _cache_instances.get(path)
+        if cache is None:
+            try:
+                ttl_s = int(os.getenv("LLM_CACHE_TTL_S", str(DEFAULT_TTL_S)))
+                max_entries = int(os.getenv("LLM_CACHE_MAX_ENTRIES", str(DEFAULT_MAX_ENTRIES)))
+                cache = LLMResponseCache(path, ttl_s=ttl_s, max_entries=max_entries)
+            except (OSError, ValueError, sqlite3.Error):
+                return None
+            _cache_instances[path] = cache
+        return cache
+
+
+def _reset_after_fork() -> None:
+    """SQLite connections must not be shared across fork."""
+    global _cache_lock
+    _cache_instances.clear()
+    _cache_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def disable_response_cache(disabled: bool = True) -> None:
+    """Escape hatch for --no-llm-cache; a module-level override, LLM_CACHE_PATH is left untouched."""
+    global _cache_disabled
+    _cache_disabled = bool(disabled)
+
+
+def response_cache_disabled() -> bool:
+    return _cache_disabled
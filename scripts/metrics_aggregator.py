@@ -22,6 +22,11 @@ from datetime import datetime
 from collections import defaultdict
 from typing import Optional, Dict, Any
 
+try:
+    from scripts.token_estimator import estimate_tokens_from_counts
+except ImportError:
+    from token_estimator import estimate_tokens_from_counts
+
 # 确保输出不缓冲
 if hasattr(sys.stdout, 'reconfigure'):
     sys.stdout.reconfigure(line_buffering=True)
@@ -151,7 +156,10 @@ def load_trace_logs(trace_path: str = "data/llm_trace.jsonl") -> list:
     return events
 
 
-def _estimate_tokens_from_chars(char_count: Any) -> int:
+def _estimate_tokens_from_chars(char_count: Any, script_chars: Any = None, model: Optional[str] = None) -> int:
+    """trace 无 usage 时的估算: 有按文字系统的字符数 (req_script_chars) 则用 token_estimator, 否则 chars/4"""
+    if isinstance(script_chars, dict) and any(script_chars.values()):
+        return max(1, estimate_tokens_from_counts(script_chars, model))
     if char_count in (None, "", 0):
         return 0
     try:
@@ -189,8 +197,9 @@ def _normalize_usage_record(record: Dict[str, Any]) -> Dict[str, int]:
             "estimated": False,
         }
 
-    estimated_prompt = _estimate_tokens_from_chars(record.get("req_chars"))
-    estimated_completion = _estimate_tokens_from_chars(record.get("resp_chars"))
+    model = record.get("selected_model") or record.get("model")
+    estimated_prompt = _estimate_tokens_from_chars(record.get("req_chars"), record.get("req_script_chars"), model)
+    estimated_completion = _estimate_tokens_from_chars(record.get("resp_chars"), record.get("resp_script_chars"), model)
     if estimated_prompt or estimated_completion:
         return {
             "prompt_tokens": estimated_prompt,
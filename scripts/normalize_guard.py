@@ -7,7 +7,7 @@ Normalize Guard Script v2.0
 融合版本：结合 v1.0 的严格验证和 v2.0 的新特性
 
 Usage:
-    python normalize_guard.py <input_csv> <output_draft_csv> <output_map_json> <schema_yaml>
+    python normalize_guard.py <input_csv> <output_draft_csv> <output_map_json> <schema_yaml> [--workers N]
 
 Features:
     - 使用新的 schema v2.0 格式 (patterns, token_format)
@@ -16,16 +16,18 @@ Features:
     - 早期 QA 报告生成
     - 详细的错误处理和验证
     - 重复 ID 检测
+    - --workers N 多进程分片分词/扫描, 输出与串行完全一致
 """
 
+import contextlib
 import csv
 import io
 import json
 import re
 import sys
-import jieba
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Tuple, Set
+from typing import List, Dict, Optional, Tuple, Set
 from datetime import datetime
 
 def configure_standard_streams() -> None:
@@ -55,6 +57,11 @@ except ImportError:
     print("[ERROR] PyYAML is required. Install with: pip install pyyaml")
     sys.exit(1)
 
+try:
+    from scripts.segmenter_factory import jieba_lcut, segmentation_cache_stats
+except ImportError:
+    from segmenter_factory import jieba_lcut, segmentation_cache_stats
+
 
 class PlaceholderFreezer:
     """占位符冻结器 - 使用 schema v2.0"""
@@ -63,9 +70,13 @@ class PlaceholderFreezer:
         self.schema_path = Path(schema_path)
         self.patterns: List[Dict] = []
         self.token_format: Dict[str, str] = {}
+        # 单捕获组: re.split 时奇数位即为不参与分词的占位符/标签块
         self._skip_segmentation_re = re.compile(
             r"(<[^>]+>|\{[^{}]*\}|\[[^\[\]]+\]|\\[ntr]|%(?:\d+\$)?[A-Za-z]|【|】)"
         )
+        # schema 编译结果: 按优先级排列的 (类型, 正则) + 合并后的预筛正则
+        self._prefilter_re = None
+        self._compiled_patterns: List[Tuple[str, "re.Pattern"]] = []
         
         # 计数器
         self.ph_counter = 0
@@ -98,6 +109,8 @@ class PlaceholderFreezer:
                 else:
                     print(f"[OK] Loaded {len(self.patterns)} patterns from schema v{schema.get('version', 'unknown')}")
 
+                self.compile_schema()
+
         except FileNotFoundError:
             print(f"[ERROR] Schema file not found: {self.schema_path}")
             sys.exit(1)
@@ -117,70 +130,111 @@ class PlaceholderFreezer:
         """
         if not text:
             return text, {}
-        
-        local_map = {}
-        result = text
 
-        # 新增: 中文分词预处理
+        result = self.segment_text(text, source_lang)
+        if not self.needs_freeze(result):
+            return result, {}
+        return self._freeze_multipass(result, {})
+
+    def segment_text(self, text: str, source_lang: str = 'zh-CN') -> str:
+        """中文分词预处理; 非中文原样返回"""
         # 遇到占位符/标签时按块分词，避免将 {0} 误切成 { 0 } 这类序列，
         # 同时保留中文语块的空格边界。
-        if source_lang.startswith('zh') and result:
-            parts = re.split(f"({self._skip_segmentation_re.pattern})", result)
-            segmented_parts = []
-            for part in parts:
-                if not part:
-                    continue
-                if self._skip_segmentation_re.fullmatch(part):
-                    segmented_parts.append(part)
-                    continue
-                words = jieba.lcut(part)
-                segmented_parts.append(' '.join(word for word in words if word))
-            result = ' '.join(part for part in segmented_parts if part).strip()
-        
-        # 编译所有模式的正则表达式
-        compiled_patterns = []
+        if not (source_lang.startswith('zh') and text):
+            return text
+        parts = self._skip_segmentation_re.split(text)
+        segmented_parts = []
+        for idx, part in enumerate(parts):
+            if not part:
+                continue
+            if idx % 2 == 1:
+                segmented_parts.append(part)
+                continue
+            words = jieba_lcut(part)
+            segmented_parts.append(' '.join(word for word in words if word))
+        return ' '.join(part for part in segmented_parts if part).strip()
+
+    def needs_freeze(self, text: str) -> bool:
+        """
+        预筛: 任一模式都不匹配的行无需逐模式替换
+
+        只作预筛, 实际替换仍按 schema 优先级逐个模式进行 (后面的模式作用于前面替换后的文本,
+        例如 <color={0}> 冻结为包含 ⟦PH_n⟧ 的 TAG), 因此输出与逐模式替换完全一致。
+        """
+        if self._prefilter_re is None:
+            return bool(self._compiled_patterns)
+        return self._prefilter_re.search(text) is not None
+
+    def compile_schema(self) -> None:
+        """把 schema 模式编译一次; 另合并为一个交替正则用于预筛"""
+        self._compiled_patterns = []
+        alternatives = []
         for p in self.patterns:
             try:
-                compiled_patterns.append({
-                    'name': p['name'],
-                    'type': p['type'],
-                    'regex': re.compile(p['regex'])
-                })
+                regex = re.compile(p['regex'])
             except re.error as e:
                 print(f"[WARN] Invalid regex in pattern '{p['name']}': {e}")
-        
-        # 按优先级顺序处理每个模式
-        for pattern_def in compiled_patterns:
-            regex = pattern_def['regex']
-            ptype = pattern_def['type']
-            
-            def repl(match):
-                original = match.group(0)
-                
-                # 检查是否已经冻结过这个字符串（重用 token）
-                if original in self.reverse_map:
-                    token_name = self.reverse_map[original]
-                    return f"⟦{token_name}⟧"
-                
-                # 生成新 token
-                if ptype == 'placeholder':
-                    self.ph_counter += 1
-                    token_name = f"PH_{self.ph_counter}"
-                else:  # tag
-                    self.tag_counter += 1
-                    token_name = f"TAG_{self.tag_counter}"
-                
-                # 记录映射
-                self.placeholder_map[token_name] = original
-                self.reverse_map[original] = token_name
-                local_map[token_name] = original
-                
-                return f"⟦{token_name}⟧"
-            
-            result = regex.sub(repl, result)
-        
+                continue
+            self._compiled_patterns.append((p['type'], regex))
+            alternatives.append(f"(?:{p['regex']})")
+        try:
+            self._prefilter_re = re.compile('|'.join(alternatives)) if alternatives else None
+        except re.error:
+            # 例如模式内含编号反向引用/重名分组, 无法合并时不预筛
+            self._prefilter_re = None
+
+    def _token_for(self, original: str, ptype: str, local_map: Dict[str, str]) -> str:
+        # 检查是否已经冻结过这个字符串（重用 token）
+        token_name = self.reverse_map.get(original)
+        if token_name is not None:
+            return token_name
+
+        # 生成新 token
+        if ptype == 'placeholder':
+            self.ph_counter += 1
+            token_name = f"PH_{self.ph_counter}"
+        else:  # tag
+            self.tag_counter += 1
+            token_name = f"TAG_{self.tag_counter}"
+
+        # 记录映射
+        self.placeholder_map[token_name] = original
+        self.reverse_map[original] = token_name
+        local_map[token_name] = original
+        return token_name
+
+    def _freeze_multipass(self, result: str, local_map: Dict[str, str]) -> Tuple[str, Dict[str, str]]:
+        """按 schema 优先级逐个模式替换"""
+        for ptype, regex in self._compiled_patterns:
+            result = regex.sub(lambda m: f"⟦{self._token_for(m.group(0), ptype, local_map)}⟧", result)
         return result, local_map
-    
+
+    def freeze_many(self, texts: List[str], source_lang: str = 'zh-CN', workers: int = 1) -> List[Tuple[str, Dict[str, str]]]:
+        """
+        批量冻结, 结果与逐行调用 freeze_text 完全一致
+
+        workers > 1 时分词与预筛按分片并行 (多进程), 模式替换与 token 分配仍在本进程按行顺序串行完成,
+        因此 PH_n/TAG_n 编号与 token 重用和串行结果相同。
+        """
+        if workers <= 1 or len(texts) < 2:
+            return [self.freeze_text(text, source_lang) for text in texts]
+
+        chunk_size = max(1, -(-len(texts) // (workers * 4)))
+        shards = [(texts[i:i + chunk_size], source_lang) for i in range(0, len(texts), chunk_size)]
+        results: List[Tuple[str, Dict[str, str]]] = []
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_shard_worker,
+            initargs=(str(self.schema_path),),
+        ) as pool:
+            for prepared in pool.map(_prepare_shard, shards):
+                for text, (segmented, matched) in zip(texts[len(results):], prepared):
+                    if not text or not matched:
+                        results.append((segmented, {}))
+                    else:
+                        results.append(self._freeze_multipass(segmented, {}))
+        return results
+
     def reset_counters(self) -> None:
         """重置计数器（用于处理新文件）"""
         self.ph_counter = 0
@@ -189,6 +243,29 @@ class PlaceholderFreezer:
         self.reverse_map = {}
 
 
+_shard_freezer: Optional[PlaceholderFreezer] = None
+
+
+def _init_shard_worker(schema_path: str) -> None:
+    """子进程初始化: 每个进程只加载一次 schema"""
+    global _shard_freezer
+    with contextlib.redirect_stdout(io.StringIO()):
+        _shard_freezer = PlaceholderFreezer(schema_path)
+
+
+def _prepare_shard(shard: Tuple[List[str], str]) -> List[Tuple[str, bool]]:
+    """子进程: 分词 + 预筛, 不分配 token。返回 (分词结果, 是否需要冻结)"""
+    texts, source_lang = shard
+    prepared = []
+    for text in texts:
+        if not text:
+            prepared.append((text, False))
+            continue
+        segmented = _shard_freezer.segment_text(text, source_lang)
+        prepared.append((segmented, _shard_freezer.needs_freeze(segmented)))
+    return prepared
+
+
 def detect_unbalanced_basic(text: str) -> List[str]:
     """
     基本的平衡检查 - 检测明显的不平衡
@@ -223,8 +300,10 @@ class NormalizeGuard:
         schema_path: str,
         source_lang: str = "zh-CN",
         long_text_threshold: int = 200,
+        workers: int = 1,
     ):
         self.source_lang = source_lang
+        self.workers = max(1, int(workers))
         self.input_path = Path(input_path)
         self.output_draft_path = Path(output_draft_path)
         self.output_map_path = Path(output_map_path)
@@ -257,6 +336,7 @@ class NormalizeGuard:
                     return False, []
                 
                 processed_rows = []
+                accepted: List[Tuple[int, str, str, Dict[str, str]]] = []
                 seen_ids: Set[str] = set()
                 
                 for idx, row in enumerate(reader, start=2):
@@ -283,9 +363,14 @@ class NormalizeGuard:
                             'row': idx
                         })
                     
-                    # 冻结占位符
-                    tokenized_zh, local_map = self.freezer.freeze_text(source_zh, self.source_lang)
-                    
+                    accepted.append((idx, string_id, source_zh, row))
+
+                # 冻结占位符 (workers > 1 时分片并行, 编号与串行一致)
+                frozen = self.freezer.freeze_many(
+                    [source_zh for _, _, source_zh, _ in accepted], self.source_lang, self.workers
+                )
+
+                for (idx, string_id, source_zh, row), (tokenized_zh, local_map) in zip(accepted, frozen):
                     # 构建输出行
                     output_row = {
                         'string_id': string_id,
@@ -465,6 +550,10 @@ class NormalizeGuard:
         print(f"   Total placeholders frozen: {len(self.freezer.placeholder_map)}")
         print(f"   PH tokens: {self.freezer.ph_counter}")
         print(f"   TAG tokens: {self.freezer.tag_counter}")
+        if self.source_lang.startswith('zh') and self.workers <= 1:
+            seg_stats = segmentation_cache_stats()
+            print(f"   Segmentation cache: hit_rate={seg_stats['hit_rate']:.1%} "
+                  f"({seg_stats['hits']} hits / {seg_stats['misses']} misses)")
         
         if self.sanity_errors:
             print(f"   Source balance issues: {len(self.sanity_errors)}")
@@ -491,6 +580,12 @@ def main():
         default=200,
         help="Length threshold to flag long text for single-row translation.",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processes for segmentation/freezing (output is identical to --workers 1).",
+    )
     
     args = parser.parse_args()
     
@@ -501,6 +596,7 @@ def main():
         schema_path=args.schema_yaml,
         source_lang=args.source_lang,
         long_text_threshold=args.long_text_threshold,
+        workers=args.workers,
     )
     
     success = guard.run()
@@ -15,6 +15,11 @@ import json
 from datetime import datetime
 from typing import Optional, Dict, Any
 
+try:
+    from scripts.event_sink import emit_event, flush_events
+except ImportError:
+    from event_sink import emit_event, flush_events
+
 # 确保 unbuffered 输出
 if hasattr(sys.stdout, 'reconfigure'):
     sys.stdout.reconfigure(line_buffering=True)
@@ -157,8 +162,7 @@ class ProgressReporter:
             "event": event,
             **data
         }
-        with open(self.progress_path, 'a', encoding='utf-8') as f:
-            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+        emit_event(self.progress_path, record)
 
     def _write_checkpoint(self, current: int, total: int):
         """写入检查点 (L1)"""
@@ -181,6 +185,7 @@ class ProgressReporter:
 
     def _write_done(self, success: int, failed: int, elapsed: float, error: str = None):
         """写入完成标记 (L4)"""
+        flush_events()  # DONE 出现时进度日志已完整落盘
         with open(self.done_path, 'w') as f:
             f.write(f"Completed at {datetime.now().isoformat()}\n")
             f.write(f"Success: {success}\n")
@@ -17,18 +17,39 @@ Features:
     - 性能优化（编译正则）
     - 限制错误输出（2000条）
     - 向后兼容 schema v1.0
+    - 流式模式（--stream）：findings 逐块写入 JSONL，内存只保留计数和有限样本；
+      行校验按 CSV 分块在进程池中执行（--workers / QA_HARD_WORKERS）
+    - 预编译规则集（QARuleEngine）：每行 target 只做一次 token 扫描，forbidden 与
+      schema 占位符模式合并为单个正则预筛；报告附带每条规则的耗时统计
 """
 
 import csv
 import io
 import json
 import math
+import os
 import re
 import sys
+import time
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
 from datetime import datetime
-from collections import Counter
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+
+REPORT_SAMPLE_LIMIT = 2000
+DEFAULT_CHUNK_ROWS = 2000
+
+TOKEN_RE = re.compile(r'⟦(PH_\d+|TAG_\d+)⟧')
+RAW_TAG_RE = re.compile(r"</?\w+(?:\s*=?\s*[^>]*)?>")
+RAW_TAG_NAME_RE = re.compile(r"<\s*(\w+)")
+SELF_CLOSING_TAGS = frozenset({"br", "img", "hr", "meta", "input", "base", "link"})
+_C_OPEN_RE = re.compile(r"^<\s*c(?=[\s>])")
+_C_CLOSE_RE = re.compile(r"^</\s*c(?=[\s>])")
+_BACKREF_RE = re.compile(r"\\[1-9]|\(\?P=")
+
+# validate_row 中按顺序计时的规则
+RULE_NAMES = ('scan', 'token_mismatch', 'tag_balance', 'forbidden_hit', 'new_placeholder', 'length_overflow')
 
 UI_ART_POLICY_TABLE = {
     "badge_micro_1c": {"hard_floor": 4, "review_floor": 6, "issue_type": "compact_mapping_missing"},
@@ -122,6 +143,112 @@ except ImportError:
     sys.exit(1)
 
 
+def _env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, "").strip() or default)
+    except ValueError:
+        return default
+
+
+class FindingsWriter:
+    """流式 findings 输出：逐条写 JSONL，内存中只保留计数与前 N 条样本"""
+
+    def __init__(self, path: Path, sample_limit: int = REPORT_SAMPLE_LIMIT):
+        self.path = Path(path)
+        self.sample_limit = max(0, int(sample_limit))
+        self.error_total = 0
+        self.warning_total = 0
+        self.warning_type_counts: Counter = Counter()
+        self.error_sample: List[Dict] = []
+        self.warning_sample: List[Dict] = []
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = open(self.path, 'w', encoding='utf-8')
+
+    def write(self, errors: List[Dict], warnings: List[Dict]) -> None:
+        for kind, findings, sample in (('error', errors, self.error_sample),
+                                       ('warning', warnings, self.warning_sample)):
+            for finding in findings:
+                self._fh.write(json.dumps({'kind': kind, **finding}, ensure_ascii=False) + '\n')
+                if len(sample) < self.sample_limit:
+                    sample.append(finding)
+        self.error_total += len(errors)
+        self.warning_total += len(warnings)
+        self.warning_type_counts.update(w.get('type', 'unknown') for w in warnings)
+
+    def close(self) -> None:
+        if not self._fh.closed:
+            self._fh.close()
+
+
+def _fuse_patterns(patterns: List[re.Pattern]) -> Optional[re.Pattern]:
+    """
+    把多条正则合并为一个 alternation，用作单遍预筛：未命中即可跳过逐条扫描。
+    含反向引用 / 全局 flag 或合并后无法编译时返回 None（退回逐条扫描）。
+    """
+    if not patterns:
+        return None
+    for pattern in patterns:
+        if pattern.flags & ~re.UNICODE or _BACKREF_RE.search(pattern.pattern):
+            return None
+    try:
+        return re.compile('|'.join(f'(?:{p.pattern})' for p in patterns))
+    except re.error:
+        return None
+
+
+class RowScan(NamedTuple):
+    tokens: List[str]   # target 中按出现顺序的 PH_/TAG_ token
+    pattern_hit: bool   # 合并后的 forbidden + schema 模式是否可能命中
+
+
+class QARuleEngine:
+    """
+    行校验的预编译规则集，按 (placeholder_map, paired_tags, patterns) 构建一次：
+    - target 的 token 只提取一次，供 token_mismatch / tag_balance / new_placeholder 共用
+    - TAG_ token 的配对 family 与开闭方向按 placeholder_map 预先分类，逐行只查表
+    - forbidden 与 schema 占位符模式合并为一个预筛正则，干净行只扫描一次
+    """
+
+    def __init__(self, placeholder_map: Dict[str, str], paired_rules: List[Dict[str, Any]],
+                 compiled_patterns: List[re.Pattern], compiled_forbidden: List[re.Pattern],
+                 token_matches: Any):
+        self.paired_rules = paired_rules
+        self.forbidden_gate = _fuse_patterns(compiled_forbidden)
+        self.placeholder_gate = _fuse_patterns(compiled_patterns)
+        self.pattern_gate = _fuse_patterns(list(compiled_forbidden) + list(compiled_patterns))
+        self.has_patterns = bool(compiled_forbidden or compiled_patterns)
+
+        # TAG token -> 'open' / 'close'（无 paired_tags 时的简单计数）
+        self.tag_direction: Dict[str, str] = {}
+        # TAG token -> (family, is_close)（paired_tags 精确配对）
+        self.tag_family: Dict[str, Tuple[str, bool]] = {}
+        for token, original in placeholder_map.items():
+            if not token.startswith('TAG_') or not original:
+                continue
+            if original.startswith('</'):
+                self.tag_direction[token] = 'close'
+            elif original.startswith('<'):
+                self.tag_direction[token] = 'open'
+
+            original_l = original.lower()
+            is_close = original_l.startswith('</')
+            key = "close_patterns" if is_close else "open_patterns"
+            for rule in paired_rules:
+                if any(token_matches(original_l, pattern) for pattern in rule.get(key, [])):
+                    self.tag_family[token] = (rule["family"], is_close)
+                    break
+
+    def scan(self, target_text: str) -> RowScan:
+        tokens = TOKEN_RE.findall(target_text) if target_text else []
+        if not self.has_patterns or not target_text:
+            pattern_hit = False
+        elif self.pattern_gate is None:
+            pattern_hit = True
+        else:
+            pattern_hit = self.pattern_gate.search(target_text) is not None
+        return RowScan(tokens, pattern_hit)
+
+
 class QAHardValidator:
     """硬性规则校验器 v2.0"""
 
@@ -131,12 +258,23 @@ class QAHardValidator:
     }
     
     def __init__(self, translated_csv: str, placeholder_map: str,
-                 schema_yaml: str, forbidden_txt: str, report_json: str):
+                 schema_yaml: str, forbidden_txt: str, report_json: str,
+                 stream: bool = False, findings_jsonl: Optional[str] = None,
+                 workers: Optional[int] = None, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                 sample_limit: int = REPORT_SAMPLE_LIMIT):
         self.translated_csv = Path(translated_csv)
         self.placeholder_map_path = Path(placeholder_map)
         self.schema_yaml = Path(schema_yaml)
         self.forbidden_txt = Path(forbidden_txt)
         self.report_json = Path(report_json)
+
+        # 流式模式：findings 写入 JSONL（默认与报告同目录 <report>.findings.jsonl）
+        self.stream = stream
+        self.findings_jsonl = Path(findings_jsonl) if findings_jsonl else self.report_json.with_suffix('.findings.jsonl')
+        self.workers = max(1, int(workers if workers is not None else _env_int('QA_HARD_WORKERS', 1)))
+        self.chunk_rows = max(1, int(chunk_rows))
+        self.sample_limit = max(0, int(sample_limit))
+        self.findings: Optional[FindingsWriter] = None
         
         # 数据
         self.placeholder_map: Dict[str, str] = {}
@@ -144,7 +282,16 @@ class QAHardValidator:
         self.compiled_patterns: List[re.Pattern] = []
         self.compiled_forbidden: List[re.Pattern] = []
         
-        # 错误收集
+        self._reset_findings()
+        
+        # Token 正则
+        self.token_pattern = TOKEN_RE
+        # 预编译规则集：首次使用（或资源变更）时构建，见 _engine()
+        self._rule_engine: Optional[QARuleEngine] = None
+        self._rule_engine_key: Optional[Tuple[int, ...]] = None
+
+    def _reset_findings(self) -> None:
+        """清空错误/告警收集与计数（流式 worker 每个 chunk 调用一次）"""
         self.errors: List[Dict] = []
         self.warnings: List[Dict] = []
         self.error_counts: Dict[str, int] = {
@@ -164,9 +311,8 @@ class QAHardValidator:
             'promo_expansion_forbidden': 0,
         }
         self.total_rows = 0
-        
-        # Token 正则
-        self.token_pattern = re.compile(r'⟦(PH_\d+|TAG_\d+)⟧')
+        # rule -> [calls, seconds]
+        self.rule_stats: Dict[str, List[float]] = {name: [0, 0.0] for name in RULE_NAMES}
     
     def load_placeholder_map(self) -> bool:
         """加载占位符映射"""
@@ -266,28 +412,27 @@ class QAHardValidator:
         p = pattern.lower()
 
         if p == "<c":
-            return bool(re.match(r"^<\s*c(?=[\s>])", text))
+            return bool(_C_OPEN_RE.match(text))
         if p == "</c":
-            return bool(re.match(r"^</\s*c(?=[\s>])", text))
+            return bool(_C_CLOSE_RE.match(text))
         return text.startswith(p)
 
     def _source_has_unbalanced_tags(self, source_text: str) -> bool:
         if not source_text:
             return False
-        tags = re.findall(r"</?\w+(?:\s*=?\s*[^>]*)?>", source_text)
+        tags = RAW_TAG_RE.findall(source_text)
         if not tags:
             return False
         opens = 0
         closes = 0
-        self_closing = {"br", "img", "hr", "meta", "input", "base", "link"}
         for tag in tags:
             if tag.endswith("/>"):
                 continue
             if tag.startswith("</"):
                 closes += 1
                 continue
-            m = re.match(r"<\s*(\w+)", tag)
-            if m and m.group(1).lower() in self_closing:
+            m = RAW_TAG_NAME_RE.match(tag)
+            if m and m.group(1).lower() in SELF_CLOSING_TAGS:
                 continue
             opens += 1
         return opens != closes
@@ -347,12 +492,42 @@ class QAHardValidator:
             merged[family] = rule
 
         return list(merged.values())
+
+    def _resources_key(self) -> Tuple[int, ...]:
+        """已加载资源的 O(1) 指纹：load_* 会替换映射或向列表追加，二者都会改变它"""
+        return (id(self.placeholder_map), len(self.placeholder_map), id(self.paired_tags), len(self.paired_tags),
+                id(self.compiled_patterns), len(self.compiled_patterns),
+                id(self.compiled_forbidden), len(self.compiled_forbidden))
+
+    def build_rule_engine(self) -> QARuleEngine:
+        """按当前已加载的资源构建预编译规则集"""
+        self._rule_engine = QARuleEngine(
+            self.placeholder_map,
+            self._normalize_paired_tags(),
+            self.compiled_patterns,
+            self.compiled_forbidden,
+            self._token_matches_pattern,
+        )
+        self._rule_engine_key = self._resources_key()
+        return self._rule_engine
+
+    def _engine(self) -> QARuleEngine:
+        """规则集访问入口：缺失或资源已变更时重建，否则直接返回缓存"""
+        engine = self._rule_engine
+        if engine is None or self._rule_engine_key != self._resources_key():
+            engine = self.build_rule_engine()
+        return engine
+
+    @property
+    def rule_engine(self) -> QARuleEngine:
+        return self._engine()
     
     def check_token_mismatch(self, string_id: str, source_text: str,
-                            target_text: str, row_num: int) -> None:
-        """检查 token 是否匹配"""
+                            target_text: str, row_num: int,
+                            target_tokens: Optional[List[str]] = None) -> None:
+        """检查 token 是否匹配（target_tokens 可由 QARuleEngine.scan 预先提取）"""
         source_tokens = Counter(self.extract_tokens(source_text))
-        target_tokens = Counter(self.extract_tokens(target_text))
+        target_tokens = Counter(target_tokens if target_tokens is not None else self.extract_tokens(target_text))
         
         missing = source_tokens - target_tokens
         extra = target_tokens - source_tokens
@@ -395,7 +570,7 @@ class QAHardValidator:
                     self.error_counts['token_mismatch'] += 1
     
     def check_tag_balance(self, string_id: str, target_text: str, source_text: str,
-                         row_num: int) -> None:
+                         row_num: int, target_tokens: Optional[List[str]] = None) -> None:
         """
         检查标签是否平衡（使用 paired_tags 配置）
         
@@ -406,7 +581,7 @@ class QAHardValidator:
             return
         
         # 提取所有 TAG token
-        tokens = self.extract_tokens(target_text)
+        tokens = target_tokens if target_tokens is not None else self.extract_tokens(target_text)
         tag_tokens = [t for t in tokens if t.startswith('TAG_')]
         
         if not tag_tokens:
@@ -435,7 +610,8 @@ class QAHardValidator:
     def _check_paired_tags(self, string_id: str, target_text: str,
                           tag_tokens: List[str], row_num: int) -> None:
         """使用 paired_tags 配置进行精确配对检查"""
-        paired_rules = self._normalize_paired_tags()
+        engine = self._engine()
+        paired_rules = engine.paired_rules
         if not paired_rules:
             self._check_tag_count(string_id, target_text, tag_tokens, row_num)
             return
@@ -443,30 +619,16 @@ class QAHardValidator:
         open_counts: Dict[str, int] = Counter()
         close_counts: Dict[str, int] = Counter()
 
+        # token 的 family / 开闭方向已在规则集构建时分类，这里只查表
         for tag_token in tag_tokens:
-            original = self.placeholder_map.get(tag_token, '')
-            if not original:
+            classified = engine.tag_family.get(tag_token)
+            if classified is None:
                 continue
-
-            original_l = original.lower()
-            if original_l.startswith('</'):
-                for rule in paired_rules:
-                    for pattern in rule.get("close_patterns", []):
-                        if self._token_matches_pattern(original_l, pattern):
-                            close_counts[rule["family"]] += 1
-                            break
-                    else:
-                        continue
-                    break
+            family, is_close = classified
+            if is_close:
+                close_counts[family] += 1
             else:
-                for rule in paired_rules:
-                    for pattern in rule.get("open_patterns", []):
-                        if self._token_matches_pattern(original_l, pattern):
-                            open_counts[rule["family"]] += 1
-                            break
-                    else:
-                        continue
-                    break
+                open_counts[family] += 1
 
         for rule in paired_rules:
             family = rule["family"]
@@ -489,13 +651,13 @@ class QAHardValidator:
         """Fallback：简单的开放/闭合标签计数"""
         opening_tags = []
         closing_tags = []
+        tag_direction = self._engine().tag_direction
         
         for tag_token in tag_tokens:
-            original = self.placeholder_map.get(tag_token, '')
-            
-            if original.startswith('</'):
+            direction = tag_direction.get(tag_token)
+            if direction == 'close':
                 closing_tags.append(tag_token)
-            elif original.startswith('<') and not original.startswith('</'):
+            elif direction == 'open':
                 opening_tags.append(tag_token)
         
         if len(opening_tags) != len(closing_tags):
@@ -511,10 +673,15 @@ class QAHardValidator:
             self.error_counts['tag_unbalanced'] += 1
     
     def check_forbidden_patterns(self, string_id: str, target_text: str,
-                                 row_num: int) -> None:
-        """检查禁用模式（使用编译的正则）"""
+                                 row_num: int, scan: Optional[RowScan] = None) -> None:
+        """检查禁用模式（合并预筛未命中则跳过逐条扫描）"""
         if not target_text:
             return
+        if scan is not None and not scan.pattern_hit:
+            return
+        gate = self._engine().forbidden_gate
+        if gate is not None and gate.search(target_text) is None:
+            return
         
         for pattern in self.compiled_forbidden:
             try:
@@ -532,7 +699,7 @@ class QAHardValidator:
                 pass
     
     def check_new_placeholders(self, string_id: str, target_text: str,
-                              source_text: str, row_num: int) -> None:
+                              source_text: str, row_num: int, scan: Optional[RowScan] = None) -> None:
         """
         检查是否出现了未经冻结的新占位符
         
@@ -541,7 +708,8 @@ class QAHardValidator:
         if not target_text:
             return
         
-        for token_name in self.extract_tokens(target_text):
+        tokens = scan.tokens if scan is not None else self.extract_tokens(target_text)
+        for token_name in tokens:
             if token_name in self.placeholder_map:
                 continue
             self.errors.append({
@@ -554,7 +722,12 @@ class QAHardValidator:
             })
             self.error_counts['new_placeholder_found'] += 1
 
-        # 使用从 schema 加载的模式
+        # 使用从 schema 加载的模式（合并预筛未命中则跳过）
+        if scan is not None and not scan.pattern_hit:
+            return
+        gate = self._engine().placeholder_gate
+        if gate is not None and gate.search(target_text) is None:
+            return
         for pattern in self.compiled_patterns:
             try:
                 matches = pattern.findall(target_text)
@@ -585,82 +758,115 @@ class QAHardValidator:
             except Exception:
                 pass
     
+    def _resolve_target_field(self, fieldnames: Optional[List[str]]) -> Optional[str]:
+        """检查必需字段并选出翻译列；失败返回 None"""
+        fieldnames = fieldnames or []
+        required_fields = ['string_id', 'tokenized_zh']
+        if not all(field in fieldnames for field in required_fields):
+            print(f"[ERROR] Missing required fields. Need: {required_fields}")
+            return None
+
+        for possible_field in [
+            'target_text',
+            'translated_text',
+            'target_en',
+            'target_ru',
+            'target_zh',
+            'tokenized_target'
+        ]:
+            if possible_field in fieldnames:
+                return possible_field
+
+        print("[ERROR] No target translation field found")
+        print(f"   Available fields: {fieldnames}")
+        return None
+
+    def validate_row(self, idx: int, row: Dict[str, Any], target_field: str) -> None:
+        """对单行运行所有检查"""
+        self.total_rows += 1
+
+        string_id = row.get('string_id', '')
+        source_text = row.get('tokenized_zh') or row.get('source_zh') or ''
+        source_zh = row.get('source_zh', '')
+        source_for_warning = source_zh if source_zh.strip() else source_text
+        target_text = row.get(target_field, '')
+
+        # 空翻译且源文本也为空：记录软告警，继续后续流程（保留可复核痕迹）
+        if (not source_for_warning or not source_for_warning.strip()) and (not target_text or not target_text.strip()):
+            self.warnings.append({
+                'row': idx,
+                'string_id': string_id,
+                'type': 'empty_source_translation_soft',
+                'detail': 'empty source_zh; keep as non-blocking warning',
+                'source': source_text,
+                'target': target_text
+            })
+            self.warning_counts['empty_source_translation'] += 1
+            return
+
+        # 空翻译视为硬错误
+        if not target_text or not target_text.strip():
+            self.errors.append({
+                'row': idx,
+                'string_id': string_id,
+                'type': 'empty_translation',
+                'detail': f"empty translation field: {target_field}",
+                'source': source_text,
+                'target': target_text
+            })
+            self.error_counts['empty_translation'] += 1
+            return
+
+        # 运行所有检查：target 只扫描一次，各规则共用扫描结果并分别计时
+        perf = time.perf_counter
+        marks = [perf()]
+        scan = self._engine().scan(target_text)
+        marks.append(perf())
+        self.check_token_mismatch(string_id, source_text, target_text, idx, target_tokens=scan.tokens)
+        marks.append(perf())
+        self.check_tag_balance(string_id, target_text, source_for_warning, idx, target_tokens=scan.tokens)
+        marks.append(perf())
+        self.check_forbidden_patterns(string_id, target_text, idx, scan=scan)
+        marks.append(perf())
+        self.check_new_placeholders(string_id, target_text, source_text, idx, scan=scan)
+        marks.append(perf())
+        self.check_length_overflow(string_id, target_text, row, idx)
+        marks.append(perf())
+        for name, start, end in zip(RULE_NAMES, marks, marks[1:]):
+            stat = self.rule_stats[name]
+            stat[0] += 1
+            stat[1] += end - start
+
+    def rule_timings(self) -> Dict[str, Dict[str, float]]:
+        """每条规则的调用次数与耗时（写入报告 metadata.rule_timings）"""
+        timings = {}
+        for name, (calls, seconds) in self.rule_stats.items():
+            timings[name] = {
+                'calls': int(calls),
+                'total_ms': round(seconds * 1000, 3),
+                'avg_us': round(seconds * 1e6 / calls, 2) if calls else 0.0,
+            }
+        return timings
+
     def validate_csv(self) -> bool:
         """验证 CSV 文件"""
         try:
             with open(self.translated_csv, 'r', encoding='utf-8-sig', newline='') as f:
                 reader = csv.DictReader(f)
-                
-                # 检查必需字段
-                required_fields = ['string_id', 'tokenized_zh']
-                if not all(field in reader.fieldnames for field in required_fields):
-                    print(f"[ERROR] Missing required fields. Need: {required_fields}")
-                    return False
-                
-                # 检查是否有翻译列
-                target_field = None
-                for possible_field in [
-                    'target_text',
-                    'translated_text',
-                    'target_en',
-                    'target_ru',
-                    'target_zh',
-                    'tokenized_target'
-                ]:
-                    if possible_field in reader.fieldnames:
-                        target_field = possible_field
-                        break
-                
+                target_field = self._resolve_target_field(reader.fieldnames)
                 if not target_field:
-                    print("[ERROR] No target translation field found")
-                    print(f"   Available fields: {reader.fieldnames}")
                     return False
                 
                 print(f"[OK] Using '{target_field}' as target translation field")
                 print()
+
+                if self.stream:
+                    self._validate_rows_streaming(reader, target_field)
+                    return True
                 
                 # 逐行验证
                 for idx, row in enumerate(reader, start=2):
-                    self.total_rows += 1
-                    
-                    string_id = row.get('string_id', '')
-                    source_text = row.get('tokenized_zh') or row.get('source_zh') or ''
-                    source_zh = row.get('source_zh', '')
-                    source_for_warning = source_zh if source_zh.strip() else source_text
-                    target_text = row.get(target_field, '')
-                    
-                    # 空翻译且源文本也为空：记录软告警，继续后续流程（保留可复核痕迹）
-                    if (not source_for_warning or not source_for_warning.strip()) and (not target_text or not target_text.strip()):
-                        self.warnings.append({
-                            'row': idx,
-                            'string_id': string_id,
-                            'type': 'empty_source_translation_soft',
-                            'detail': 'empty source_zh; keep as non-blocking warning',
-                            'source': source_text,
-                            'target': target_text
-                        })
-                        self.warning_counts['empty_source_translation'] += 1
-                        continue
-
-                    # 空翻译视为硬错误
-                    if not target_text or not target_text.strip():
-                        self.errors.append({
-                            'row': idx,
-                            'string_id': string_id,
-                            'type': 'empty_translation',
-                            'detail': f"empty translation field: {target_field}",
-                            'source': source_text,
-                            'target': target_text
-                        })
-                        self.error_counts['empty_translation'] += 1
-                        continue
-                    
-                    # 运行所有检查
-                    self.check_token_mismatch(string_id, source_text, target_text, idx)
-                    self.check_tag_balance(string_id, target_text, source_for_warning, idx)
-                    self.check_forbidden_patterns(string_id, target_text, idx)
-                    self.check_new_placeholders(string_id, target_text, source_text, idx)
-                    self.check_length_overflow(string_id, target_text, row, idx)
+                    self.validate_row(idx, row, target_field)
                 
                 return True
 
@@ -673,6 +879,66 @@ class QAHardValidator:
             import traceback
             traceback.print_exc()
             return False
+
+    def _worker_state(self, target_field: str) -> Dict[str, Any]:
+        """worker 重建校验器所需的状态（正则以源码传递，在 worker 内重新编译）"""
+        return {
+            'paths': (str(self.translated_csv), str(self.placeholder_map_path), str(self.schema_yaml),
+                      str(self.forbidden_txt), str(self.report_json)),
+            'placeholder_map': self.placeholder_map,
+            'paired_tags': self.paired_tags,
+            'patterns': [p.pattern for p in self.compiled_patterns],
+            'forbidden': [p.pattern for p in self.compiled_forbidden],
+            'target_field': target_field,
+        }
+
+    def _iter_chunk_results(self, reader: Any, target_field: str) -> Iterator[Tuple]:
+        """按 chunk 顺序产出校验结果；进程池中在途 chunk 数有上限，内存不随输入增长"""
+        chunks = _iter_row_chunks(reader, self.chunk_rows)
+        state = self._worker_state(target_field)
+        if self.workers <= 1:
+            _init_qa_worker(state)
+            for chunk in chunks:
+                yield _validate_qa_chunk(chunk)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_qa_worker,
+                                 initargs=(state,)) as pool:
+            in_flight: deque = deque()
+            for chunk in chunks:
+                in_flight.append(pool.submit(_validate_qa_chunk, chunk))
+                if len(in_flight) >= self.workers * 2:
+                    yield in_flight.popleft().result()
+            while in_flight:
+                yield in_flight.popleft().result()
+
+    def _validate_rows_streaming(self, reader: Any, target_field: str) -> None:
+        """流式校验：findings 写入 JSONL，self.errors / self.warnings 仅保留样本"""
+        self.findings = FindingsWriter(self.findings_jsonl, sample_limit=self.sample_limit)
+        try:
+            for rows, error_counts, warning_counts, errors, warnings, rule_stats in self._iter_chunk_results(reader, target_field):
+                self.total_rows += rows
+                for name, (calls, seconds) in rule_stats.items():
+                    stat = self.rule_stats.setdefault(name, [0, 0.0])
+                    stat[0] += calls
+                    stat[1] += seconds
+                for key, value in error_counts.items():
+                    self.error_counts[key] = self.error_counts.get(key, 0) + value
+                for key, value in warning_counts.items():
+                    self.warning_counts[key] = self.warning_counts.get(key, 0) + value
+                self.findings.write(errors, warnings)
+        finally:
+            self.findings.close()
+        self.errors = self.findings.error_sample
+        self.warnings = self.findings.warning_sample
+
+    @property
+    def total_errors(self) -> int:
+        return self.findings.error_total if self.findings is not None else len(self.errors)
+
+    @property
+    def total_warnings(self) -> int:
+        return self.findings.warning_total if self.findings is not None else len(self.warnings)
     
     def check_length_overflow(self, string_id: str, target_text: str, row: Dict, row_num: int):
         """检查长度溢出"""
@@ -775,33 +1041,40 @@ class QAHardValidator:
 
     def generate_report(self) -> None:
         """生成 JSON 报告（限制错误数量）"""
-        approved_warnings = [w for w in self.warnings if w.get('type') in self.APPROVED_WARNING_TYPES]
-        actionable_warnings = [w for w in self.warnings if w.get('type') not in self.APPROVED_WARNING_TYPES]
-        approved_warning_counts = dict(Counter(w.get('type', 'unknown') for w in approved_warnings))
-        actionable_warning_counts = dict(Counter(w.get('type', 'unknown') for w in actionable_warnings))
+        if self.findings is not None:
+            warning_type_counts = self.findings.warning_type_counts
+        else:
+            warning_type_counts = Counter(w.get('type', 'unknown') for w in self.warnings)
+        approved_warning_counts = {k: v for k, v in warning_type_counts.items() if k in self.APPROVED_WARNING_TYPES}
+        actionable_warning_counts = {k: v for k, v in warning_type_counts.items() if k not in self.APPROVED_WARNING_TYPES}
+        total_errors = self.total_errors
         report = {
-            'has_errors': len(self.errors) > 0,
+            'has_errors': total_errors > 0,
             'total_rows': self.total_rows,
             'warning_counts': self.warning_counts,
             'warning_policy': {
                 'approved_non_blocking_types': sorted(self.APPROVED_WARNING_TYPES),
-                'approved_warning_total': len(approved_warnings),
+                'approved_warning_total': sum(approved_warning_counts.values()),
                 'approved_warning_counts': approved_warning_counts,
-                'actionable_warning_total': len(actionable_warnings),
+                'actionable_warning_total': sum(actionable_warning_counts.values()),
                 'actionable_warning_counts': actionable_warning_counts,
             },
             'error_counts': self.error_counts,
-            'errors': self.errors[:2000],  # 限制到 2000 条
-            'warnings': self.warnings[:2000],
+            'errors': self.errors[:REPORT_SAMPLE_LIMIT],  # 限制到 2000 条
+            'warnings': self.warnings[:REPORT_SAMPLE_LIMIT],
             'metadata': {
                 'version': '2.0',
                 'generated_at': datetime.now().isoformat(),
                 'input_file': str(self.translated_csv),
-                'total_errors': len(self.errors),
-                'total_warnings': len(self.warnings),
-                'errors_truncated': len(self.errors) > 2000
+                'total_errors': total_errors,
+                'total_warnings': self.total_warnings,
+                'errors_truncated': total_errors > min(len(self.errors), REPORT_SAMPLE_LIMIT),
+                'rule_timings': self.rule_timings(),
             }
         }
+        if self.findings is not None:
+            report['metadata']['findings_jsonl'] = str(self.findings.path)
+            report['metadata']['workers'] = self.workers
         
         # 创建输出目录
         self.report_json.parent.mkdir(parents=True, exist_ok=True)
@@ -813,7 +1086,7 @@ class QAHardValidator:
         """打印验证总结"""
         print("\n[INFO] QA Validation Summary:")
         print(f"   Total rows checked: {self.total_rows}")
-        print(f"   Total errors: {len(self.errors)}")
+        print(f"   Total errors: {self.total_errors}")
         print()
         
         if self.error_counts['token_mismatch'] > 0:
@@ -836,19 +1109,29 @@ class QAHardValidator:
             print(f"   [WARN] Source tag imbalance (non-blocking): {self.warning_counts['source_tag_unbalanced']}")
         if self.warning_counts['token_mismatch_soft'] > 0:
             print(f"   [WARN] Soft token mismatch: {self.warning_counts['token_mismatch_soft']}")
-        if self.warnings:
-            approved_total = sum(1 for w in self.warnings if w.get('type') in self.APPROVED_WARNING_TYPES)
-            actionable_total = len(self.warnings) - approved_total
+        if self.total_warnings:
+            if self.findings is not None:
+                approved_total = sum(self.findings.warning_type_counts[t] for t in self.APPROVED_WARNING_TYPES)
+            else:
+                approved_total = sum(1 for w in self.warnings if w.get('type') in self.APPROVED_WARNING_TYPES)
+            actionable_total = self.total_warnings - approved_total
             print(f"   [INFO] Approved non-blocking warnings: {approved_total}")
             print(f"   [WARN] Actionable warnings: {actionable_total}")
+        timed = sorted(self.rule_stats.items(), key=lambda item: item[1][1], reverse=True)
+        if timed and timed[0][1][0]:
+            print("   [INFO] Rule timings: " + ", ".join(
+                f"{name}={seconds * 1000:.1f}ms" for name, (_, seconds) in timed
+            ))
         
         print()
         
-        if len(self.errors) > 0:
-            print(f"[ERROR] Validation FAILED with {len(self.errors)} errors")
-            if len(self.errors) > 2000:
-                print(f"   [WARN] Report truncated to 2000 errors (total: {len(self.errors)})")
+        if self.total_errors > 0:
+            print(f"[ERROR] Validation FAILED with {self.total_errors} errors")
+            if self.total_errors > REPORT_SAMPLE_LIMIT:
+                print(f"   [WARN] Report truncated to {REPORT_SAMPLE_LIMIT} errors (total: {self.total_errors})")
             print(f"   See detailed report: {self.report_json}")
+            if self.findings is not None:
+                print(f"   All findings: {self.findings.path}")
             print()
             print("   Sample errors:")
             for error in self.errors[:5]:
@@ -873,6 +1156,7 @@ class QAHardValidator:
         
         self.load_schema()
         self.load_forbidden_patterns()
+        self.build_rule_engine()
         
         print()
         
@@ -886,7 +1170,47 @@ class QAHardValidator:
         # 打印总结
         self.print_summary()
         
-        return len(self.errors) == 0
+        return self.total_errors == 0
+
+
+# ---------------- 流式模式 worker ----------------
+
+_WORKER_VALIDATOR: Optional[QAHardValidator] = None
+_WORKER_TARGET_FIELD = ''
+
+
+def _iter_row_chunks(reader: Any, chunk_rows: int) -> Iterator[List[Tuple[int, Dict[str, Any]]]]:
+    chunk: List[Tuple[int, Dict[str, Any]]] = []
+    for idx, row in enumerate(reader, start=2):
+        chunk.append((idx, row))
+        if len(chunk) >= chunk_rows:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _init_qa_worker(state: Dict[str, Any]) -> None:
+    """在 worker 进程内用父进程已加载的资源重建校验器（不重复读文件、不打印）"""
+    global _WORKER_VALIDATOR, _WORKER_TARGET_FIELD
+    validator = QAHardValidator(*state['paths'])
+    validator.placeholder_map = state['placeholder_map']
+    validator.paired_tags = state['paired_tags']
+    validator.compiled_patterns = [re.compile(p) for p in state['patterns']]
+    validator.compiled_forbidden = [re.compile(p) for p in state['forbidden']]
+    validator.build_rule_engine()
+    _WORKER_VALIDATOR = validator
+    _WORKER_TARGET_FIELD = state['target_field']
+
+
+def _validate_qa_chunk(chunk: List[Tuple[int, Dict[str, Any]]]) -> Tuple:
+    """校验一个 chunk，返回 (rows, error_counts, warning_counts, errors, warnings, rule_stats)"""
+    validator = _WORKER_VALIDATOR
+    validator._reset_findings()
+    for idx, row in chunk:
+        validator.validate_row(idx, row, _WORKER_TARGET_FIELD)
+    return (validator.total_rows, validator.error_counts, validator.warning_counts,
+            validator.errors, validator.warnings, validator.rule_stats)
 
 
 def main():
@@ -905,6 +1229,15 @@ def main():
                     help="Forbidden patterns TXT (default: workflow/forbidden_patterns.txt)")
     ap.add_argument("report_json", nargs="?", default="data/qa_hard_report.json",
                     help="Output report JSON (default: data/qa_hard_report.json)")
+    ap.add_argument("--stream", action="store_true",
+                    default=os.getenv("QA_HARD_STREAM", "0").strip() == "1",
+                    help="Stream findings to JSONL; keep only counters and a bounded sample in memory")
+    ap.add_argument("--findings-jsonl", default=None,
+                    help="Findings JSONL for --stream (default: <report>.findings.jsonl)")
+    ap.add_argument("--workers", type=int, default=None,
+                    help="Worker processes for --stream (default: QA_HARD_WORKERS or 1)")
+    ap.add_argument("--chunk-rows", type=int, default=_env_int("QA_HARD_CHUNK_ROWS", DEFAULT_CHUNK_ROWS),
+                    help=f"CSV rows per worker chunk (default: {DEFAULT_CHUNK_ROWS})")
     
     args = ap.parse_args()
     
@@ -913,7 +1246,11 @@ def main():
         placeholder_map=args.placeholder_map,
         schema_yaml=args.schema_yaml,
         forbidden_txt=args.forbidden_txt,
-        report_json=args.report_json
+        report_json=args.report_json,
+        stream=args.stream,
+        findings_jsonl=args.findings_jsonl,
+        workers=args.workers,
+        chunk_rows=args.chunk_rows,
     )
     
     success = validator.run()
@@ -13,8 +13,10 @@ import os
 import sys
 import json
 import re
+import threading
 import yaml
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Optional, Tuple
@@ -58,6 +60,18 @@ def _task_key(value: object) -> str:
     return str(value).strip()
 
 
+def _first_int(*values: object) -> int:
+    """第一个可解析为整数的值 (None / 空串跳过)"""
+    for value in values:
+        if value is None or str(value).strip() == "":
+            continue
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            continue
+    return 0
+
+
 def _first_present(row: Dict[str, object], candidates: List[str]) -> str:
     for key in candidates:
         value = row.get(key)
@@ -94,7 +108,18 @@ def _target_value_columns(columns: List[str]) -> List[str]:
     return result
 
 
-def hydrate_task_from_frame(task: "RepairTask", data_df: pd.DataFrame) -> None:
+def build_row_index(data_df: pd.DataFrame) -> Dict[str, int]:
+    """string_id (str + strip, 与 _task_key 对齐) -> 第一条匹配行的位置; 每次 run 只建一次"""
+    if "string_id" not in data_df.columns:
+        return {}
+    index: Dict[str, int] = {}
+    for position, key in enumerate(data_df["string_id"].astype(str).str.strip()):
+        index.setdefault(key, position)
+    return index
+
+
+def hydrate_task_from_frame(task: "RepairTask", data_df: pd.DataFrame,
+                            row_index: Optional[Dict[str, int]] = None) -> None:
     if "string_id" not in data_df.columns:
         return
 
@@ -102,11 +127,13 @@ def hydrate_task_from_frame(task: "RepairTask", data_df: pd.DataFrame) -> None:
     if not key:
         return
 
-    matches = data_df[data_df["string_id"].astype(str).str.strip() == key]
-    if matches.empty:
+    if row_index is None:
+        row_index = build_row_index(data_df)
+    position = row_index.get(key)
+    if position is None:
         return
 
-    row = matches.iloc[0].to_dict()
+    row = data_df.iloc[position].to_dict()
     target_columns = _target_value_columns(list(data_df.columns))
 
     if not task.source_text:
@@ -214,13 +241,18 @@ class RepairTask:
 class RepairLoop:
     """多轮修复引擎"""
 
-    def __init__(self, config: dict, qa_type: str = "soft", target_lang: str = "ru-RU"):
+    def __init__(self, config: dict, qa_type: str = "soft", target_lang: str = "ru-RU",
+                 concurrency: Optional[int] = None, batch_size: Optional[int] = None):
         self.config = config.get("repair_loop", {})
         self.max_rounds = self.config.get("max_rounds", 3)
         self.rounds_config = self.config.get("rounds", {})
         self.qa_type = qa_type
         self.route_step = repair_step_for_qa_type(qa_type)
         self.target_lang = target_lang or "ru-RU"
+        # 并发: 参数 > REPAIR_CONCURRENCY > repair_loop.concurrency > 模型 max_concurrency (0)
+        # 批量: 参数 > REPAIR_BATCH_SIZE > repair_loop.batch_size > 1 (每请求一个任务)
+        self.concurrency = _first_int(concurrency, os.getenv("REPAIR_CONCURRENCY"), self.config.get("concurrency"), 0)
+        self.batch_size = max(1, _first_int(batch_size, os.getenv("REPAIR_BATCH_SIZE"), self.config.get("batch_size"), 1))
 
         # 统计
         self.stats = {
@@ -229,12 +261,112 @@ class RepairLoop:
             "escalated": 0,
             "by_round": {1: 0, 2: 0, 3: 0}
         }
+        # 工作线程共享 stats / checkpoint / heartbeat (可重入: 持锁时也会写心跳)
+        self._lock = threading.RLock()
+
+    def _round_workers(self, model: str, units: int) -> int:
+        """
+        本轮工作线程数: 显式配置优先, 否则取 batch_runtime_v2.json 中模型的 max_concurrency。
+        实际在途请求数与 rpm/tpm 仍由 _send() 的模型调度闸门限制。
+        """
+        workers = self.concurrency
+        if workers <= 0:
+            try:
+                from scripts.runtime_adapter import get_batch_config
+                config = get_batch_config()
+                workers = config.get_concurrency(model) if hasattr(config, "get_concurrency") else 1
+            except Exception:
+                workers = 1
+        return max(1, min(int(workers), units or 1))
+
+    def _plan_units(self, tasks: List[RepairTask]) -> List[List[RepairTask]]:
+        """切分请求单元; 一轮内 qa_type 与 prompt_variant 相同, 批内任务可共用一个 prompt"""
+        size = self.batch_size
+        return [tasks[i:i + size] for i in range(0, len(tasks), size)]
+
+    def _send(self, client, model: str, prompt: Dict[str, str], metadata: dict):
+        """
+        经 runtime_adapter 的模型调度闸门发送: 与 batch_llm_call 共享并发槽位与 rpm/tpm 配额。
+        与 batch_llm_call 一样固定 model_override, 请求实际使用的模型即被计费的模型。
+        """
+        from scripts.runtime_adapter import _estimate_tokens, _get_dispatch_gate, get_batch_config
+
+        gate = _get_dispatch_gate(model, get_batch_config())
+        est_tokens = _estimate_tokens(prompt["system"], model) + _estimate_tokens(prompt["user"], model)
+        with gate.slot(est_tokens):
+            return client.chat(
+                system=prompt["system"],
+                user=prompt["user"],
+                metadata={**metadata, "model_override": model},
+            )
+
+    def _record_attempt(self, task: RepairTask, round_num: int, model: str, repair_result: dict) -> None:
+        validation = self._validate_repair(repair_result, task)
+        repair_result["validation"] = validation
+        repair_result["success"] = validation.get("passed", False)
+        task.add_repair_attempt(round_num, model, repair_result)
+        if repair_result["success"]:
+            with self._lock:
+                self.stats["repaired"] += 1
+                self.stats["by_round"][round_num] = self.stats["by_round"].get(round_num, 0) + 1
+
+    def _repair_single(self, client, task: RepairTask, round_num: int, model: str, variant: str) -> None:
+        prompt = self._build_repair_prompt(task, variant)
+        try:
+            result = self._send(client, model, prompt, {
+                "step": self.route_step, "round": round_num, "qa_type": self.qa_type
+            })
+            self._record_attempt(task, round_num, model, self._parse_repair_result(result.text, task))
+        except Exception as e:
+            task.add_repair_attempt(round_num, model, {
+                "success": False,
+                "error": str(e)
+            })
+
+    def _repair_batch(self, client, tasks: List[RepairTask], round_num: int, model: str, variant: str) -> None:
+        """一次请求修复多个任务; 每个 item 单独校验, 缺失或无法解析的任务退回单任务请求"""
+        from scripts.runtime_adapter import parse_llm_response
+
+        prompt = self._build_batch_prompt(tasks, variant)
+        expected = [{"id": str(n)} for n in range(len(tasks))]
+        try:
+            result = self._send(client, model, prompt, {
+                "step": self.route_step,
+                "round": round_num,
+                "qa_type": self.qa_type,
+                "batch_size": len(tasks),
+            })
+            items = parse_llm_response(result.text, expected, partial_match=True)
+        except Exception:
+            items = []
+
+        answered = {}
+        for item in items:
+            translation = item.get("translation")
+            if isinstance(translation, str):
+                answered.setdefault(str(item.get("id")), translation)
+
+        for n, task in enumerate(tasks):
+            if str(n) not in answered:
+                self._repair_single(client, task, round_num, model, variant)
+                continue
+            # 与 _repair_single 相同: 单个 item 解析/校验出错只记为失败尝试, 不中断整轮
+            try:
+                self._record_attempt(task, round_num, model, self._parse_repair_result(answered[str(n)], task))
+            except Exception as e:
+                task.add_repair_attempt(round_num, model, {
+                    "success": False,
+                    "error": str(e)
+                })
 
     def run(self, tasks: List[RepairTask], data_df: pd.DataFrame,
             output_dir: str) -> Tuple[pd.DataFrame, List[dict]]:
         """
         执行多轮修复
 
+        每轮的请求单元 (单任务或 batch_size 个任务的 JSON 批次) 在有界线程池中并发执行;
+        DataFrame 只在主线程按任务顺序更新。
+
         Returns:
             Tuple[pd.DataFrame, List[dict]]: (修复后的数据, escalation 记录)
         """
@@ -253,6 +385,9 @@ class RepairLoop:
         # 写入心跳文件
         self._write_heartbeat(output_dir, "starting")
 
+        # 行位置索引只建一次, 每轮结束后批量写回
+        row_index = build_row_index(data_df)
+        client = None
         for round_num in range(1, self.max_rounds + 1):
             # 获取当前轮次待修复任务
             pending_tasks = [t for t in tasks if t.status == "pending"]
@@ -265,57 +400,50 @@ class RepairLoop:
             model = round_config.get("model", "claude-haiku-4-5-20251001")
             prompt_variant = round_config.get("prompt_variant", "standard")
 
+            units = self._plan_units(pending_tasks)
+            workers = self._round_workers(model, len(units))
+
             print(f"\n--- Round {round_num}/{self.max_rounds} ---")
             print(f"   Model: {model}")
             print(f"   Pending: {len(pending_tasks)} tasks")
+            print(f"   Requests: {len(units)} (batch_size={self.batch_size}, workers={workers})")
             sys.stdout.flush()
 
             # 写入检查点
             self._write_checkpoint(output_dir, round_num, len(pending_tasks))
 
-            # 执行修复
-            client = LLMClient()
-
-            for i, task in enumerate(pending_tasks):
-                # 更新心跳
-                if i % 10 == 0:
-                    self._write_heartbeat(output_dir, f"round_{round_num}_task_{i}")
-
-                # 构建修复 prompt
-                prompt = self._build_repair_prompt(task, prompt_variant)
-
-                try:
-                    result = client.chat(
-                        system=prompt["system"],
-                        user=prompt["user"],
-                        metadata={"step": self.route_step, "round": round_num, "qa_type": self.qa_type}
-                    )
-
-                    # 解析结果
-                    repair_result = self._parse_repair_result(result.text, task)
-
-                    # 验证修复结果
-                    validation = self._validate_repair(repair_result, task)
-                    repair_result["validation"] = validation
-                    repair_result["success"] = validation.get("passed", False)
-
-                    # 记录尝试
-                    task.add_repair_attempt(round_num, model, repair_result)
-
-                    if repair_result["success"]:
-                        self.stats["repaired"] += 1
-                        self.stats["by_round"][round_num] += 1
+            # 执行修复 (整个 run 共用一个 client)
+            if client is None:
+                client = LLMClient()
+            progress = {"done": 0, "next_beat": 0}
+
+            def run_unit(unit: List[RepairTask]) -> None:
+                with self._lock:
+                    # 每完成约 10 个任务更新一次心跳
+                    if progress["done"] >= progress["next_beat"]:
+                        progress["next_beat"] += 10
+                        self._write_heartbeat(output_dir, f"round_{round_num}_task_{progress['done']}")
+                if len(unit) == 1:
+                    self._repair_single(client, unit[0], round_num, model, prompt_variant)
+                else:
+                    self._repair_batch(client, unit, round_num, model, prompt_variant)
+                with self._lock:
+                    progress["done"] += len(unit)
 
-                        # 更新 DataFrame
-                        data_df = self._apply_repair(data_df, task)
+            if workers <= 1:
+                for unit in units:
+                    run_unit(unit)
+            else:
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{self.route_step}-repair") as pool:
+                    futures = [pool.submit(run_unit, unit) for unit in units]
+                    for future in as_completed(futures):
+                        future.result()
 
-                except Exception as e:
-                    task.add_repair_attempt(round_num, model, {
-                        "success": False,
-                        "error": str(e)
-                    })
+            # 更新 DataFrame
+            repaired = [task for task in pending_tasks if task.status == "repaired"]
+            data_df = self._apply_repairs(data_df, repaired, row_index)
 
-            print(f"   Repaired this round: {self.stats['by_round'][round_num]}")
+            print(f"   Repaired this round: {self.stats['by_round'].get(round_num, 0)}")
             sys.stdout.flush()
 
         # 处理仍未修复的任务 -> Escalate
@@ -338,8 +466,99 @@ class RepairLoop:
 
         return data_df, escalations
 
+    def _static_prompt(self, variant: str, batched: bool = False) -> str:
+        """variant 的静态 system 前缀; batched=True 时输出格式换成 JSON items"""
+        if variant == "standard":
+            body = f"""You are a translation repair specialist. Fix the translation issues listed below.
+
+## Constraints
+- Target language: {self.target_lang}
+- Preserve all placeholders exactly as they appear in source
+- Translate bracketed gameplay/status text such as [沉默]; keep the brackets, but translate the text inside them unless it is a frozen token.
+- Maintain the original tone and style
+"""
+            output = """
+## Output
+Return ONLY the corrected translation, nothing else.
+"""
+        elif variant == "detailed":
+            body = f"""You are an expert translation repair specialist. The previous repair attempt failed.
+
+## Constraints
+- Target language: {self.target_lang}
+- ALL placeholders must be preserved exactly
+- Bracketed gameplay/status text like [沉默] must be translated, not copied through unchanged.
+- Meaning must match the source text
+
+## Instructions
+1. Analyze why previous repairs failed
+2. Apply a different approach
+3. Verify constraints before outputting
+"""
+            output = """
+Return ONLY the corrected translation.
+"""
+        else:  # expert
+            body = f"""You are a senior localization expert handling a difficult repair case.
+
+## Strict Constraints
+- Target language: {self.target_lang}
+- Placeholders: Must match source exactly
+- Bracketed gameplay/status text like [沉默] must stay bracketed but the inner text must be translated into {self.target_lang}.
+- Quality: Professional game localization standard
+
+## Your Task
+Provide a definitive fix. If impossible within constraints, indicate "[NEEDS_HUMAN]" at the start.
+"""
+            output = """
+Return ONLY the corrected translation (or [NEEDS_HUMAN] + explanation).
+"""
+        if batched:
+            output = """
+## Batch Input
+The user message is a JSON array of independent repair items. Each item has
+id, source, current_translation, issues, max_length (0 = no limit),
+frozen_tokens (must appear in exactly this order) and, after a failed round,
+previous_attempts. Repair every item on its own; never mix text between items.
+
+## Output
+Return ONLY a JSON object: {"items": [{"id": "<item id>", "translation": "<corrected translation>"}]}
+with exactly one entry per input id.
+"""
+        return body + output
+
+    def _build_batch_prompt(self, tasks: List[RepairTask], variant: str) -> dict:
+        """构建多任务 JSON 修复 prompt (item id 为批内序号, 同一 string_id 可出现多次)"""
+        from scripts.runtime_adapter import SystemPrompt
+
+        items = []
+        for n, task in enumerate(tasks):
+            item = {
+                "id": str(n),
+                "source": task.source_text,
+                "current_translation": task.current_translation,
+                "issues": [
+                    f"{i.get('type', 'unknown')}: {i.get('detail', '')}"
+                    for i in task.issues
+                    if isinstance(i, dict)
+                ],
+                "max_length": task.max_length or 0,
+                "frozen_tokens": _extract_frozen_tokens(task.source_text),
+            }
+            if variant != "standard" and task.repair_history:
+                item["previous_attempts"] = [h.get("attempted_fix", "") for h in task.repair_history]
+            items.append(item)
+
+        user = f"""Target language: {self.target_lang}
+Items:
+{json.dumps(items, ensure_ascii=False, indent=2)}
+
+Return the JSON object with the corrected translations:"""
+        return {"system": SystemPrompt(self._static_prompt(variant, batched=True)), "user": user}
+
     def _build_repair_prompt(self, task: RepairTask, variant: str) -> dict:
         """构建修复 prompt"""
+        from scripts.runtime_adapter import SystemPrompt
 
         issue_desc = "\n".join([
             f"- {i.get('type', 'unknown')}: {i.get('detail', '')}"
@@ -353,50 +572,32 @@ class RepairLoop:
                 f"  {' '.join(frozen_token_sequence)}"
             )
 
+        # 静态前缀（角色 + 通用约束 + 输出格式）对同一 variant 的所有任务相同，
+        # 任务相关的 issues / 长度 / 历史放在后缀，便于 provider 前缀缓存
+        static = self._static_prompt(variant)
         if variant == "standard":
-            system = f"""You are a translation repair specialist. Fix the following translation issues.
-
+            dynamic = f"""
 ## Issues Found
 {issue_desc}
 
-## Constraints
-- Target language: {self.target_lang}
+## Task Constraints
 - Max length: {task.max_length} characters (if specified)
-- Preserve all placeholders exactly as they appear in source
-- Preserve all frozen tag/placeholder tokens exactly, including duplicates and order{frozen_token_hint}
-- Translate bracketed gameplay/status text such as [沉默]; keep the brackets, but translate the text inside them unless it is a frozen token.
-- Maintain the original tone and style
-
-## Output
-Return ONLY the corrected translation, nothing else."""
+- Preserve all frozen tag/placeholder tokens exactly, including duplicates and order{frozen_token_hint}"""
 
         elif variant == "detailed":
-            system = f"""You are an expert translation repair specialist. The previous repair attempt failed.
-
+            dynamic = f"""
 ## Original Issues
 {issue_desc}
 
 ## Previous Attempts
 {json.dumps(task.repair_history, indent=2, ensure_ascii=False)}
 
-## Constraints
-- Target language: {self.target_lang}
+## Task Constraints
 - Max length: {task.max_length} characters (STRICT)
-- ALL placeholders must be preserved exactly
-- ALL frozen tag/placeholder tokens must preserve exact duplicates and order{frozen_token_hint}
-- Bracketed gameplay/status text like [沉默] must be translated, not copied through unchanged.
-- Meaning must match the source text
-
-## Instructions
-1. Analyze why previous repairs failed
-2. Apply a different approach
-3. Verify constraints before outputting
-
-Return ONLY the corrected translation."""
+- ALL frozen tag/placeholder tokens must preserve exact duplicates and order{frozen_token_hint}"""
 
         else:  # expert
-            system = f"""You are a senior localization expert handling a difficult repair case.
-
+            dynamic = f"""
 ## Source Text
 {task.source_text}
 
@@ -409,18 +610,11 @@ Return ONLY the corrected translation."""
 ## Failed Repair History
 {json.dumps(task.repair_history, indent=2, ensure_ascii=False)}
 
-## Strict Constraints
-- Target language: {self.target_lang}
+## Task Constraints
 - Max length: {task.max_length} chars
-- Placeholders: Must match source exactly
-- Frozen tag/token sequence: Must match source exactly, including duplicates and order{frozen_token_hint}
-- Bracketed gameplay/status text like [沉默] must stay bracketed but the inner text must be translated into {self.target_lang}.
-- Quality: Professional game localization standard
-
-## Your Task
-Provide a definitive fix. If impossible within constraints, indicate "[NEEDS_HUMAN]" at the start.
+- Frozen tag/token sequence: Must match source exactly, including duplicates and order{frozen_token_hint}"""
 
-Return ONLY the corrected translation (or [NEEDS_HUMAN] + explanation)."""
+        system = SystemPrompt(static, dynamic)
 
         user = f"""Target language: {self.target_lang}
 Source: {task.source_text}
@@ -528,33 +722,61 @@ Fix the issues and return the corrected translation:"""
         return placeholders
 
     def _apply_repair(self, df: pd.DataFrame, task: RepairTask) -> pd.DataFrame:
-        """应用修复到 DataFrame"""
-        if "string_id" not in df.columns:
+        """应用单个修复到 DataFrame"""
+        return self._apply_repairs(df, [task])
+
+    def _apply_repairs(self, df: pd.DataFrame, tasks: List[RepairTask],
+                       row_index: Optional[Dict[str, int]] = None) -> pd.DataFrame:
+        """
+        批量应用修复: 经 string_id 索引定位行, 每个目标列一次按位置赋值
+
+        同一行有多个修复时按任务顺序后者覆盖前者 (与逐条应用一致)。
+        """
+        if "string_id" not in df.columns or not tasks:
+            return df
+        if row_index is None:
+            row_index = build_row_index(df)
+
+        updates: Dict[int, object] = {}
+        for task in tasks:
+            position = row_index.get(_task_key(task.string_id))
+            if position is not None:
+                updates[position] = task.final_translation
+        if not updates:
             return df
-        idx = df[df["string_id"].astype(str).str.strip() == _task_key(task.string_id)].index
-        if len(idx) > 0:
-            target_columns = _target_value_columns(list(df.columns))
-            for column in target_columns:
-                df.loc[idx[0], column] = task.final_translation
+
+        positions = list(updates.keys())
+        values = list(updates.values())
+        for column in _target_value_columns(list(df.columns)):
+            # 全空的目标列会被读成 float64, 先转 object 才能写入字符串
+            if df[column].dtype.kind in "biufc":
+                df[column] = df[column].astype(object)
+            df.iloc[positions, df.columns.get_loc(column)] = values
         return df
 
     def _write_checkpoint(self, output_dir: str, round_num: int, pending: int):
-        """写入检查点"""
-        checkpoint = {
-            "timestamp": datetime.now().isoformat(),
-            "round": round_num,
-            "pending_tasks": pending,
-            "stats": self.stats
-        }
+        """写入检查点 (临时文件 + replace, 与工作线程的 stats 更新互斥)"""
         path = os.path.join(output_dir, "repair_checkpoint.json")
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(checkpoint, f, indent=2)
+        with self._lock:
+            checkpoint = {
+                "timestamp": datetime.now().isoformat(),
+                "round": round_num,
+                "pending_tasks": pending,
+                "stats": self.stats
+            }
+            tmp = f"{path}.tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(checkpoint, f, indent=2)
+            os.replace(tmp, path)
 
     def _write_heartbeat(self, output_dir: str, status: str):
         """写入心跳文件"""
         path = os.path.join(output_dir, "repair_heartbeat.txt")
-        with open(path, 'w') as f:
-            f.write(f"{datetime.now().isoformat()} | {status}\n")
+        with self._lock:
+            tmp = f"{path}.tmp"
+            with open(tmp, 'w') as f:
+                f.write(f"{datetime.now().isoformat()} | {status}\n")
+            os.replace(tmp, path)
 
     def _write_done(self, output_dir: str):
         """写入完成标记"""
@@ -629,12 +851,28 @@ def build_parser():
     )
     parser.add_argument("--target-lang", default="ru-RU", help="Target language for repair output prompts")
     parser.add_argument("--config", default="config/repair_config.yaml")
+    parser.add_argument("--no-llm-cache", action="store_true", help="Bypass the LLM response cache (LLM_CACHE_PATH)")
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=None,
+        help="Concurrent repair requests per round (default: REPAIR_CONCURRENCY / config / model max_concurrency)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=None,
+        help="Tasks packed into one JSON repair request (default: REPAIR_BATCH_SIZE / config / 1)",
+    )
     return parser
 
 
 def main():
     parser = build_parser()
     args = parser.parse_args()
+    if args.no_llm_cache:
+        from scripts.runtime_adapter import disable_response_cache
+        disable_response_cache()
     os.makedirs(args.output_dir, exist_ok=True)
 
     # 加载配置
@@ -691,11 +929,17 @@ def main():
         df.to_csv(args.output, index=False, encoding='utf-8')
         return
 
+    row_index = build_row_index(df)
     for task in tasks:
-        hydrate_task_from_frame(task, df)
+        hydrate_task_from_frame(task, df, row_index)
 
     # 执行修复
-    repair_loop = RepairLoop(config, args.qa_type, target_lang=args.target_lang)
+    overrides = {
+        key: value
+        for key, value in (("concurrency", args.concurrency), ("batch_size", args.batch_size))
+        if value is not None
+    }
+    repair_loop = RepairLoop(config, args.qa_type, target_lang=args.target_lang, **overrides)
     repaired_df, escalations = repair_loop.run(tasks, df, args.output_dir)
 
     # 保存修复后的数据
@@ -52,9 +52,14 @@ try:
     from scripts.style_governance_runtime import evaluate_runtime_governance, format_runtime_governance_issues
 except ImportError:  # pragma: no cover
     from style_governance_runtime import evaluate_runtime_governance, format_runtime_governance_issues
+try:
+    from scripts.stage_engine import DEFAULT_ENGINE_MODE, ENGINE_MODES, StageEngine
+except ImportError:  # pragma: no cover
+    from stage_engine import DEFAULT_ENGINE_MODE, ENGINE_MODES, StageEngine
 
 
 REPO_ROOT = Path(__file__).resolve().parent.parent
+_STAGE_ENGINE = StageEngine("subprocess")
 
 
 class GovernanceError(RuntimeError):
@@ -185,30 +190,8 @@ def _safe_stage_name(name: str) -> str:
 
 
 def _run_step(cmd: list, log_path: Path, env: dict = None) -> subprocess.CompletedProcess:
-    run_env = dict(os.environ)
-    if env:
-        run_env.update(env)
-
-    with open(log_path, "w", encoding="utf-8") as f:
-        f.write(f"command: {cmd}\n")
-        f.write(f"started: {datetime.now(timezone.utc).isoformat()}\n\n")
-
-    result = subprocess.run(
-        cmd,
-        capture_output=True,
-        text=True,
-        encoding="utf-8",
-        errors="replace",
-        env=run_env,
-    )
-
-    with open(log_path, "a", encoding="utf-8") as f:
-        f.write(f"returncode: {result.returncode}\n\n")
-        f.write("---- STDOUT ----\n")
-        f.write(result.stdout or "")
-        f.write("\n---- STDERR ----\n")
-        f.write(result.stderr or "")
-    return result
+    """Run one stage through the active engine; stdout/stderr on the result are tails only."""
+    return _STAGE_ENGINE.run(cmd, log_path, env=env)
 
 
 def _derive_target_key(target_lang: str) -> str:
@@ -260,6 +243,11 @@ def _append_stage(
     }
     if details:
         stage["details"] = details
+    for item in normalized_files:
+        run = _STAGE_ENGINE.record_for_log(item["path"])
+        if run:
+            stage["runtime"] = {key: run[key] for key in ("mode", "duration_ms", "peak_rss_mb")}
+            break
     manifest["stages"].append(stage)
 
 
@@ -499,6 +487,8 @@ def _make_manifest(args: argparse.Namespace, run_id: str, input_csv: Path, run_d
             "long_text_threshold": args.long_text_threshold,
         },
         "stage_artifacts": {},
+        "stage_engine": getattr(args, "stage_engine", DEFAULT_ENGINE_MODE),
+        "stage_runs": [],
         "row_counts": {
             "input": 0
         },
@@ -819,6 +809,7 @@ def _finalize_manifest(
 
 
 def run_pipeline(args: argparse.Namespace) -> int:
+    global _STAGE_ENGINE
     if not getattr(args, "soft_qa_rubric", ""):
         args.soft_qa_rubric = "workflow/soft_qa_rubric.yaml"
     if not getattr(args, "lifecycle_registry", ""):
@@ -849,6 +840,7 @@ def run_pipeline(args: argparse.Namespace) -> int:
     run_manifest_path = run_dir / "run_manifest.json"
 
     manifest = _make_manifest(args, run_id, input_csv, run_dir, issue_file)
+    _STAGE_ENGINE = StageEngine(manifest["stage_engine"], records=manifest["stage_runs"])
     manifest["review_handoff"]["queue_path"] = str(review_queue_path)
     _append_artifact(manifest, "smoke_review_queue", review_queue_path)
     _append_artifact(manifest, "smoke_review_tickets_jsonl", review_tickets_jsonl)
@@ -1770,6 +1762,12 @@ def main():
         default=200,
         help="Rows with source_zh length >= threshold are treated as long text.",
     )
+    parser.add_argument(
+        "--stage-engine",
+        choices=list(ENGINE_MODES),
+        default=os.getenv("SMOKE_STAGE_ENGINE", DEFAULT_ENGINE_MODE),
+        help="inprocess: call each stage's main() in this interpreter; subprocess: one child per stage.",
+    )
     parser.add_argument(
         "--log-level",
         default="INFO",
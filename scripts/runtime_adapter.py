@@ -18,19 +18,56 @@ Env:
   LLM_BASE_URL, LLM_API_KEY, LLM_MODEL
   LLM_TIMEOUT_S (default 60)
   LLM_TRACE_PATH (optional, default data/llm_trace.jsonl)
+  LLM_HTTP_POOL_SIZE (optional, default 32 keep-alive connections per host)
+  LLM_HTTP_GZIP_REQUEST (optional, "1" to gzip request bodies >= 1KB)
+  LLM_CACHE_PATH (optional, SQLite response cache; see llm_cache.py)
+  EVENT_SINK_* (optional, trace/progress write buffering; see event_sink.py)
+  BATCH_ADAPTIVE (optional, "1" lets batch_llm_call learn batch sizes; default off = static size)
+  BATCH_ADAPTIVE_STATE (optional, learned batch sizes, default data/batch_adaptive_state.json;
+                        only read/written when BATCH_ADAPTIVE=1)
 """
 
 from __future__ import annotations
+import gzip
 import json
 import os
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 from dataclasses import dataclass
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple, Callable
 
 import requests
+from requests.adapters import HTTPAdapter
+
+try:
+    from scripts.llm_cache import cache_key, disable_response_cache, get_response_cache
+except ImportError:
+    from llm_cache import cache_key, disable_response_cache, get_response_cache
+
+try:
+    from scripts.token_estimator import estimate_tokens as _estimate_model_tokens, script_counts_dict
+except ImportError:
+    from token_estimator import estimate_tokens as _estimate_model_tokens, script_counts_dict
+
+try:
+    from scripts.event_sink import emit_event, flush_events
+except ImportError:
+    from event_sink import emit_event, flush_events
+
+try:
+    from scripts.batch_utils import BatchConfig as PackingConfig, binary_split, split_into_batches
+except ImportError:
+    from batch_utils import BatchConfig as PackingConfig, binary_split, split_into_batches
+
+try:
+    from scripts.embedding_store import get_embedding_store
+except ImportError:
+    from embedding_store import get_embedding_store
 
 
 @dataclass
@@ -66,15 +103,13 @@ class LLMError(Exception):
 
 
 def _trace(event: Dict[str, Any]) -> None:
-    """Append trace event to JSONL file."""
+    """Append trace event to JSONL file (buffered, see event_sink.py)."""
     path = os.getenv("LLM_TRACE_PATH", "data/llm_trace.jsonl").strip()
     if not path:
         return
     try:
-        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
         event["timestamp"] = datetime.now().isoformat()
-        with open(path, "a", encoding="utf-8") as f:
-            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        emit_event(path, event)
     except Exception:
         pass  # Tracing should never break the main flow
 
@@ -87,13 +122,75 @@ def _safe_int(x, default: int = 0) -> int:
         return default
 
 
+# -----------------------------
+# Shared HTTP transport
+# -----------------------------
+
+GZIP_REQUEST_MIN_BYTES = 1024
+
+_http_session: Optional[requests.Session] = None
+_http_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """
+    Process-wide pooled HTTP session (keep-alive, gzip responses).
+
+    Shared by every LLMClient / EmbeddingClient instance so repeated calls
+    reuse TCP/TLS connections instead of reconnecting per request.
+    """
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                pool_size = max(1, _safe_int(os.getenv("LLM_HTTP_POOL_SIZE", "32"), 32))
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update({"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive"})
+                _http_session = session
+    return _http_session
+
+
+def _reset_http_session() -> None:
+    """Drop the pooled session (pooled sockets must not be shared across fork)."""
+    global _http_session, _http_session_lock
+    _http_session = None
+    _http_session_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_http_session)
+
+
+def _http_post(url: str, headers: Dict[str, str], payload: Dict[str, Any], timeout: float) -> requests.Response:
+    """POST a JSON payload through the shared session, optionally gzip-encoding the body."""
+    body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    headers = dict(headers)
+    headers.setdefault("Content-Type", "application/json")
+    if os.getenv("LLM_HTTP_GZIP_REQUEST", "").strip() == "1" and len(body) >= GZIP_REQUEST_MIN_BYTES:
+        body = gzip.compress(body, compresslevel=5)
+        headers["Content-Encoding"] = "gzip"
+    return get_http_session().post(url, data=body, headers=headers, timeout=timeout)
+
+
 # Token estimation constants
-CHARS_PER_TOKEN = 4  # Conservative for CJK/Cyrillic mix
+CHARS_PER_TOKEN = 4  # Legacy heuristic, still used by TOKEN_ESTIMATOR=chars4
+
 
+def _estimate_tokens(text: str, model: Optional[str] = None) -> int:
+    """Estimate token count from text (token_estimator, per script and model family)."""
+    return max(1, _estimate_model_tokens(text or "", model))
 
-def _estimate_tokens(text: str) -> int:
-    """Estimate token count from text using chars/4 heuristic."""
-    return max(1, len(text or "") // CHARS_PER_TOKEN)
+
+def _script_chars(*texts: str) -> Dict[str, int]:
+    """Per-script character counts of the given texts (token calibration input)."""
+    total: Dict[str, int] = {}
+    for text in texts:
+        for script, count in script_counts_dict(text or "").items():
+            total[script] = total.get(script, 0) + count
+    return total
 
 
 # Pricing loader (cached)
@@ -124,14 +221,22 @@ def _load_pricing() -> Dict[str, Any]:
     return _pricing_cache
 
 
-def _estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> float:
-    """Estimate cost in USD based on pricing.yaml."""
+def _estimate_cost(model: str, prompt_tokens: int, completion_tokens: int, cached_tokens: int = 0) -> float:
+    """Estimate cost in USD based on pricing.yaml.
+
+    cached_tokens (provider prompt-cache reads, part of prompt_tokens) are billed
+    at cached_prompt_ratio of the prompt rate: per-model value, else billing default.
+    """
     pricing = _load_pricing()
     billing = pricing.get("billing", {})
     models = pricing.get("models", {})
     model_config = models.get(model, {})
     
     billing_mode = billing.get("mode", "per_1m")
+
+    cached_tokens = max(0, min(int(cached_tokens or 0), int(prompt_tokens or 0)))
+    cached_ratio = float(model_config.get("cached_prompt_ratio", billing.get("cached_prompt_ratio", 1.0)))
+    billed_prompt_tokens = (prompt_tokens - cached_tokens) + cached_tokens * cached_ratio
     
     if billing_mode == "multiplier":
         # Multiplier formula from pricing.yaml:
@@ -156,7 +261,7 @@ def _estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> fl
         # 4. Divisor
         divisor = billing.get("token_divisor", 500000)
         
-        effective_tokens = prompt_tokens + (completion_tokens * completion_mult)
+        effective_tokens = billed_prompt_tokens + (completion_tokens * completion_mult)
         cost = conv_rate * user_group_mult * prompt_mult * effective_tokens / divisor
         return round(cost, 6)
     
@@ -166,7 +271,7 @@ def _estimate_cost(model: str, prompt_tokens: int, completion_tokens: int) -> fl
         output_per_1m = model_config.get("output_per_1M", 0)
         
         if input_per_1m > 0 or output_per_1m > 0:
-            cost = (prompt_tokens * input_per_1m / 1_000_000) + \
+            cost = (billed_prompt_tokens * input_per_1m / 1_000_000) + \
                    (completion_tokens * output_per_1m / 1_000_000)
             return round(cost, 6)
     
@@ -184,6 +289,11 @@ def _extract_usage(data: dict) -> Optional[dict]:
         return None
     
     pt = u.get("prompt_tokens")
+    details = u.get("prompt_tokens_details")
+    # OpenAI: prompt_tokens_details.cached_tokens; Anthropic-style gateways: cache_read_input_tokens
+    cached = details.get("cached_tokens") if isinstance(details, dict) else None
+    if cached is None:
+        cached = u.get("cache_read_input_tokens")
     ct = u.get("completion_tokens")
     tt = u.get("total_tokens")
     
@@ -194,11 +304,53 @@ def _extract_usage(data: dict) -> Optional[dict]:
     ct_i = _safe_int(ct, 0)
     tt_i = _safe_int(tt, pt_i + ct_i)
     
-    return {
+    usage = {
         "prompt_tokens": pt_i,
         "completion_tokens": ct_i,
         "total_tokens": tt_i
     }
+    if cached is not None:
+        usage["cached_tokens"] = _safe_int(cached, 0)
+    return usage
+
+
+class SystemPrompt(str):
+    """System prompt = static prefix + per-batch suffix.
+
+    Behaves as the full prompt string everywhere; LLMClient marks
+    `cacheable_prefix` for provider-side prompt caching (see LLM_PROMPT_CACHE).
+    """
+
+    def __new__(cls, prefix: str, suffix: str = ""):
+        obj = super().__new__(cls, prefix + suffix)
+        obj.cacheable_prefix = prefix
+        return obj
+
+
+def _prompt_cache_enabled(model: str) -> bool:
+    """
+    LLM_PROMPT_CACHE: off (default) / auto (Claude models) / on.
+
+    开启后 system message 变为带 cache_control 的 content-part 数组; 不是所有
+    OpenAI 兼容网关都接受该格式, 因此需显式开启。
+    """
+    mode = os.getenv("LLM_PROMPT_CACHE", "off").strip().lower()
+    if mode == "on":
+        return True
+    if mode == "auto":
+        return "claude" in (model or "").lower()
+    return False
+
+
+def _system_message(system: str, model: str) -> Dict[str, Any]:
+    prefix = getattr(system, "cacheable_prefix", "")
+    if not prefix or not _prompt_cache_enabled(model):
+        return {"role": "system", "content": str(system)}
+    parts: List[Dict[str, Any]] = [{"type": "text", "text": prefix, "cache_control": {"type": "ephemeral"}}]
+    suffix = str(system)[len(prefix):]
+    if suffix:
+        parts.append({"type": "text", "text": suffix})
+    return {"role": "system", "content": parts}
 
 
 # -----------------------------
@@ -619,6 +771,32 @@ class LLMClient:
         # Router info for tracing
         router_default = self.router.get_default_model(step) if self.router.enabled else None
         router_chain_len = len(model_chain)
+
+        # Content-addressed response cache (opt-in via LLM_CACHE_PATH)
+        cache = get_response_cache()
+        cache_id = None
+        if cache is not None:
+            cache_id = cache_key(model_chain[0], system, user, final_temp, final_max_tokens, final_resp_format)
+            # Retries after a bad parse must not replay the same cached text
+            refresh = isinstance(metadata, dict) and bool(metadata.get("cache_refresh"))
+            cached = None if refresh else cache.get(cache_id)
+            _trace({
+                "type": "llm_cache",
+                "event": "refresh" if refresh else ("hit" if cached is not None else "miss"),
+                "step": step,
+                "cache_key": cache_id[:16],
+                "model": model_chain[0],
+                **cache.stats()
+            })
+            if cached is not None:
+                return LLMResult(
+                    text=cached.get("text", ""),
+                    latency_ms=0,
+                    raw=None,
+                    request_id=cached.get("request_id"),
+                    usage=cached.get("usage"),
+                    model=cached.get("model")
+                )
         
         # Try each model in chain
         last_error: Optional[LLMError] = None
@@ -644,6 +822,14 @@ class LLMClient:
                     fallback_reason=fallback_reason,
                     timeout=timeout
                 )
+                # The key is built from model_chain[0]; a fallback model's answer is not stored under it
+                if cache is not None and model == model_chain[0]:
+                    cache.put(cache_id, model, {
+                        "text": result.text,
+                        "request_id": result.request_id,
+                        "usage": result.usage,
+                        "model": result.model
+                    })
                 return result
                 
             except LLMError as e:
@@ -679,7 +865,7 @@ class LLMClient:
             "model": model,
             "temperature": temperature,
             "messages": [
-                {"role": "system", "content": system},
+                _system_message(system, model),
                 {"role": "user", "content": user}
             ],
         }
@@ -697,7 +883,7 @@ class LLMClient:
         effective_timeout = timeout if timeout is not None else self.timeout_s
 
         try:
-            resp = requests.post(url, headers=headers, json=payload, timeout=effective_timeout)
+            resp = _http_post(url, headers=headers, payload=payload, timeout=effective_timeout)
             http_status = resp.status_code
         except requests.Timeout as e:
             self._trace_error("timeout", str(e), step, model, attempt_no, 
@@ -755,6 +941,7 @@ class LLMClient:
         resp_chars = len(text or "")
         
         # Token estimation (use usage if present, otherwise local estimate)
+        cached_tokens = int((usage or {}).get("cached_tokens") or 0)
         if usage and usage.get("prompt_tokens"):
             prompt_tokens = usage["prompt_tokens"]
             completion_tokens = usage.get("completion_tokens", 0)
@@ -762,13 +949,13 @@ class LLMClient:
             usage_source = "api_usage"
         else:
             # Local estimation fallback
-            prompt_tokens = _estimate_tokens(system) + _estimate_tokens(user)
-            completion_tokens = _estimate_tokens(text or "")
+            prompt_tokens = _estimate_tokens(system, model) + _estimate_tokens(user, model)
+            completion_tokens = _estimate_tokens(text or "", model)
             total_tokens = prompt_tokens + completion_tokens
             usage_source = "local_estimate"
         
         # Cost estimation
-        cost_usd_est = _estimate_cost(model, prompt_tokens, completion_tokens)
+        cost_usd_est = _estimate_cost(model, prompt_tokens, completion_tokens, cached_tokens)
         
         # Get max_tokens from metadata if passed
         max_tokens_used = None
@@ -785,12 +972,15 @@ class LLMClient:
             "latency_ms": latency_ms,
             "req_chars": req_chars,
             "resp_chars": resp_chars,
+            "req_script_chars": _script_chars(system, user),
+            "resp_script_chars": _script_chars(text or ""),
             # Cost monitoring fields
             "base_url": self.base_url,
             "run_id": os.getenv("LLM_RUN_ID", "default"),
             "prompt_tokens": prompt_tokens,
             "completion_tokens": completion_tokens,
             "total_tokens": total_tokens,
+            "cached_tokens": cached_tokens,
             "usage_source": usage_source,
             "usage_present": usage_present,
             "cost_usd_est": cost_usd_est,
@@ -876,6 +1066,7 @@ class BatchConfig:
         with open(full_path, "r", encoding="utf-8") as f:
             self.config = json.load(f)
         self.models = self.config.get("models", {})
+        self.defaults = self.config.get("defaults", {})
 
     def get_batch_size(self, model: str, content_type: str = "normal") -> int:
         """
@@ -895,6 +1086,23 @@ class BatchConfig:
         else:
             return model_config.get("max_batch_size", 10)
 
+    def get_batch_size_bounds(self, model: str, content_type: str = "normal") -> Tuple[int, int]:
+        """
+        自适应批次大小的上下限 (见 AdaptiveBatchController)
+
+        min: min_batch_size (默认 1)
+        max: 模型显式配置的 adaptive_max_batch_size / adaptive_max_batch_size_long_text,
+             未配置时为静态 max_batch_size (只缩不涨, 静态值常是按溢出风险定的上限)。
+             batch_runtime_v2.json 只给 JSON 稳定的模型 (haiku / sonnet / gpt-4.1-mini) 的
+             normal 批次配置了增长上限; 长文本与需冷却的模型保持只缩不涨。
+        """
+        model_config = self.models.get(model, {})
+        base = max(1, _safe_int(self.get_batch_size(model, content_type), 1))
+        low = max(1, _safe_int(model_config.get("min_batch_size", self.defaults.get("min_batch_size", 1)), 1))
+        key = "adaptive_max_batch_size_long_text" if content_type == "long_text" else "adaptive_max_batch_size"
+        high = _safe_int(model_config.get(key), 0) or base
+        return min(low, base), max(high, base)
+
     def get_cooldown(self, model: str) -> int:
         """获取模型冷却期 (秒)"""
         return self.models.get(model, {}).get("cooldown_required", 0)
@@ -912,6 +1120,42 @@ class BatchConfig:
         """获取模型状态"""
         return self.models.get(model, {}).get("status", "UNKNOWN")
 
+    def get_concurrency(self, model: str, content_type: str = "normal") -> int:
+        """获取模型并发上限 (同时在途的批次数, 1 = 顺序执行); long_text 可单独设 max_concurrency_long_text"""
+        model_config = self.models.get(model, {})
+        value = model_config.get("max_concurrency", self.defaults.get("max_concurrency", 1))
+        if content_type == "long_text":
+            value = model_config.get("max_concurrency_long_text", value)
+        return max(1, int(_safe_int(value, 1) * _dispatch_share()))
+
+    def get_rate_limits(self, model: str) -> Tuple[int, int]:
+        """
+        获取模型速率限制
+
+        Returns:
+            (rpm_limit, tpm_limit): 每分钟请求数 / 每分钟 token 数, 0 表示不限制
+        """
+        model_config = self.models.get(model, {})
+        rpm = max(0, _safe_int(model_config.get("rpm_limit", self.defaults.get("rpm_limit", 0)), 0))
+        tpm = max(0, _safe_int(model_config.get("tpm_limit", self.defaults.get("tpm_limit", 0)), 0))
+        share = _dispatch_share()
+        # 0 仍表示不限制; 切分后至少保留 1
+        return (max(1, int(rpm * share)) if rpm else 0), (max(1, int(tpm * share)) if tpm else 0)
+
+
+def _dispatch_share() -> float:
+    """
+    本进程可用的全局预算比例 (LLM_DISPATCH_SHARE, 默认 1)
+
+    shard_coordinator 给每个 worker 进程设置 1/并行数, 使各进程的
+    max_concurrency / rpm_limit / tpm_limit 之和不超过配置的全局预算
+    """
+    try:
+        share = float(os.getenv("LLM_DISPATCH_SHARE", "1").strip() or 1)
+    except ValueError:
+        return 1.0
+    return min(1.0, share) if share > 0 else 1.0
+
 
 # 全局单例
 _batch_config: Optional[BatchConfig] = None
@@ -925,7 +1169,219 @@ def get_batch_config() -> BatchConfig:
     return _batch_config
 
 
+class _TokenBucket:
+    """线程安全的令牌桶, 按 per_minute 单位/分钟 连续补充"""
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.available = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, amount: float = 1.0) -> float:
+        """阻塞直到取得 amount 个单位, 返回等待秒数"""
+        if self.rate <= 0:
+            return 0.0
+        # A single request larger than the whole bucket would never fit
+        amount = min(float(amount), self.capacity)
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.available = min(self.capacity, self.available + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.available >= amount:
+                    self.available -= amount
+                    return waited
+                delay = (amount - self.available) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class _DispatchGate:
+    """
+    单个模型的进程内调度闸门
+
+    - max_concurrency: 同时在途请求上限 (跨所有 batch_llm_call 调用共享)
+    - rpm_limit / tpm_limit: 每分钟请求数 / token 数令牌桶, 0 表示不限制
+    """
+
+    def __init__(self, max_concurrency: int = 1, rpm_limit: int = 0, tpm_limit: int = 0):
+        self.max_concurrency = max(1, int(max_concurrency or 1))
+        self.slots = threading.BoundedSemaphore(self.max_concurrency)
+        self.request_bucket = _TokenBucket(rpm_limit) if rpm_limit else None
+        self.token_bucket = _TokenBucket(tpm_limit) if tpm_limit else None
+
+    @contextmanager
+    def slot(self, est_tokens: int = 0):
+        """占用一个并发槽位并扣减速率配额"""
+        self.slots.acquire()
+        try:
+            if self.request_bucket is not None:
+                self.request_bucket.acquire(1)
+            if self.token_bucket is not None and est_tokens > 0:
+                self.token_bucket.acquire(est_tokens)
+            yield
+        finally:
+            self.slots.release()
+
+
+_dispatch_gates: Dict[str, _DispatchGate] = {}
+_dispatch_gates_lock = threading.Lock()
+
+
+def _get_dispatch_gate(model: str, config: Any) -> _DispatchGate:
+    """获取 (或按 BatchConfig 创建) 模型的全局调度闸门"""
+    with _dispatch_gates_lock:
+        gate = _dispatch_gates.get(model)
+        if gate is None:
+            # Test doubles and legacy config objects may not expose the limit getters
+            concurrency = config.get_concurrency(model) if hasattr(config, "get_concurrency") else 1
+            rpm, tpm = config.get_rate_limits(model) if hasattr(config, "get_rate_limits") else (0, 0)
+            gate = _DispatchGate(concurrency, rpm, tpm)
+            _dispatch_gates[model] = gate
+        return gate
+
+
+# 自适应批次大小 (跨运行持久化)
+ADAPTIVE_STATE_VERSION = 1
+ADAPTIVE_GROW_AFTER = 3        # 连续健康批次数达到后扩大
+ADAPTIVE_GROW_FACTOR = 1.25
+ADAPTIVE_SHRINK_FACTOR = 0.5   # timeout / parse 失败
+ADAPTIVE_SLOW_FACTOR = 0.8     # 成功但延迟超过 timeout × ADAPTIVE_SLOW_RATIO
+ADAPTIVE_SLOW_RATIO = 0.5
+ADAPTIVE_SHRINK_KINDS = ("timeout", "parse")
+
+_adaptive_state_lock = threading.Lock()
+
+
+def _adaptive_enabled() -> bool:
+    return os.getenv("BATCH_ADAPTIVE", "0").strip().lower() in ("1", "true", "on", "yes")
+
+
+def _adaptive_state_path() -> Path:
+    return Path(os.getenv("BATCH_ADAPTIVE_STATE", "data/batch_adaptive_state.json"))
+
+
+def _load_adaptive_state(path: Path) -> Dict[str, Any]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            payload = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(payload, dict) or payload.get("version") != ADAPTIVE_STATE_VERSION:
+        return {}
+    entries = payload.get("entries")
+    return entries if isinstance(entries, dict) else {}
+
+
+# 批次失败后的拆分恢复 (batch_llm_call split_failed)
+SPLIT_RECOVERY_KINDS = ("timeout", "parse")  # 拆小批次有望解决的失败类型
+SPLIT_RECOVERY_MAX_DEPTH = 10
+
+
+def _batch_failure_kind(exc: Exception) -> str:
+    """parse_llm_response 抛 ValueError (PARSE_*); LLMError 自带 kind"""
+    if isinstance(exc, LLMError):
+        return exc.kind
+    if isinstance(exc, ValueError):
+        return "parse"
+    return "error"
+
+
+class AdaptiveBatchController:
+    """
+    按 (model, step, content_type) 学习批次大小
+
+    - 连续 ADAPTIVE_GROW_AFTER 个批次成功且延迟 <= timeout × ADAPTIVE_SLOW_RATIO: 扩大 ×1.25
+    - timeout 或 parse 失败 (每次尝试都计): 缩小 ×0.5
+    - 成功但偏慢: 缩小 ×0.8
+    - 其他错误 (network/upstream/http) 与批次大小无关, 只清零健康计数
+    大小限定在 BatchConfig.get_batch_size_bounds 内; max_batch_tokens 预算按 size/base 同比缩放。
+    save() 把学到的大小写回 BATCH_ADAPTIVE_STATE (默认 data/batch_adaptive_state.json)。
+    """
+
+    def __init__(self, model: str, step: str, content_type: str, base_size: int,
+                 bounds: Tuple[int, int], timeout_s: float, state_path: Optional[Path] = None):
+        self.key = f"{model}|{step}|{content_type}"
+        self.base_size = max(1, int(base_size))
+        self.min_size, self.max_size = max(1, int(bounds[0])), max(1, int(bounds[1]))
+        self.slow_ms = float(timeout_s or 0) * 1000 * ADAPTIVE_SLOW_RATIO
+        self.state_path = state_path
+        self.lock = threading.Lock()
+        self.healthy_streak = 0
+        self.samples = 0
+        self.adjustments: List[Dict[str, Any]] = []
+        persisted = None
+        if state_path is not None:
+            with _adaptive_state_lock:
+                entry = _load_adaptive_state(state_path).get(self.key) or {}
+            persisted = _safe_int(entry.get("batch_size"), 0) or None
+        self.initial_size = self._clamp(persisted or self.base_size)
+        self.size = self.initial_size
+
+    def _clamp(self, size: int) -> int:
+        return max(self.min_size, min(self.max_size, int(size)))
+
+    def token_budget(self, max_tokens: int) -> int:
+        with self.lock:
+            return max(1, int(max_tokens * self.size / self.base_size))
+
+    def record(self, rows: int, latency_ms: int, outcome: str) -> int:
+        """记录一次请求结果 (outcome: "ok" 或 LLMError.kind / "parse"), 返回调整后的大小"""
+        with self.lock:
+            self.samples += 1
+            before = self.size
+            if outcome == "ok":
+                if self.slow_ms and latency_ms > self.slow_ms:
+                    self.healthy_streak = 0
+                    self.size = self._clamp(min(self.size - 1, int(self.size * ADAPTIVE_SLOW_FACTOR)))
+                else:
+                    self.healthy_streak += 1
+                    # 只有装满的批次才能证明更大的批次也健康
+                    if self.healthy_streak >= ADAPTIVE_GROW_AFTER and rows >= self.size:
+                        self.healthy_streak = 0
+                        self.size = self._clamp(max(self.size + 1, int(self.size * ADAPTIVE_GROW_FACTOR)))
+            else:
+                self.healthy_streak = 0
+                if outcome in ADAPTIVE_SHRINK_KINDS:
+                    self.size = self._clamp(int(self.size * ADAPTIVE_SHRINK_FACTOR))
+            if self.size != before:
+                self.adjustments.append({"from": before, "to": self.size, "outcome": outcome, "latency_ms": latency_ms})
+            return self.size
+
+    def save(self) -> None:
+        if self.state_path is None:
+            return
+        with _adaptive_state_lock:
+            entries = _load_adaptive_state(self.state_path)
+            with self.lock:
+                entries[self.key] = {
+                    "batch_size": self.size,
+                    "base_batch_size": self.base_size,
+                    "samples": _safe_int((entries.get(self.key) or {}).get("samples"), 0) + self.samples,
+                    "updated_at": datetime.now().isoformat(),
+                }
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.state_path.with_name(f".{self.state_path.name}.tmp-{os.getpid()}")
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump({"version": ADAPTIVE_STATE_VERSION, "entries": entries}, f, indent=2, ensure_ascii=False)
+            os.replace(tmp, self.state_path)
+
+
+def _get_batch_controller(config: Any, model: str, step: str, content_type: str,
+                          base_size: int, timeout_s: float) -> Optional[AdaptiveBatchController]:
+    """未开启 BATCH_ADAPTIVE 或配置对象不提供上下限时返回 None (固定批次大小, 不读写状态文件)"""
+    if not _adaptive_enabled() or not hasattr(config, "get_batch_size_bounds"):
+        return None
+    bounds = config.get_batch_size_bounds(model, content_type)
+    return AdaptiveBatchController(model, step, content_type, base_size, bounds, timeout_s,
+                                   state_path=_adaptive_state_path())
+
+
 # 全局计时器 (模块级)
+_progress_lock = threading.Lock()
 _progress_state = {
     'start_time': None,
     'last_report_time': None,
@@ -948,133 +1404,119 @@ def log_llm_progress(step: str, event_type: str, data: Dict[str, Any],
     """
     global _progress_state
 
-    now = time.time()
-    timestamp = datetime.now().isoformat()
-
-    # === 路线 1: JSONL 文件输出 (保持原有逻辑) ===
-    log_entry = {
-        "timestamp": timestamp,
-        "step": step,
-        "event": event_type,
-        **data
-    }
-
-    # 确保关键字段在顶级存在，便于检索
-    if event_type == "step_start":
-        log_entry['model'] = data.get('model') or data.get('model_name') or 'unspecified'
-    elif event_type == "batch_complete":
-        log_entry['rows_in_batch'] = data.get('rows_in_batch') or data.get('batch_size') or 0
-        if 'model' not in log_entry and _progress_state.get('current_model'):
-            log_entry['model'] = _progress_state['current_model']
-
-    log_dir = "reports"
-    os.makedirs(log_dir, exist_ok=True)
-    log_path = os.path.join(log_dir, f"{step}_progress.jsonl")
-
-    with open(log_path, "a", encoding="utf-8") as f:
-        f.write(json.dumps(log_entry, ensure_ascii=False) + "\n")
-
-    # === 路线 2: 终端实时输出 ===
-    if silent:
-        return
-
-    if event_type == "step_start":
-        _progress_state['start_time'] = now
-        _progress_state['last_report_time'] = now
-        _progress_state['total_rows'] = data.get('total_rows', 0)
-        _progress_state['processed_rows'] = 0
+    # Concurrent batch workers report through the same module-level state
+    with _progress_lock:
+        now = time.time()
+        timestamp = datetime.now().isoformat()
 
-        # 确保 model 有默认值
-        model = data.get('model') or data.get('model_name') or 'unspecified'
-        _progress_state['current_model'] = model # 暂存以便后续批次使用
-        
-        batch_size = data.get('batch_size', 'N/A')
-        total = _progress_state['total_rows']
+        # === 路线 1: JSONL 文件输出 (保持原有逻辑) ===
+        log_entry = {
+            "timestamp": timestamp,
+            "step": step,
+            "event": event_type,
+            **data
+        }
 
-        print(f"\n{'='*60}")
-        print(f"[{step}] 🚀 Starting")
-        print(f"  Total rows: {total} | Batch size: {batch_size} | Model: {model}")
-        print(f"{'='*60}")
-        sys.stdout.flush()
+        # 确保关键字段在顶级存在，便于检索
+        if event_type == "step_start":
+            log_entry['model'] = data.get('model') or data.get('model_name') or 'unspecified'
+        elif event_type == "batch_complete":
+            log_entry['rows_in_batch'] = data.get('rows_in_batch') or data.get('batch_size') or 0
+            if 'model' not in log_entry and _progress_state.get('current_model'):
+                log_entry['model'] = _progress_state['current_model']
+
+        emit_event(os.path.join("reports", f"{step}_progress.jsonl"), log_entry)
+
+        # === 路线 2: 终端实时输出 ===
+        if silent:
+            return
+
+        if event_type == "step_start":
+            _progress_state['start_time'] = now
+            _progress_state['last_report_time'] = now
+            _progress_state['total_rows'] = data.get('total_rows', 0)
+            _progress_state['processed_rows'] = 0
+
+            # 确保 model 有默认值
+            model = data.get('model') or data.get('model_name') or 'unspecified'
+            _progress_state['current_model'] = model # 暂存以便后续批次使用
+        
+            batch_size = data.get('batch_size', 'N/A')
+            total = _progress_state['total_rows']
+
+            print(f"\n{'='*60}")
+            print(f"[{step}] 🚀 Starting")
+            print(f"  Total rows: {total} | Batch size: {batch_size} | Model: {model}")
+            print(f"{'='*60}")
+            sys.stdout.flush()
 
-    elif event_type == "batch_start":
-        batch_num = data.get('batch_index') or data.get('batch_num', 0)
-        total_batches = data.get('total_batches', 0)
-        rows_in_batch = data.get('rows_in_batch') or data.get('batch_size', 0)
+        elif event_type == "batch_start":
+            batch_num = data.get('batch_index') or data.get('batch_num', 0)
+            total_batches = data.get('total_batches', 0)
+            rows_in_batch = data.get('rows_in_batch') or data.get('batch_size', 0)
 
-        print(f"⏳ [{step}] Batch {batch_num}/{total_batches} starting | "
-              f"{rows_in_batch} rows")
-        sys.stdout.flush()
-        batch_num = data.get('batch_index') or data.get('batch_num', 0)
-        total_batches = data.get('total_batches', 0)
+            print(f"⏳ [{step}] Batch {batch_num}/{total_batches} starting | "
+                  f"{rows_in_batch} rows")
+            sys.stdout.flush()
+            batch_num = data.get('batch_index') or data.get('batch_num', 0)
+            total_batches = data.get('total_batches', 0)
         
-        # 统一字段名: 优先使用 rows_in_batch，兼容 batch_size
-        rows_in_batch = data.get('rows_in_batch') or data.get('batch_size') or 0
+            # 统一字段名: 优先使用 rows_in_batch，兼容 batch_size
+            rows_in_batch = data.get('rows_in_batch') or data.get('batch_size') or 0
         
-        latency_ms = data.get('latency_ms', 0)
-        status = data.get('status', 'SUCCESS')
+            latency_ms = data.get('latency_ms', 0)
+            status = data.get('status', 'SUCCESS')
 
-        _progress_state['processed_rows'] += rows_in_batch
-        processed = _progress_state['processed_rows']
-        total = _progress_state['total_rows']
+            _progress_state['processed_rows'] += rows_in_batch
+            processed = _progress_state['processed_rows']
+            total = _progress_state['total_rows']
 
-        # 计算百分比
-        pct = (processed / total * 100) if total > 0 else 0
+            # 计算百分比
+            pct = (processed / total * 100) if total > 0 else 0
 
-        # 计算时间
-        elapsed_total = now - _progress_state['start_time']
-        elapsed_since_last = now - _progress_state['last_report_time']
-        _progress_state['last_report_time'] = now
+            # 计算时间
+            elapsed_total = now - _progress_state['start_time']
+            elapsed_since_last = now - _progress_state['last_report_time']
+            _progress_state['last_report_time'] = now
 
-        # 状态图标
-        icon = "✅" if status == "SUCCESS" else "❌"
+            # 状态图标
+            icon = "✅" if status == "SUCCESS" else "❌"
 
-        # 格式化输出
-        print(f"{icon} [{step}] Batch {batch_num}/{total_batches} | "
-              f"{processed}/{total} rows ({pct:.1f}%) | "
-              f"Latency: {latency_ms}ms | "
-              f"Δt: {elapsed_since_last:.1f}s | "
-              f"Total: {elapsed_total:.1f}s")
-        sys.stdout.flush()
+            # 格式化输出
+            print(f"{icon} [{step}] Batch {batch_num}/{total_batches} | "
+                  f"{processed}/{total} rows ({pct:.1f}%) | "
+                  f"Latency: {latency_ms}ms | "
+                  f"Δt: {elapsed_since_last:.1f}s | "
+                  f"Total: {elapsed_total:.1f}s")
+            sys.stdout.flush()
 
-    elif event_type == "step_complete":
-        success = data.get('success_count', 0)
-        failed = data.get('failed_count', 0)
-        total = success + failed
+        elif event_type == "step_complete":
+            success = data.get('success_count', 0)
+            failed = data.get('failed_count', 0)
+            total = success + failed
 
-        elapsed_total = now - _progress_state['start_time'] if _progress_state['start_time'] else 0
+            elapsed_total = now - _progress_state['start_time'] if _progress_state['start_time'] else 0
 
-        print(f"\n{'='*60}")
-        print(f"[{step}] 🏁 Complete")
-        print(f"  Success: {success} | Failed: {failed} | Total: {total}")
-        print(f"  Total time: {elapsed_total:.1f}s")
-        print(f"{'='*60}\n")
-        sys.stdout.flush()
+            print(f"\n{'='*60}")
+            print(f"[{step}] 🏁 Complete")
+            print(f"  Success: {success} | Failed: {failed} | Total: {total}")
+            print(f"  Total time: {elapsed_total:.1f}s")
+            print(f"{'='*60}\n")
+            sys.stdout.flush()
 
 
-def parse_llm_response(
-    response_text: str,
-    expected_rows: list,
-    partial_match: bool = False
-) -> list:
+def _extract_llm_items(response_text: str, trace: bool = True) -> Tuple[list, str, str, int, str]:
     """
-    解析 LLM JSON 响应
+    从 LLM 响应中提取 items 数组 (不校验 id 覆盖率)
 
-    支持多种输出形式:
-    - {"items": [...]}
-    - [...]
-    - {"results": [...]} / {"data": [...]} / {"translations": [...]}
-    - 带 markdown 代码块
-    - 带 <thinking>...</thinking> 的响应
-
-    对关键失败路径进行可追踪分类，便于统一问题记录。
+    Returns:
+        (items, parse_strategy, parse_error_code, raw_response_len, raw_response_sha1)
     """
     import hashlib
     import re
 
     raw = (response_text or "").strip()
     raw_sha1 = hashlib.sha1(raw.encode("utf-8", errors="ignore")).hexdigest()
-    expected_ids = {str(r.get("id") or r.get("string_id") or "") for r in (expected_rows or [])}
 
     parse_strategy = "raw_json"
     parse_error_code = ""
@@ -1158,13 +1600,14 @@ def parse_llm_response(
 
     items = _normalize_items(data)
     if not isinstance(items, list):
-        _trace({
-            "type": "llm_parse_failed",
-            "strategy": parse_strategy,
-            "error_code": "PARSE_SCHEMA_MISMATCH",
-            "raw_response_len": len(raw),
-            "raw_response_sha1": raw_sha1
-        })
+        if trace:
+            _trace({
+                "type": "llm_parse_failed",
+                "strategy": parse_strategy,
+                "error_code": "PARSE_SCHEMA_MISMATCH",
+                "raw_response_len": len(raw),
+                "raw_response_sha1": raw_sha1
+            })
         raise ValueError("PARSE_SCHEMA_MISMATCH: could not find items/results/data/translations array")
 
     # 修复常见结构：id 可能写成 string_id
@@ -1181,7 +1624,7 @@ def parse_llm_response(
         normalized.append(item)
     items = normalized
 
-    if parse_error_code:
+    if parse_error_code and trace:
         _trace({
             "type": "llm_parse_recovered",
             "strategy": parse_strategy,
@@ -1191,10 +1634,66 @@ def parse_llm_response(
             "items_count": len(items)
         })
 
+    return items, parse_strategy, parse_error_code, len(raw), raw_sha1
+
+
+def _salvage_llm_items(response_text: Optional[str], expected_rows: list) -> Tuple[list, bool]:
+    """
+    失败批次的响应中仍可用的条目: 能解析且 id 属于本批次 (每个 id 取第一条)。
+
+    Returns:
+        (items, whole): whole 表示响应作为完整文档解析成功 (而非截断后贪婪提取的片段)
+    """
+    if not response_text:
+        return [], False
+    try:
+        items, parse_strategy = _extract_llm_items(response_text, trace=False)[:2]
+    except ValueError:
+        return [], False
+    expected_ids = {str(r.get("id") or r.get("string_id") or "") for r in expected_rows}
+    salvaged, seen = [], set()
+    for item in items:
+        sid = str(item.get("id", ""))
+        if sid and sid in expected_ids and sid not in seen:
+            seen.add(sid)
+            salvaged.append(item)
+    return salvaged, parse_strategy != "greedy_extract"
+
+
+def parse_llm_response(
+    response_text: str,
+    expected_rows: list,
+    partial_match: bool = False
+) -> list:
+    """
+    解析 LLM JSON 响应
+
+    支持多种输出形式:
+    - {"items": [...]}
+    - [...]
+    - {"results": [...]} / {"data": [...]} / {"translations": [...]}
+    - 带 markdown 代码块
+    - 带 <thinking>...</thinking> 的响应
+
+    对关键失败路径进行可追踪分类，便于统一问题记录。
+    """
+    items, parse_strategy, parse_error_code, raw_len, raw_sha1 = _extract_llm_items(response_text)
+    expected_ids = {str(r.get("id") or r.get("string_id") or "") for r in (expected_rows or [])}
+
     # 验证 ID 覆盖率
     returned_ids = {str(item.get("id", "")) for item in items if str(item.get("id", ""))}
 
     if partial_match:
+        if parse_error_code == "PARSE_PARTIAL_EXTRACT":
+            # partial_match 以"缺席"表示无结果, 只有完整文档才能这样解读; 片段多半是截断的响应
+            _trace({
+                "type": "llm_parse_failed",
+                "strategy": parse_strategy,
+                "error_code": "PARSE_PARTIAL_EXTRACT",
+                "raw_response_len": raw_len,
+                "raw_response_sha1": raw_sha1
+            })
+            raise ValueError("PARSE_PARTIAL_EXTRACT: response is a fragment, absent ids are not a complete answer")
         extra = returned_ids - expected_ids
         if extra:
             _trace({
@@ -1203,7 +1702,7 @@ def parse_llm_response(
                 "error_code": "PARSE_SCHEMA_MISMATCH",
                 "missing_ids": [],
                 "extra_ids": list(sorted(extra)),
-                "raw_response_len": len(raw),
+                "raw_response_len": raw_len,
                 "raw_response_sha1": raw_sha1
             })
             raise ValueError(f"PARSE_SCHEMA_MISMATCH: extra ids={extra}")
@@ -1217,7 +1716,7 @@ def parse_llm_response(
                 "error_code": "PARSE_SCHEMA_MISMATCH",
                 "missing_ids": list(sorted(missing)),
                 "extra_ids": list(sorted(extra)),
-                "raw_response_len": len(raw),
+                "raw_response_len": raw_len,
                 "raw_response_sha1": raw_sha1
             })
             raise ValueError(f"PARSE_SCHEMA_MISMATCH: missing={missing}, extra={extra}")
@@ -1227,7 +1726,7 @@ def parse_llm_response(
             "type": "llm_parse_recover_used",
             "strategy": parse_strategy,
             "error_code": parse_error_code or "UNKNOWN",
-            "raw_response_len": len(raw),
+            "raw_response_len": raw_len,
             "raw_response_sha1": raw_sha1
         })
 
@@ -1245,10 +1744,23 @@ def batch_llm_call(
     allow_fallback: bool = False,
     partial_match: bool = False,
     save_partial: bool = True,
-    output_dir: str = None
+    output_dir: str = None,
+    concurrency: Optional[int] = None,
+    on_batch_complete: Optional[Callable[[list], None]] = None,
+    max_batch_tokens: Optional[int] = None,
+    split_failed: bool = True
 ) -> list:
     """
-    批次化 LLM 调用 (统一接口) - v2.1 with progress reporting
+    批次化 LLM 调用 (统一接口) - v2.2 with concurrent dispatch
+
+    并发度默认取 batch_runtime_v2.json 中模型的 max_concurrency, 可用 concurrency 覆盖;
+    同一模型的所有调用共享并发槽位与 rpm/tpm 令牌桶。结果始终按输入顺序返回。
+    on_batch_complete(items) 在每个成功批次解析后立即回调 (可能来自工作线程),
+    供调用方增量落盘。
+    max_batch_tokens: 按估算 token 装箱 (batch_utils.split_into_batches), 批次条数仍以配置为上限。
+    split_failed: 重试用尽的批次不整批丢弃 -- 保留已解析的条目并只重发缺失的 id;
+        整批无法解析或超时则二分重发 (batch_utils.binary_split), 直到单行。
+        仍失败的行记入 failed_batches[*].failed_ids; on_batch_complete 也会收到部分结果。
     """
     config = get_batch_config()
 
@@ -1256,11 +1768,55 @@ def batch_llm_call(
     batch_size = config.get_batch_size(model, content_type)
     timeout = config.get_timeout(model, content_type)
     cooldown = config.get_cooldown(model)
-
-    total_batches = (len(rows) + batch_size - 1) // batch_size
+    gate = _get_dispatch_gate(model, config)
+    controller = _get_batch_controller(config, model, step, content_type, batch_size, timeout)
+    if controller is not None:
+        batch_size = controller.initial_size
+
+    def packing_config(size: int) -> PackingConfig:
+        budget = controller.token_budget(max_batch_tokens) if controller is not None else max_batch_tokens
+        return PackingConfig(max_items=size, max_tokens=budget, text_fields=["source_text"], model=model)
+
+    # 批次按需切分: 自适应控制器可在运行中调整后续批次的大小
+    if max_batch_tokens:
+        planned_batches = len(split_into_batches(rows, packing_config(batch_size)))
+    else:
+        planned_batches = (len(rows) + batch_size - 1) // batch_size
+    plan_lock = threading.Lock()
+    batch_spans: List[Tuple[int, int]] = []
+    plan = {"cursor": 0, "total": planned_batches, "size": batch_size}
+
+    def next_batch() -> Optional[int]:
+        with plan_lock:
+            start = plan["cursor"]
+            if start >= len(rows):
+                return None
+            size = controller.size if controller is not None else batch_size
+            if size != plan["size"]:
+                plan["size"] = size
+                plan["total"] = len(batch_spans) + (len(rows) - start + size - 1) // size
+            if max_batch_tokens:
+                # 贪心装箱: 前缀的第一批与整体装箱的第一批相同
+                size = len(split_into_batches(rows[start:start + size], packing_config(size))[0])
+            end = min(start + size, len(rows))
+            batch_spans.append((start, end))
+            plan["cursor"] = end
+            plan["total"] = max(plan["total"], len(batch_spans))
+            return len(batch_spans) - 1
+
+    total_batches = planned_batches
     results = []
     failed_batches = []
 
+    if concurrency is None:
+        concurrency = gate.max_concurrency
+        if hasattr(config, "get_concurrency"):
+            concurrency = min(concurrency, config.get_concurrency(model, content_type))
+    # Models that require a cooldown are paced one batch at a time
+    if cooldown > 0:
+        concurrency = 1
+    concurrency = max(1, min(int(concurrency), total_batches or 1))
+
     # 步骤开始
     log_llm_progress(step, "step_start", {
         "total_rows": len(rows),
@@ -1270,7 +1826,9 @@ def batch_llm_call(
         "content_type": content_type,
         "timeout": timeout,
         "cooldown": cooldown,
-        "partial_match": partial_match
+        "concurrency": concurrency,
+        "partial_match": partial_match,
+        "adaptive": controller is not None
     })
 
     # Progress helpers
@@ -1290,7 +1848,7 @@ def batch_llm_call(
                     "timestamp": datetime.now().isoformat(),
                     "step": step,
                     "batch_num": batch_num,
-                    "total_batches": total_batches,
+                    "total_batches": plan["total"],
                     "rows_processed": processed,
                     "total_rows": len(rows)
                 }
@@ -1299,84 +1857,167 @@ def batch_llm_call(
                     json.dump(checkpoint, f, indent=2)
             except Exception: pass
 
-    client = LLMClient()
+    # Checkpoint watermark: highest batch whose predecessors have all finished
+    checkpoint_lock = threading.Lock()
+    finished_batches = set()
+    watermark = {"batch_num": 0}
 
-    for i in range(total_batches):
-        start_idx = i * batch_size
-        end_idx = min(start_idx + batch_size, len(rows))
-        batch_rows = rows[start_idx:end_idx]
-        batch_num = i + 1
+    def mark_finished(batch_num: int, success: bool):
+        with checkpoint_lock:
+            finished_batches.add(batch_num)
+            while watermark["batch_num"] + 1 in finished_batches:
+                watermark["batch_num"] += 1
+            if success:
+                done = watermark["batch_num"]
+                write_checkpoint(done, batch_spans[done - 1][1] if done else 0)
+
+    client = LLMClient()
 
+    def build_prompts(batch_rows: list) -> Tuple[str, str, Dict[str, int]]:
         # 构造 user prompt
         items = [{"id": r["id"], "source_text": r.get("source_text", "")} for r in batch_rows]
         user_prompt = user_prompt_template(items)
-        
+
         # Determine system prompt (static or dynamic)
         if callable(system_prompt):
             final_system_prompt = system_prompt(batch_rows)
         else:
             final_system_prompt = system_prompt
+        prompt_size = {
+            "system_prompt_chars": len(final_system_prompt),
+            "user_prompt_chars": len(user_prompt),
+            "prompt_tokens_est": _estimate_tokens(final_system_prompt, model) + _estimate_tokens(user_prompt, model),
+        }
+        return final_system_prompt, user_prompt, prompt_size
+
+    def send(final_system_prompt: str, user_prompt: str, est_tokens: int, attempt: int, attempts: int):
+        with gate.slot(est_tokens):
+            return client.chat(
+                system=final_system_prompt,
+                user=user_prompt,
+                temperature=0,
+                metadata={
+                    "step": step,
+                    "model_override": model,
+                    "force_llm": True,
+                    "allow_fallback": allow_fallback,
+                    "retry": attempts,
+                    "attempt": attempt,
+                    "cache_refresh": attempt > 0
+                },
+                timeout=timeout
+            )
+
+    row_order = {str(r.get("id")): idx for idx, r in enumerate(rows)}
+
+    def resend(sub_rows: list, depth: int, stats: Dict[str, int]) -> Tuple[list, list]:
+        """拆分恢复中的单次请求 (不重试), 失败时继续 recover"""
+        final_system_prompt, user_prompt, prompt_size = build_prompts(sub_rows)
+        stats["calls"] += 1
+        response_text = None
+        t0 = time.time()
+        try:
+            response = send(final_system_prompt, user_prompt, prompt_size["prompt_tokens_est"], 0, 0)
+            response_text = response.text
+            items = parse_llm_response(response_text, sub_rows, partial_match=partial_match)
+            if controller is not None:
+                controller.record(len(sub_rows), int((time.time() - t0) * 1000), "ok")
+            return items, []
+        except Exception as e:
+            kind = _batch_failure_kind(e)
+            if controller is not None:
+                controller.record(len(sub_rows), int((time.time() - t0) * 1000), kind)
+            return recover(sub_rows, response_text, kind, depth, stats)
+
+    def recover(batch_rows: list, response_text: Optional[str], kind: str, depth: int,
+                stats: Dict[str, int]) -> Tuple[list, list]:
+        """
+        失败批次的恢复: 保留已解析的条目, 只重发缺失的 id;
+        整批无法解析 (parse/timeout) 时二分重发。返回 (items, failed_rows)。
+        """
+        items, whole = _salvage_llm_items(response_text, batch_rows)
+        if partial_match:
+            if whole:
+                # 完整响应 (仅含多余 id 等): 缺席即"无结果", 解析出的子集就是完整答案
+                return items, []
+            # 截断或超时: 最后一条回收条目之前的缺席 id 已被评审, 之后的 id 未被评审, 需重发
+            position = {str(r.get("id")): n for n, r in enumerate(batch_rows)}
+            last = max((position[str(it.get("id"))] for it in items if str(it.get("id")) in position), default=-1)
+            remaining = batch_rows[last + 1:]
+        else:
+            covered = {str(it.get("id")) for it in items}
+            remaining = [r for r in batch_rows if str(r.get("id")) not in covered]
+        if not remaining:
+            return items, []
+        if not split_failed or depth >= SPLIT_RECOVERY_MAX_DEPTH:
+            return items, remaining
+        if items:
+            more, failed = resend(remaining, depth + 1, stats)
+            return items + more, failed
+        if kind not in SPLIT_RECOVERY_KINDS or len(remaining) <= 1:
+            return items, remaining
+        left, right = binary_split(remaining)
+        left_items, left_failed = resend(left, depth + 1, stats)
+        right_items, right_failed = resend(right, depth + 1, stats)
+        return left_items + right_items, left_failed + right_failed
+
+    def run_batch(i: int) -> Tuple[list, Optional[dict]]:
+        start_idx, end_idx = batch_spans[i]
+        batch_rows = rows[start_idx:end_idx]
+        batch_num = i + 1
+        final_system_prompt, user_prompt, prompt_size = build_prompts(batch_rows)
 
         # 批次开始
         log_llm_progress(step, "batch_start", {
             "batch_num": batch_num,
-            "total_batches": total_batches,
-            "rows_in_batch": len(batch_rows)
+            "total_batches": plan["total"],
+            "rows_in_batch": len(batch_rows),
+            **prompt_size,
         })
-        
+
         # Heartbeat
         if batch_num % 5 == 1:
-            write_heartbeat(f"Processing batch {batch_num}/{total_batches}")
+            write_heartbeat(f"Processing batch {batch_num}/{plan['total']}")
 
-        # === 新增: 带重试的批次处理 === (Keep existing logic)
-        # ... (omitted for brevity, just ensuring we don't delete it)
-
-        # === 新增: 带重试的批次处理 ===
-        batch_success = False
+        # === 带重试的批次处理 ===
         batch_error = None
-        batch_items = []
+        failure_kind = "error"
+        response_text = None
+        t0 = time.time()
 
         for attempt in range(retry + 1):
             try:
                 t0 = time.time()
-                response = client.chat(
-                    system=final_system_prompt,
-                    user=user_prompt,
-                    temperature=0,
-                    metadata={
-                        "step": step,
-                        "model_override": model,
-                        "force_llm": True,
-                        "allow_fallback": allow_fallback,
-                        "retry": retry,
-                        "attempt": attempt
-                    },
-                    timeout=timeout
-                )
+                response = send(final_system_prompt, user_prompt, prompt_size["prompt_tokens_est"], attempt, retry)
+                response_text = response.text
 
                 latency_ms = int((time.time() - t0) * 1000)
                 batch_items = parse_llm_response(response.text, batch_rows, partial_match=partial_match)
-                batch_success = True
+                if controller is not None:
+                    controller.record(len(batch_rows), latency_ms, "ok")
 
                 # 记录成功
                 log_llm_progress(step, "batch_complete", {
                     "batch_num": batch_num,
-                    "total_batches": total_batches,
+                    "total_batches": plan["total"],
                     "rows_in_batch": len(batch_rows),
                     "latency_ms": latency_ms,
                     "status": "ok",
                     "model": model,
                     "request_id": response.request_id,
-                    "usage": response.usage
+                    "usage": response.usage,
+                    **prompt_size,
                 })
-                
+
                 # Checkpoint
-                write_checkpoint(batch_num, min(end_idx, len(rows)))
-                
-                break  # 成功，退出重试循环
+                mark_finished(batch_num, True)
+                return batch_items, None
 
-            except (ValueError, LLMError) as e:
+            except Exception as e:
                 batch_error = str(e)
+                failure_kind = _batch_failure_kind(e)
+                if controller is not None:
+                    controller.record(len(batch_rows), int((time.time() - t0) * 1000), failure_kind)
                 if attempt < retry:
                     # 还有重试机会
                     _trace({
@@ -1387,66 +2028,117 @@ def batch_llm_call(
                         "error": batch_error
                     })
                     time.sleep(2)  # 短暂等待后重试
-                    continue
-            except Exception as e:
-                batch_error = str(e)
-                if attempt < retry:
-                    _trace({
-                        "type": "batch_retry",
-                        "step": step,
-                        "batch_num": batch_num,
-                        "attempt": attempt,
-                        "error": batch_error
-                    })
-                    time.sleep(2)
-                    continue
 
-        if batch_success:
-            results.extend(batch_items)
-        else:
-            # 批次失败，记录并跳过
-            latency_ms = int((time.time() - t0) * 1000) if 't0' in dir() else 0
-            log_llm_progress(step, "batch_complete", {
+        # 重试用尽: 保留可解析的条目, 缺失 id 重发 / 整批二分
+        latency_ms = int((time.time() - t0) * 1000)
+        stats = {"calls": 0}
+        batch_items, failed_rows = recover(batch_rows, response_text, failure_kind, 0, stats)
+        batch_items.sort(key=lambda it: row_order.get(str(it.get("id")), len(rows)))
+        if batch_items or stats["calls"]:
+            _trace({
+                "type": "batch_split_recovery",
+                "step": step,
                 "batch_num": batch_num,
-                "total_batches": total_batches,
                 "rows_in_batch": len(batch_rows),
-                "latency_ms": latency_ms,
-                "status": "error",
-                "error": batch_error[:200] if batch_error else "Unknown error",
-                "model": model
+                "recovered_items": len(batch_items),
+                "failed_ids": [str(r.get("id")) for r in failed_rows],
+                "extra_calls": stats["calls"],
+                "error": batch_error[:200] if batch_error else None
             })
 
-            failed_batches.append({
+        if not failed_rows:
+            log_llm_progress(step, "batch_complete", {
                 "batch_num": batch_num,
-                "start_idx": start_idx,
-                "end_idx": end_idx,
-                "error": batch_error
+                "total_batches": plan["total"],
+                "rows_in_batch": len(batch_rows),
+                "latency_ms": latency_ms,
+                "status": "recovered",
+                "model": model,
+                "recovery_calls": stats["calls"],
             })
+            mark_finished(batch_num, True)
+            return batch_items, None
 
-            # 不抛出异常，继续处理下一批次
-            print(f"⚠️ [{step}] Batch {batch_num}/{total_batches} failed, skipping. Error: {batch_error[:100] if batch_error else 'Unknown'}")
-            sys.stdout.flush()
-        # === 批次处理结束 ===
+        # 批次 (部分) 失败，记录并跳过
+        log_llm_progress(step, "batch_complete", {
+            "batch_num": batch_num,
+            "total_batches": plan["total"],
+            "rows_in_batch": len(batch_rows),
+            "latency_ms": latency_ms,
+            "status": "partial" if batch_items else "error",
+            "error": batch_error[:200] if batch_error else "Unknown error",
+            "model": model,
+            "recovery_calls": stats["calls"],
+        })
+        mark_finished(batch_num, False)
 
-        # 冷却期 (除了最后一个批次)
-        if i < total_batches - 1 and cooldown > 0:
-            time.sleep(cooldown)
+        # 不抛出异常，继续处理下一批次
+        print(f"⚠️ [{step}] Batch {batch_num}/{plan['total']} failed for {len(failed_rows)}/{len(batch_rows)} rows, skipping. "
+              f"Error: {batch_error[:100] if batch_error else 'Unknown'}")
+        sys.stdout.flush()
+        return batch_items, {
+            "batch_num": batch_num,
+            "start_idx": start_idx,
+            "end_idx": end_idx,
+            "failed_ids": [str(r.get("id")) for r in failed_rows],
+            "error": batch_error
+        }
 
-    # 记录 step_complete
-    success_count = len(results)
-    failed_count = sum(fb["end_idx"] - fb["start_idx"] for fb in failed_batches)
+    def run_and_notify(i: int) -> Tuple[list, Optional[dict]]:
+        batch_items, failure = run_batch(i)
+        if batch_items and on_batch_complete is not None:
+            on_batch_complete(batch_items)
+        return batch_items, failure
+
+    outcomes: Dict[int, Tuple[list, Optional[dict]]] = {}
+    if concurrency <= 1:
+        i = next_batch()
+        while i is not None:
+            outcomes[i] = run_and_notify(i)
+            i = next_batch()
+            # 冷却期 (除了最后一个批次)
+            if i is not None and cooldown > 0:
+                time.sleep(cooldown)
+    else:
+        def worker() -> None:
+            i = next_batch()
+            while i is not None:
+                outcomes[i] = run_and_notify(i)
+                i = next_batch()
+
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=f"{step}-batch") as pool:
+            futures = [pool.submit(worker) for _ in range(concurrency)]
+            for future in as_completed(futures):
+                future.result()
+    total_batches = len(batch_spans)
+    if controller is not None:
+        try:
+            controller.save()
+        except OSError as e:
+            print(f"⚠️ [{step}] Could not persist adaptive batch size: {e}")
+
+    # 按输入顺序汇总
+    for i in range(total_batches):
+        batch_items, failure = outcomes[i]
+        results.extend(batch_items)
+        if failure is not None:
+            failed_batches.append(failure)
 
     # 记录 step_complete
     success_count = len(results)
-    failed_count = sum(fb["end_idx"] - fb["start_idx"] for fb in failed_batches)
+    failed_count = sum(len(fb["failed_ids"]) for fb in failed_batches)
 
     log_llm_progress(step, "step_complete", {
         "total_rows": len(rows),
         "success_count": success_count,
         "failed_count": failed_count,
-        "failed_batches": len(failed_batches)
+        "failed_batches": len(failed_batches),
+        "total_batches": total_batches,
+        "batch_size_final": controller.size if controller is not None else batch_size,
+        "batch_size_adjustments": controller.adjustments if controller is not None else []
     })
 
+    flush_events()
     if output_dir:
         try:
              path = os.path.join(output_dir, f"{step}_DONE")
@@ -1454,7 +2146,7 @@ def batch_llm_call(
                  f.write(f"Completed at {datetime.now().isoformat()}\n")
         except Exception: pass
 
-    # === 新增: 保存失败批次信息 ===
+    # === 保存失败批次信息 ===
     if failed_batches and save_partial:
         failed_report_path = f"reports/{step}_failed_batches.json"
         with open(failed_report_path, "w", encoding="utf-8") as f:
@@ -1490,7 +2182,8 @@ class EmbeddingClient:
     
     Features:
     - 单条/批量文本向量化
-    - 本地文件缓存 (避免重复调用)
+    - 本地缓存: cache_dir 下的单文件向量矩阵 + SQLite 索引 (embedding_store.py),
+      同一进程内所有 EmbeddingClient 共享一个 store, 批量查找一次完成
     - 余弦相似度计算
     
     Usage:
@@ -1514,21 +2207,16 @@ class EmbeddingClient:
         self.model = EMBEDDING_MODEL
         self.cache_dir = cache_dir
         
-        if cache_dir:
-            os.makedirs(cache_dir, exist_ok=True)
-        
         if not self.api_key:
             raise LLMError("config", "Missing API key for EmbeddingClient", retryable=False)
+        
+        self.store = get_embedding_store(cache_dir, EMBEDDING_DIMENSIONS) if cache_dir else None
     
     def _cache_key(self, text: str) -> str:
-        """生成缓存键 (MD5 hash of text + model)"""
+        """生成缓存键 (MD5 hash of text + model); 与旧版 <key>.npy 文件名一致, 可直接导入"""
         content = f"{text}_{self.model}"
         return hashlib.md5(content.encode('utf-8')).hexdigest()
     
-    def _get_cache_path(self, cache_key: str) -> str:
-        """获取缓存文件路径"""
-        return os.path.join(self.cache_dir, f"{cache_key}.npy")
-    
     def embed_single(self, text: str, use_cache: bool = True) -> np.ndarray:
         """
         单条文本向量化
@@ -1540,79 +2228,38 @@ class EmbeddingClient:
         Returns:
             np.ndarray: 向量 (shape: EMBEDDING_DIMENSIONS,)
         """
-        if not text or not text.strip():
-            return np.zeros(EMBEDDING_DIMENSIONS)
-        
-        # Check cache
-        if use_cache and self.cache_dir:
-            cache_key = self._cache_key(text)
-            cache_path = self._get_cache_path(cache_key)
-            if os.path.exists(cache_path):
-                return np.load(cache_path)
-        
-        # API call
-        url = f"{self.base_url}/embeddings"
-        headers = {
-            "Authorization": f"Bearer {self.api_key}",
-            "Content-Type": "application/json"
-        }
-        payload = {
-            "input": text,
-            "model": self.model
-        }
-        
-        try:
-            resp = requests.post(url, headers=headers, json=payload, timeout=30)
-            resp.raise_for_status()
-            data = resp.json()
-            embedding = np.array(data["data"][0]["embedding"])
-        except requests.RequestException as e:
-            raise LLMError("network", f"Embedding API error: {e}", retryable=True)
-        except (KeyError, IndexError) as e:
-            raise LLMError("parse", f"Embedding response parse error: {e}", retryable=False)
-        
-        # Save to cache
-        if use_cache and self.cache_dir:
-            np.save(cache_path, embedding)
-        
-        return embedding
+        return self.embed_batch([text], use_cache=use_cache)[0]
     
     def embed_batch(self, texts: list, use_cache: bool = True) -> np.ndarray:
         """
         批量文本向量化
         
+        缓存命中一次批量查出; 未命中的文本去重后一次请求 API 并追加写入 store。
+        
         Args:
             texts: 输入文本列表
             use_cache: 是否使用缓存 (默认 True)
             
         Returns:
-            np.ndarray: 向量矩阵 (shape: len(texts), EMBEDDING_DIMENSIONS)
+            np.ndarray: float32 向量矩阵 (shape: len(texts), EMBEDDING_DIMENSIONS); 空文本为零向量
         """
-        if not texts:
-            return np.array([]).reshape(0, EMBEDDING_DIMENSIONS)
-        
-        embeddings = []
-        texts_to_fetch = []
-        fetch_indices = []
-        
-        # Check cache for each text
-        for i, text in enumerate(texts):
-            if not text or not text.strip():
-                embeddings.append((i, np.zeros(EMBEDDING_DIMENSIONS)))
-                continue
-                
-            if use_cache and self.cache_dir:
-                cache_key = self._cache_key(text)
-                cache_path = self._get_cache_path(cache_key)
-                if os.path.exists(cache_path):
-                    embeddings.append((i, np.load(cache_path)))
-                    continue
-            
-            texts_to_fetch.append(text)
-            fetch_indices.append(i)
-        
-        # Batch API call for uncached texts
-        if texts_to_fetch:
+        result = np.zeros((len(texts), EMBEDDING_DIMENSIONS), dtype=np.float32)
+        indices = [i for i, text in enumerate(texts) if text and text.strip()]
+        if not indices:
+            return result
+        
+        keys = [self._cache_key(texts[i]) for i in indices]
+        found = np.zeros(len(indices), dtype=bool)
+        if use_cache and self.store is not None:
+            cached, found = self.store.get_many(keys)
+            result[indices] = cached
+        
+        # Batch API call for uncached texts (duplicates fetched once)
+        missing: Dict[str, List[int]] = {}
+        for n in np.flatnonzero(~found):
+            missing.setdefault(texts[indices[n]], []).append(indices[n])
+        if missing:
+            texts_to_fetch = list(missing)
             url = f"{self.base_url}/embeddings"
             headers = {
                 "Authorization": f"Bearer {self.api_key}",
@@ -1624,29 +2271,23 @@ class EmbeddingClient:
             }
             
             try:
-                resp = requests.post(url, headers=headers, json=payload, timeout=60)
+                resp = _http_post(url, headers=headers, payload=payload, timeout=60)
                 resp.raise_for_status()
                 data = resp.json()
-                
-                for j, item in enumerate(data["data"]):
-                    idx = fetch_indices[j]
-                    emb = np.array(item["embedding"])
-                    embeddings.append((idx, emb))
-                    
-                    # Save to cache
-                    if use_cache and self.cache_dir:
-                        cache_key = self._cache_key(texts_to_fetch[j])
-                        cache_path = self._get_cache_path(cache_key)
-                        np.save(cache_path, emb)
-                        
+                fetched = np.array([item["embedding"] for item in data["data"]], dtype=np.float32)
+                if fetched.shape != (len(texts_to_fetch), EMBEDDING_DIMENSIONS):
+                    raise IndexError(f"expected {len(texts_to_fetch)} embeddings, got shape {fetched.shape}")
             except requests.RequestException as e:
                 raise LLMError("network", f"Embedding batch API error: {e}", retryable=True)
-            except (KeyError, IndexError) as e:
+            except (KeyError, IndexError, TypeError, ValueError) as e:
                 raise LLMError("parse", f"Embedding batch response parse error: {e}", retryable=False)
+            
+            for j, text in enumerate(texts_to_fetch):
+                result[missing[text]] = fetched[j]
+            if use_cache and self.store is not None:
+                self.store.put_many([self._cache_key(text) for text in texts_to_fetch], fetched)
         
-        # Sort by original index and return
-        embeddings.sort(key=lambda x: x[0])
-        return np.array([e[1] for e in embeddings])
+        return result
     
     def cosine_similarity(self, vec_a: np.ndarray, vec_b: np.ndarray) -> float:
         """
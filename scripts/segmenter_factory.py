@@ -13,13 +13,169 @@ Planned backends:
   5. heuristic regex fallback
 
 The public API is intentionally tiny so extract_terms.py can stay thin.
+
+Segmentation results are memoized in a shared, bounded LRU keyed by
+(backend, domain_hint, text); normalize_guard's jieba.lcut goes through the
+same cache. jieba itself is imported on first use.
+
+Env:
+  SEGMENT_CACHE_SIZE   in-memory LRU bound (default 200000 entries, 0 disables)
+  SEGMENT_CACHE_PATH   optional pickle file: loaded on first use, saved at exit
 """
 
 from __future__ import annotations
 
+import atexit
+import os
+import pickle
 import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Iterable, List, Optional, Sequence
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+DEFAULT_CACHE_SIZE = 200000
+CACHE_FILE_VERSION = 1
+
+CacheKey = Tuple[str, str, str]
+
+
+class SegmentationCache:
+    """线程安全的分词结果 LRU, 可选磁盘持久层 (pickle)。"""
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_SIZE, path: Optional[str] = None):
+        self.max_entries = max(0, int(max_entries))
+        self.path = Path(path) if path else None
+        self.hits = 0
+        self.misses = 0
+        self.loaded_from_disk = 0
+        self._entries: "OrderedDict[CacheKey, Tuple[str, ...]]" = OrderedDict()
+        self._lock = threading.Lock()
+        if self.path is not None:
+            self.load()
+
+    def get_or_compute(self, key: CacheKey, compute: Callable[[], Sequence[str]]) -> List[str]:
+        if self.max_entries <= 0:
+            return list(compute())
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return list(cached)
+            self.misses += 1
+        words = tuple(compute())
+        with self._lock:
+            self._entries[key] = words
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return list(words)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._entries),
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+            "loaded_from_disk": self.loaded_from_disk,
+        }
+
+    def load(self) -> None:
+        if self.path is None or not self.path.exists():
+            return
+        try:
+            with open(self.path, "rb") as f:
+                payload = pickle.load(f)
+        except Exception:
+            return
+        if not isinstance(payload, dict) or payload.get("version") != CACHE_FILE_VERSION:
+            return
+        entries = payload.get("entries") or []
+        with self._lock:
+            for key, words in entries[-self.max_entries:] if self.max_entries else []:
+                self._entries[tuple(key)] = tuple(words)
+            self.loaded_from_disk = len(self._entries)
+
+    def save(self) -> None:
+        """原子写入 (临时文件 + rename); 只保存最近使用的 max_entries 条。"""
+        if self.path is None:
+            return
+        with self._lock:
+            entries = list(self._entries.items())
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(f".{self.path.name}.tmp-{os.getpid()}")
+        with open(tmp, "wb") as f:
+            pickle.dump({"version": CACHE_FILE_VERSION, "entries": entries}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, self.path)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+_cache: Optional[SegmentationCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_segmentation_cache() -> SegmentationCache:
+    """进程级共享缓存 (首次调用时按环境变量创建)。"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            try:
+                size = int(os.getenv("SEGMENT_CACHE_SIZE", str(DEFAULT_CACHE_SIZE)))
+            except ValueError:
+                size = DEFAULT_CACHE_SIZE
+            _cache = SegmentationCache(size, os.getenv("SEGMENT_CACHE_PATH", "").strip() or None)
+            if _cache.path is not None:
+                atexit.register(_cache.save)
+        return _cache
+
+
+def configure_segmentation_cache(max_entries: int = DEFAULT_CACHE_SIZE, path: Optional[str] = None) -> SegmentationCache:
+    """显式替换共享缓存 (CLI/测试用)。"""
+    global _cache
+    with _cache_lock:
+        _cache = SegmentationCache(max_entries, path)
+        if path:
+            atexit.register(_cache.save)
+        return _cache
+
+
+def segmentation_cache_stats() -> Dict[str, Any]:
+    return get_segmentation_cache().stats()
+
+
+_jieba_module = None
+_jieba_lock = threading.Lock()
+
+
+def load_jieba():
+    """延迟导入 jieba (导入约 150ms, 词典在首次切分时加载); 未安装时返回 None。"""
+    global _jieba_module
+    if _jieba_module is None:
+        with _jieba_lock:
+            if _jieba_module is None:
+                try:
+                    import jieba  # type: ignore
+
+                    _jieba_module = jieba
+                except Exception:
+                    _jieba_module = False
+    return _jieba_module or None
+
+
+def jieba_lcut(text: str) -> List[str]:
+    """带缓存的 jieba.lcut (保留原始切分, 含空白片段)。"""
+    jieba = load_jieba()
+    if jieba is None:
+        raise ImportError("jieba is required for Chinese segmentation. Install with: pip install jieba")
+    return get_segmentation_cache().get_or_compute(("jieba.lcut", "", text), lambda: jieba.lcut(text))
 
 
 class Segmenter:
@@ -51,12 +207,7 @@ class HeuristicSegmenter(Segmenter):
 class JiebaSegmenter(Segmenter):
     def __init__(self):
         super().__init__("jieba")
-        try:
-            import jieba  # type: ignore
-
-            self._jieba = jieba
-        except Exception:
-            self._jieba = None
+        self._jieba = load_jieba()
 
     def is_available(self) -> bool:
         return self._jieba is not None
@@ -218,20 +369,40 @@ def build_segmenter_chain(
     return out
 
 
-def segment_text(text: str, backend_request: Optional[str] = None, domain_hint: Optional[str] = None) -> List[str]:
-    """
-    根据回退链返回第一套成功分词结果（非空数组）。
-    """
-    for seg in build_segmenter_chain(backend_request, domain_hint=domain_hint):
+@lru_cache(maxsize=32)
+def _cached_chain(backend_request: str, domain_hint: str) -> Tuple[Segmenter, ...]:
+    # 后端实例 (及其可用性探测/模型加载) 每个进程只构建一次
+    return tuple(build_segmenter_chain(backend_request or None, domain_hint=domain_hint or None))
+
+
+def chain_names(backend_request: Optional[str] = None, domain_hint: Optional[str] = None) -> List[str]:
+    """回退链的后端名称 (复用缓存的链实例)。"""
+    return [seg.name for seg in _cached_chain((backend_request or "").strip().lower(), (domain_hint or "").strip().lower())]
+
+
+def _segment_uncached(text: str, backend_request: str, domain_hint: str) -> List[str]:
+    for seg in _cached_chain(backend_request, domain_hint):
         if not seg.is_available():
             continue
-        result = seg.segment(text, domain_hint=domain_hint)
+        result = seg.segment(text, domain_hint=domain_hint or None)
         if result:
             return result
     # 全部失败时返回启发式拆解（至少保证不崩）
     return HeuristicSegmenter().segment(text)
 
 
+def segment_text(text: str, backend_request: Optional[str] = None, domain_hint: Optional[str] = None) -> List[str]:
+    """
+    根据回退链返回第一套成功分词结果（非空数组）。结果经共享 LRU 缓存。
+    """
+    backend = (backend_request or "").strip().lower()
+    hint = (domain_hint or "").strip().lower()
+    return get_segmentation_cache().get_or_compute(
+        (backend, hint, text or ""),
+        lambda: _segment_uncached(text, backend, hint),
+    )
+
+
 def describe_chain() -> Dict[str, List[str]]:
     """辅助输出：当前可用引擎。"""
     backends = [PkusegSegmenter(), ThulacSegmenter(), LacSegmenter(), JiebaSegmenter(), HeuristicSegmenter()]
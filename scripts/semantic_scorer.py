@@ -84,11 +84,12 @@ class SemanticScorer:
         source_texts = [p.get('source_zh', '') or '' for p in pairs]
         target_texts = [p.get('target_ru', '') or '' for p in pairs]
         
-        # Batch embed
+        # Batch embed (one store lookup / API request for both sides)
         client = self._get_client()
         try:
-            source_embeddings = client.embed_batch(source_texts)
-            target_embeddings = client.embed_batch(target_texts)
+            embeddings = client.embed_batch(source_texts + target_texts)
+            source_embeddings = embeddings[:len(pairs)]
+            target_embeddings = embeddings[len(pairs):]
         except LLMError as e:
             print(f"[Error] Embedding failed: {e}")
             # Return error status for all
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+shard_coordinator.py
+
+Multi-process sharded translate_llm runs (replaces the hand-made split +
+scripts/merge_shards.py flow).
+
+  1. plan   - rows are assigned to shards by a stable hash (crc32) of string_id,
+              so a re-run with the same input and shard count gives the same
+              split; shard inputs and manifest.json live under --work-dir.
+  2. run    - one translate_llm.py process per shard, each with its own output
+              CSV and checkpoint, at most --workers at a time. The model's
+              concurrency / rpm / tpm budget from batch_runtime_v2.json is a
+              global budget: every worker gets LLM_DISPATCH_SHARE=1/workers of
+              it, and workers never exceed the global concurrency.
+  3. merge  - shard outputs are stitched back in the original input row order
+              and shard checkpoints are unioned into --checkpoint. The merge
+              refuses to write unless output rows == input rows.
+
+A shard is done when its checkpoint covers every shard row and its output has
+one row per input row. Re-running the same command skips done shards and
+resumes the others from their own checkpoints, so a dead shard never forces
+the healthy ones to run again.
+
+Usage:
+    python scripts/shard_coordinator.py --input data/tokenized.csv \\
+        --output data/translated.csv --shards 4 -- --target-lang ru-RU
+    python scripts/shard_coordinator.py ... --status
+    python scripts/shard_coordinator.py ... --merge-only
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import hashlib
+import io
+import json
+import os
+import subprocess
+import sys
+import time
+import zlib
+from collections import Counter, deque
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    from scripts.checkpoint_journal import (
+        CSV_ENCODING, atomic_write_text, journal_path_for, read_journal_ids, read_snapshot_ids, write_snapshot,
+    )
+except ImportError:
+    from checkpoint_journal import (
+        CSV_ENCODING, atomic_write_text, journal_path_for, read_journal_ids, read_snapshot_ids, write_snapshot,
+    )
+
+MANIFEST_VERSION = 1
+ID_FIELD = "string_id"
+DEFAULT_MODEL = "claude-haiku-4-5-20251001"
+TRANSLATE_SCRIPT = Path(__file__).resolve().parent / "translate_llm.py"
+POLL_INTERVAL_S = 0.2
+
+
+class ShardMergeError(RuntimeError):
+    """Shard outputs do not reproduce the input rows one-to-one."""
+
+
+def shard_of(string_id: str, shards: int) -> int:
+    """Stable across processes and Python versions (unlike hash())."""
+    return zlib.crc32(str(string_id).encode("utf-8")) % max(1, shards)
+
+
+def _file_sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_rows(path: Path) -> Tuple[List[str], List[Dict[str, str]]]:
+    with open(path, "r", encoding=CSV_ENCODING, newline="") as f:
+        reader = csv.DictReader(f)
+        rows = list(reader)
+        return list(reader.fieldnames or []), rows
+
+
+def _render_rows(fieldnames: Sequence[str], rows: Sequence[Dict[str, str]]) -> str:
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=list(fieldnames), extrasaction="ignore")
+    writer.writeheader()
+    writer.writerows(rows)
+    return buf.getvalue()
+
+
+def _row_id(row: Dict[str, str]) -> str:
+    return str(row.get(ID_FIELD) or "")
+
+
+# ---------------- plan ----------------
+
+def _manifest_path(work_dir: Path) -> Path:
+    return work_dir / "manifest.json"
+
+
+def save_manifest(work_dir: Path, manifest: Dict[str, Any]) -> None:
+    atomic_write_text(str(_manifest_path(work_dir)), json.dumps(manifest, indent=2, ensure_ascii=False))
+
+
+def load_manifest(work_dir: Path) -> Optional[Dict[str, Any]]:
+    try:
+        with open(_manifest_path(work_dir), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return manifest if manifest.get("version") == MANIFEST_VERSION else None
+
+
+def plan_shards(input_path: str, work_dir: str, shards: int) -> Dict[str, Any]:
+    """Split input by shard_of(string_id); reuse an existing plan for the same input + shard count."""
+    source = Path(input_path)
+    root = Path(work_dir)
+    fingerprint = _file_sha256(source)
+    existing = load_manifest(root)
+    if existing is not None:
+        if existing["input_sha256"] != fingerprint or existing["shard_count"] != shards:
+            raise SystemExit(
+                f"❌ {root} holds a plan for a different input or shard count; "
+                "use another --work-dir or remove it to re-plan."
+            )
+        return existing
+
+    fieldnames, rows = _read_rows(source)
+    if ID_FIELD not in fieldnames:
+        raise SystemExit(f"❌ Input has no {ID_FIELD} column: {source}")
+    buckets: List[List[Dict[str, str]]] = [[] for _ in range(shards)]
+    for row in rows:
+        buckets[shard_of(_row_id(row), shards)].append(row)
+
+    entries = []
+    for index, bucket in enumerate(buckets):
+        shard_dir = root / f"shard_{index:03d}"
+        shard_dir.mkdir(parents=True, exist_ok=True)
+        entry = {
+            "index": index,
+            "rows": len(bucket),
+            "input": f"shard_{index:03d}/input.csv",
+            "output": f"shard_{index:03d}/output.csv",
+            "checkpoint": f"shard_{index:03d}/checkpoint.json",
+            "log": f"shard_{index:03d}/worker.log",
+            "status": "pending",
+            "attempts": 0,
+            "last_returncode": None,
+        }
+        atomic_write_text(str(root / entry["input"]), _render_rows(fieldnames, bucket), encoding=CSV_ENCODING)
+        entries.append(entry)
+
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "input": str(source.resolve()),
+        "input_sha256": fingerprint,
+        "rows": len(rows),
+        "shard_count": shards,
+        "shards": entries,
+    }
+    save_manifest(root, manifest)
+    return manifest
+
+
+# ---------------- run ----------------
+
+def shard_status(work_dir: Path, shard: Dict[str, Any]) -> str:
+    """done | partial | pending, judged from the shard's files (not the exit code)."""
+    checkpoint = str(work_dir / shard["checkpoint"])
+    output = work_dir / shard["output"]
+    done_ids = read_snapshot_ids(checkpoint) | read_journal_ids(checkpoint)
+    if not done_ids and not output.exists():
+        return "pending"
+    if journal_path_for(checkpoint).exists() or not output.exists():
+        return "partial"
+    _, expected = _read_rows(work_dir / shard["input"])
+    if not {_row_id(r) for r in expected} <= done_ids:
+        return "partial"
+    _, produced = _read_rows(output)
+    return "done" if len(produced) == len(expected) else "partial"
+
+
+def global_concurrency(model: str) -> int:
+    """Model concurrency from batch_runtime_v2.json, ignoring any share applied to this process."""
+    try:
+        try:
+            from scripts.runtime_adapter import BatchConfig
+        except ImportError:
+            from runtime_adapter import BatchConfig
+        config = BatchConfig()
+        return max(1, int(config.models.get(model, {}).get(
+            "max_concurrency", config.defaults.get("max_concurrency", 1)) or 1))
+    except Exception:
+        return 0
+
+
+def run_shards(
+    work_dir: str,
+    manifest: Dict[str, Any],
+    worker_args: Sequence[str],
+    workers: int,
+    retries: int = 0,
+    worker_script: Optional[str] = None,
+    python: Optional[str] = None,
+) -> Dict[int, str]:
+    """Run every shard that is not done; returns index -> final status."""
+    root = Path(work_dir)
+    by_index = {s["index"]: s for s in manifest["shards"]}
+    statuses = {idx: shard_status(root, s) for idx, s in by_index.items()}
+    todo = deque(idx for idx, status in sorted(statuses.items()) if status != "done" and by_index[idx]["rows"])
+    for idx, shard in by_index.items():
+        if not shard["rows"]:
+            statuses[idx] = "done"
+        shard["status"] = statuses[idx]
+    if not todo:
+        save_manifest(root, manifest)
+        return statuses
+
+    parallel = max(1, min(workers, len(todo)))
+    env = dict(os.environ)
+    # 全局预算按并行 worker 数静态切分 (BatchConfig 读取 LLM_DISPATCH_SHARE)
+    env["LLM_DISPATCH_SHARE"] = f"{1.0 / parallel:.6g}"
+    command = [python or sys.executable, str(worker_script or TRANSLATE_SCRIPT)]
+    print(f"🚦 Running {len(todo)} shard(s), {parallel} at a time (budget share {env['LLM_DISPATCH_SHARE']})")
+
+    running: Dict[int, Tuple[subprocess.Popen, Any]] = {}
+    while todo or running:
+        while todo and len(running) < parallel:
+            idx = todo.popleft()
+            shard = by_index[idx]
+            shard["attempts"] += 1
+            shard["status"] = "running"
+            log = open(root / shard["log"], "a", encoding="utf-8")
+            log.write(f"\n===== attempt {shard['attempts']} {time.strftime('%Y-%m-%dT%H:%M:%S')} =====\n")
+            log.flush()
+            argv = command + [
+                "--input", str(root / shard["input"]),
+                "--output", str(root / shard["output"]),
+                "--checkpoint", str(root / shard["checkpoint"]),
+                *worker_args,
+            ]
+            running[idx] = (subprocess.Popen(argv, stdout=log, stderr=subprocess.STDOUT, env=env), log)
+            save_manifest(root, manifest)
+
+        time.sleep(POLL_INTERVAL_S)
+        for idx in [i for i, (proc, _) in running.items() if proc.poll() is not None]:
+            proc, log = running.pop(idx)
+            log.close()
+            shard = by_index[idx]
+            shard["last_returncode"] = proc.returncode
+            status = shard_status(root, shard)
+            if status != "done" and shard["attempts"] <= retries:
+                print(f"⚠️ Shard {idx} ended {status} (rc={proc.returncode}); retrying from its checkpoint")
+                todo.append(idx)
+                status = "pending"
+            elif status != "done":
+                print(f"❌ Shard {idx} ended {status} (rc={proc.returncode}); see {root / shard['log']}")
+            else:
+                print(f"✅ Shard {idx} done ({shard['rows']} rows)")
+            shard["status"] = statuses[idx] = status
+            save_manifest(root, manifest)
+    return statuses
+
+
+# ---------------- merge ----------------
+
+def merge_shards(work_dir: str, manifest: Dict[str, Any], output: str, checkpoint: str) -> Dict[str, int]:
+    """Write shard outputs in the original input order plus the unioned checkpoint."""
+    root = Path(work_dir)
+    fieldnames: List[str] = []
+    by_id: Dict[str, deque] = {}
+    done_ids: set = set()
+    for shard in manifest["shards"]:
+        shard_output = root / shard["output"]
+        if shard["rows"] and not shard_output.exists():
+            raise ShardMergeError(f"shard {shard['index']} has no output: {shard_output}")
+        if shard_output.exists():
+            names, rows = _read_rows(shard_output)
+            fieldnames.extend(n for n in names if n not in fieldnames)
+            for row in rows:
+                by_id.setdefault(_row_id(row), deque()).append(row)
+        done_ids |= read_snapshot_ids(str(root / shard["checkpoint"]))
+
+    _, input_rows = _read_rows(Path(manifest["input"]))
+    merged: List[Dict[str, str]] = []
+    missing: List[str] = []
+    for row in input_rows:
+        queue = by_id.get(_row_id(row))
+        if queue:
+            merged.append(queue.popleft())
+        else:
+            missing.append(_row_id(row))
+    extra = sum(len(q) for q in by_id.values())
+    if missing or extra or len(merged) != len(input_rows):
+        sample = ", ".join(missing[:5])
+        raise ShardMergeError(
+            f"input rows={len(input_rows)} merged={len(merged)} missing={len(missing)} extra={extra}"
+            + (f" (e.g. {sample})" if sample else "")
+        )
+
+    atomic_write_text(output, _render_rows(fieldnames, merged), encoding=CSV_ENCODING)
+    write_snapshot(checkpoint, done_ids)
+    return {"rows": len(merged), "done_ids": len(done_ids)}
+
+
+# ---------------- CLI ----------------
+
+def _print_status(work_dir: Path, manifest: Dict[str, Any]) -> None:
+    counts = Counter()
+    for shard in manifest["shards"]:
+        status = shard_status(work_dir, shard)
+        counts[status] += 1
+        print(f"   shard {shard['index']:3d}: {status:8s} rows={shard['rows']:6d} "
+              f"attempts={shard['attempts']} rc={shard['last_returncode']}")
+    print(f"   {dict(counts)}")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    argv = list(sys.argv[1:] if argv is None else argv)
+    worker_args: List[str] = []
+    if "--" in argv:
+        split = argv.index("--")
+        argv, worker_args = argv[:split], argv[split + 1:]
+
+    ap = argparse.ArgumentParser(description="Sharded translate_llm runs with a shared rate budget")
+    ap.add_argument("--input", required=True)
+    ap.add_argument("--output", required=True)
+    ap.add_argument("--checkpoint", default="data/translate_checkpoint.json",
+                    help="Merged checkpoint (union of shard checkpoints)")
+    ap.add_argument("--shards", type=int, default=4)
+    ap.add_argument("--workers", type=int, default=0,
+                    help="Concurrent worker processes (0 = shards); capped by the model's max_concurrency")
+    ap.add_argument("--work-dir", default="", help="Shard files + manifest (default: <output>.shards/)")
+    ap.add_argument("--model", default=DEFAULT_MODEL, help="Passed to translate_llm and used for the budget")
+    ap.add_argument("--retries", type=int, default=0, help="Automatic re-runs of a failed shard in this invocation")
+    ap.add_argument("--worker-script", default=str(TRANSLATE_SCRIPT))
+    ap.add_argument("--status", action="store_true", help="Print shard status and exit")
+    ap.add_argument("--merge-only", action="store_true", help="Merge finished shards without launching workers")
+    args = ap.parse_args(argv)
+
+    shards = max(1, args.shards)
+    work_dir = Path(args.work_dir or f"{args.output}.shards")
+    manifest = plan_shards(args.input, str(work_dir), shards)
+    if args.status:
+        _print_status(work_dir, manifest)
+        return 0
+
+    if not args.merge_only:
+        workers = args.workers or shards
+        ceiling = global_concurrency(args.model)
+        if ceiling:
+            workers = min(workers, ceiling)
+        statuses = run_shards(
+            str(work_dir), manifest, ["--model", args.model, *worker_args], workers,
+            retries=args.retries, worker_script=args.worker_script,
+        )
+        unfinished = sorted(idx for idx, status in statuses.items() if status != "done")
+        if unfinished:
+            print(f"❌ Shards not finished: {unfinished}. Re-run the same command to resume them.")
+            return 1
+
+    try:
+        stats = merge_shards(str(work_dir), manifest, args.output, args.checkpoint)
+    except ShardMergeError as e:
+        print(f"❌ Merge refused: {e}")
+        return 1
+    print(f"✅ Merged {stats['rows']} rows from {shards} shard(s) -> {args.output}")
+    print(f"   Checkpoint: {args.checkpoint} ({stats['done_ids']} ids)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
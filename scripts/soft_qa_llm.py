@@ -46,7 +46,9 @@ from runtime_adapter import (
     BatchConfig,
     get_batch_config,
     batch_llm_call,
+    disable_response_cache,
     log_llm_progress,
+    SystemPrompt,
 )
 from batch_utils import BatchConfig as SplitBatchConfig, split_into_batches
 
@@ -63,6 +65,7 @@ except Exception:
     HAS_SEMANTIC = False
 
 from translate_llm import GlossaryEntry, build_glossary_preferences, is_ui_art_row, load_glossary
+from glossary_matcher import get_glossary_matcher
 from style_governance_runtime import evaluate_runtime_governance, format_runtime_governance_issues
 
 TOKEN_RE = re.compile(r"⟦(PH_\d+|TAG_\d+)⟧")
@@ -356,7 +359,8 @@ def build_style_contract_block(profile: dict) -> str:
 
 
 def build_system_batch(style: str, glossary_summary: str, style_profile: Optional[dict] = None) -> str:
-    return (
+    # 整段都是批次无关的静态内容，整体标记为可缓存前缀
+    return SystemPrompt(
         "你是手游本地化软质检（zh-CN → ru-RU）。\n\n"
         "任务：分析翻译质量，仅列出有问题的项。\n\n"
         "检查维度（只报问题，不要夸）：\n"
@@ -461,6 +465,12 @@ def preflight_tasks(rows: List[Dict[str, str]], style_profile: dict, glossary_en
     preferred_map = {str(p.get("term_zh", "")).strip(): str(p.get("term_ru", "")).strip() for p in preferred if isinstance(p, dict)}
 
     glossary_map, compact_map, avoid_long_forms = build_glossary_preferences(glossary_entries)
+    # 每个词表编译一次自动机，逐行单遍扫描
+    blocked_matcher = get_glossary_matcher(sorted(blocked_terms))
+    alias_matcher = get_glossary_matcher(sorted(prohibited_aliases))
+    compact_matcher = get_glossary_matcher(compact_map)
+    glossary_matcher = get_glossary_matcher(glossary_map)
+    preferred_matcher = get_glossary_matcher(preferred_map)
 
     for r in rows:
         sid = str(r.get("string_id") or r.get("id") or "")
@@ -633,46 +643,45 @@ def preflight_tasks(rows: List[Dict[str, str]], style_profile: dict, glossary_en
                 })
                 seen.add(key)
 
-        for t in blocked_terms:
-            if t and t in tgt:
-                key = (sid, "blocked_term")
-                if key not in seen:
-                    tasks.append({
-                        "string_id": sid,
-                        "type": "style_contract",
-                        "severity": "major",
-                        "note": f"blocked term {t}",
-                        "problem": "命中禁译项",
-                        "suggestion": RULE_CATALOG["D-SQA-003"]["suggestion"],
-                        "suggested_fix": tgt,
-                        "rule_id": "D-SQA-003",
-                        "rule_version": RULE_VERSION,
-                        "remediation": RULE_CATALOG["D-SQA-003"]["suggestion"],
-                    })
-                    seen.add(key)
+        for t in blocked_matcher.find_all(tgt):
+            key = (sid, "blocked_term")
+            if key not in seen:
+                tasks.append({
+                    "string_id": sid,
+                    "type": "style_contract",
+                    "severity": "major",
+                    "note": f"blocked term {t}",
+                    "problem": "命中禁译项",
+                    "suggestion": RULE_CATALOG["D-SQA-003"]["suggestion"],
+                    "suggested_fix": tgt,
+                    "rule_id": "D-SQA-003",
+                    "rule_version": RULE_VERSION,
+                    "remediation": RULE_CATALOG["D-SQA-003"]["suggestion"],
+                })
+                seen.add(key)
 
-        for alias in prohibited_aliases:
-            if alias and alias in tgt:
-                key = (sid, "prohibited_alias")
-                if key not in seen:
-                    tasks.append({
-                        "string_id": sid,
-                        "type": "style_contract",
-                        "severity": "major",
-                        "note": f"prohibited alias {alias}",
-                        "problem": "命中禁用别名",
-                        "suggestion": RULE_CATALOG["D-SQA-003"]["suggestion"],
-                        "suggested_fix": tgt,
-                        "rule_id": "D-SQA-003",
-                        "rule_version": RULE_VERSION,
-                        "remediation": RULE_CATALOG["D-SQA-003"]["suggestion"],
-                    })
-                    seen.add(key)
+        for alias in alias_matcher.find_all(tgt):
+            key = (sid, "prohibited_alias")
+            if key not in seen:
+                tasks.append({
+                    "string_id": sid,
+                    "type": "style_contract",
+                    "severity": "major",
+                    "note": f"prohibited alias {alias}",
+                    "problem": "命中禁用别名",
+                    "suggestion": RULE_CATALOG["D-SQA-003"]["suggestion"],
+                    "suggested_fix": tgt,
+                    "rule_id": "D-SQA-003",
+                    "rule_version": RULE_VERSION,
+                    "remediation": RULE_CATALOG["D-SQA-003"]["suggestion"],
+                })
+                seen.add(key)
 
         if is_ui_art_row(r):
             category = str(r.get("ui_art_category") or "other_review")
-            for zh, ru in compact_map.items():
-                if zh not in src or not ru:
+            for zh in compact_matcher.find_all(src):
+                ru = compact_map[zh]
+                if not ru:
                     continue
                 long_forms = avoid_long_forms.get(zh, [])
                 long_form_hit = any(term and term in tgt for term in long_forms)
@@ -696,8 +705,9 @@ def preflight_tasks(rows: List[Dict[str, str]], style_profile: dict, glossary_en
                     })
                     seen.add(key)
 
-        for zh, ru in glossary_map.items():
-            if zh in src and ru and ru not in tgt:
+        for zh in glossary_matcher.find_all(src):
+            ru = glossary_map[zh]
+            if ru and ru not in tgt:
                 if is_ui_art_row(r) and zh in compact_map:
                     continue
                 if (sid, "term") not in seen:
@@ -715,10 +725,11 @@ def preflight_tasks(rows: List[Dict[str, str]], style_profile: dict, glossary_en
                     })
                     seen.add((sid, "term"))
 
-        for zh, ru in preferred_map.items():
+        for zh in preferred_matcher.find_all(src):
+            ru = preferred_map[zh]
             if is_ui_art_row(r) and zh in compact_map:
                 continue
-            if zh and ru and zh in src and ru not in tgt and (sid, "style_pref") not in seen:
+            if ru and ru not in tgt and (sid, "style_pref") not in seen:
                 tasks.append({
                     "string_id": sid,
                     "type": "style_contract",
@@ -853,7 +864,10 @@ def main():
     ap.add_argument("--enable-semantic", action="store_true")
     ap.add_argument("--rag-top-k", type=int, default=15)
     ap.add_argument("--resume", action="store_true")
+    ap.add_argument("--no-llm-cache", action="store_true", help="Bypass the LLM response cache (LLM_CACHE_PATH)")
     args = ap.parse_args()
+    if args.no_llm_cache:
+        disable_response_cache()
 
     input_path = args.input or args.translated_csv
     if not input_path:
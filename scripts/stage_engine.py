@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+stage_engine.py
+
+Stage runner used by run_smoke_pipeline.
+
+Two modes:
+  inprocess   import scripts/<stage>.py once and call its main() with a patched
+              sys.argv / os.environ; stdout+stderr stream into the stage log.
+              Interpreter start-up and module imports (pandas, yaml, jieba,
+              runtime_adapter ...) are paid once per pipeline run instead of
+              once per stage, and module-level caches survive between stages.
+              os.environ and the --no-llm-cache override are snapshotted and
+              restored around each stage, so a stage's env changes do not
+              leak into the next one (as they would not across subprocesses).
+  subprocess  the original behaviour: one `sys.executable` child per stage.
+              Output streams to files instead of being captured in memory.
+
+Commands that are not `[sys.executable, <scripts/X.py>, ...]` for an
+allowlisted stage, or whose module fails to import, always run as a
+subprocess. Every run is recorded with duration and peak RSS (in-process:
+the pipeline's VmHWM reset at stage start; subprocess: the child's maxrss).
+"""
+
+from __future__ import annotations
+
+import contextlib
+import importlib
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import traceback
+from collections import deque
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    from scripts.event_sink import flush_events
+except ImportError:
+    from event_sink import flush_events
+
+try:
+    from scripts.llm_cache import disable_response_cache, response_cache_disabled
+except ImportError:
+    from llm_cache import disable_response_cache, response_cache_disabled
+
+SCRIPTS_DIR = Path(__file__).resolve().parent
+
+ENGINE_MODES = ("inprocess", "subprocess")
+DEFAULT_ENGINE_MODE = "inprocess"
+OUTPUT_TAIL_CHARS = 4000
+
+# stage module -> whether main()'s return value is the exit code
+# (mirrors each script's `if __name__ == "__main__":` block)
+INPROCESS_STAGES: Dict[str, bool] = {
+    "llm_ping": True,
+    "soft_qa_llm": True,
+    "normalize_guard": False,
+    "translate_llm": False,
+    "qa_hard": False,
+    "repair_loop": False,
+    "rehydrate_export": False,
+    "metrics_aggregator": False,
+    "smoke_verify": False,
+    "style_guide_bootstrap": False,
+}
+
+
+def _exit_code(value: Any) -> int:
+    """Same mapping the interpreter applies to sys.exit(value)."""
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, int):
+        return value
+    print(value, file=sys.stderr)
+    return 1
+
+
+def _reset_peak_rss() -> bool:
+    """Reset VmHWM for this process (Linux); False when unsupported."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _read_peak_rss_mb() -> Optional[float]:
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024.0, 1)
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:  # pragma: no cover - Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return round(peak / (1024.0 * 1024.0 if sys.platform == "darwin" else 1024.0), 1)
+
+
+class _TailWriter:
+    """File-like sink: writes through to `target`, keeps only the last chars."""
+
+    def __init__(self, target, limit: int = OUTPUT_TAIL_CHARS):
+        self._target = target
+        self._tail: deque = deque()
+        self._tail_len = 0
+        self._limit = limit
+
+    def write(self, text: str) -> int:
+        if not text:
+            return 0
+        self._target.write(text)
+        self._tail.append(text)
+        self._tail_len += len(text)
+        while self._tail_len - len(self._tail[0]) >= self._limit:
+            self._tail_len -= len(self._tail.popleft())
+        return len(text)
+
+    def flush(self) -> None:
+        self._target.flush()
+
+    def isatty(self) -> bool:
+        return False
+
+    @property
+    def encoding(self) -> str:
+        return "utf-8"
+
+    def tail(self) -> str:
+        return "".join(self._tail)[-self._limit:]
+
+
+@contextlib.contextmanager
+def _isolated_environ(env: Optional[Dict[str, str]]):
+    """Apply env for one in-process stage, then restore os.environ and the response-cache override as a whole."""
+    saved = dict(os.environ)
+    cache_disabled = response_cache_disabled()
+    if env:
+        os.environ.update({key: str(value) for key, value in env.items()})
+    try:
+        yield
+    finally:
+        for key in [key for key in os.environ if key not in saved]:
+            os.environ.pop(key, None)
+        for key, value in saved.items():
+            if os.environ.get(key) != value:
+                os.environ[key] = value
+        disable_response_cache(cache_disabled)
+
+
+class StageEngine:
+    """Run pipeline stage commands and keep a timing/memory record per run."""
+
+    def __init__(self, mode: str = DEFAULT_ENGINE_MODE, records: Optional[List[Dict[str, Any]]] = None):
+        if mode not in ENGINE_MODES:
+            raise ValueError(f"unknown stage engine mode: {mode}")
+        self.mode = mode
+        self.records: List[Dict[str, Any]] = records if records is not None else []
+        self._modules: Dict[str, Any] = {}
+
+    def record_for_log(self, log_path: Any) -> Optional[Dict[str, Any]]:
+        key = str(log_path)
+        for record in reversed(self.records):
+            if record.get("log") == key:
+                return record
+        return None
+
+    def _resolve_stage(self, cmd: List[str]):
+        """Return (module, returns_code) when cmd can run in-process, else None."""
+        if self.mode != "inprocess" or len(cmd) < 2 or cmd[0] != sys.executable:
+            return None
+        script = Path(cmd[1])
+        stem = script.stem
+        if script.suffix != ".py" or stem not in INPROCESS_STAGES:
+            return None
+        if script.resolve().parent != SCRIPTS_DIR:
+            return None
+        module = self._modules.get(stem)
+        if module is None:
+            if str(SCRIPTS_DIR) not in sys.path:
+                sys.path.insert(0, str(SCRIPTS_DIR))
+            try:
+                module = importlib.import_module(stem)
+            except Exception:
+                return None
+            if not callable(getattr(module, "main", None)):
+                return None
+            self._modules[stem] = module
+        return module, INPROCESS_STAGES[stem]
+
+    def run(self, cmd: List[str], log_path: Path, env: Optional[Dict[str, str]] = None) -> subprocess.CompletedProcess:
+        cmd = [str(part) for part in cmd]
+        log_path = Path(log_path)
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        t0 = time.perf_counter()
+        stage = self._resolve_stage(cmd)
+        mode = "inprocess" if stage else "subprocess"
+        with open(log_path, "w", encoding="utf-8") as f:
+            f.write(f"command: {cmd}\n")
+            f.write(f"started: {datetime.now(timezone.utc).isoformat()}\n")
+            f.write(f"engine: {mode}\n\n")
+
+        if stage:
+            result, peak_rss_mb = self._run_inprocess(stage[0], stage[1], cmd, log_path, env)
+        else:
+            result, peak_rss_mb = self._run_subprocess(cmd, log_path, env)
+        duration_ms = int((time.perf_counter() - t0) * 1000)
+
+        with open(log_path, "a", encoding="utf-8") as f:
+            f.write(f"\nreturncode: {result.returncode}\n")
+            f.write(f"duration_ms: {duration_ms}\n")
+            f.write(f"peak_rss_mb: {peak_rss_mb}\n")
+        self.records.append({
+            "script": Path(cmd[1]).name if len(cmd) > 1 else cmd[0],
+            "mode": mode,
+            "returncode": result.returncode,
+            "duration_ms": duration_ms,
+            "peak_rss_mb": peak_rss_mb,
+            "log": str(log_path),
+        })
+        return result
+
+    def _run_inprocess(self, module, returns_code: bool, cmd, log_path: Path, env):
+        saved_argv = sys.argv
+        _reset_peak_rss()
+        with open(log_path, "a", encoding="utf-8") as log, tempfile.TemporaryFile("w+", encoding="utf-8") as err_file:
+            log.write("---- STDOUT ----\n")
+            out = _TailWriter(log)
+            err = _TailWriter(err_file)
+            code = 0
+            sys.argv = [cmd[1], *cmd[2:]]
+            try:
+                with _isolated_environ(env), contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+                    try:
+                        value = module.main()
+                        code = _exit_code(value) if returns_code else 0
+                    except SystemExit as exc:
+                        code = _exit_code(exc.code)
+                    except Exception:
+                        traceback.print_exc()
+                        code = 1
+            finally:
+                sys.argv = saved_argv
+                # later stages (metrics_aggregator ...) read this stage's trace/progress files
+                flush_events()
+            log.write("\n---- STDERR ----\n")
+            err_file.seek(0)
+            for chunk in iter(lambda: err_file.read(65536), ""):
+                log.write(chunk)
+        peak = _read_peak_rss_mb()
+        return subprocess.CompletedProcess(cmd, code, out.tail(), err.tail()), peak
+
+    def _run_subprocess(self, cmd, log_path: Path, env):
+        run_env = dict(os.environ)
+        if env:
+            run_env.update(env)
+        with open(log_path, "ab") as log, tempfile.TemporaryFile() as err_file:
+            log.write(b"---- STDOUT ----\n")
+            log.flush()
+            stdout_start = log.tell()
+            proc = subprocess.Popen(cmd, stdout=log, stderr=err_file, env=run_env)
+            peak_rss_mb = None
+            if hasattr(os, "wait4"):
+                _, status, usage = os.wait4(proc.pid, 0)
+                proc.returncode = os.waitstatus_to_exitcode(status)
+                peak_rss_mb = round(usage.ru_maxrss / 1024.0, 1)
+            else:  # pragma: no cover - Windows
+                proc.wait()
+            stdout_end = log.tell()
+            log.write(b"\n---- STDERR ----\n")
+            err_file.seek(0)
+            for chunk in iter(lambda: err_file.read(65536), b""):
+                log.write(chunk)
+            err_file.seek(0, os.SEEK_END)
+            err_size = err_file.tell()
+            err_file.seek(max(0, err_size - OUTPUT_TAIL_CHARS * 4))
+            stderr_tail = err_file.read().decode("utf-8", errors="replace")[-OUTPUT_TAIL_CHARS:]
+        with open(log_path, "rb") as f:
+            f.seek(max(stdout_start, stdout_end - OUTPUT_TAIL_CHARS * 4))
+            stdout_tail = f.read(stdout_end - f.tell()).decode("utf-8", errors="replace")[-OUTPUT_TAIL_CHARS:]
+        return subprocess.CompletedProcess(cmd, proc.returncode, stdout_tail, stderr_tail), peak_rss_mb
@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+token_estimator.py
+
+Offline token estimation for batch planning, cost fallbacks and the metrics
+report, replacing the `len(text) // 4` heuristics.
+
+Text is split into script classes (cjk, cyrillic, latin, other) and each
+class carries a tokens-per-char weight per model family (claude, gpt,
+default). zh-CN source costs roughly one token per character while ru-RU
+and English cost a fraction of that, which chars/4 cannot express.
+
+Weights start from built-in defaults and are calibrated from real `usage`
+numbers in llm_trace.jsonl: runtime_adapter records the per-script character
+counts of every request/response (req_script_chars / resp_script_chars), and
+
+    python scripts/token_estimator.py --trace data/llm_trace.jsonl
+
+fits the weights per family (ridge regression towards the defaults) and
+writes them to TOKEN_CALIBRATION_PATH (default data/token_calibration.json).
+
+Script counts are cached per string. Estimators are pluggable:
+TOKEN_ESTIMATOR=calibrated (default) | chars4 (legacy heuristic) | any name
+added with register_estimator().
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import threading
+from datetime import datetime
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+SCRIPTS = ("cjk", "cyrillic", "latin", "other")
+CALIBRATION_VERSION = 1
+DEFAULT_CALIBRATION_PATH = "data/token_calibration.json"
+COUNT_CACHE_SIZE = 16384
+
+# tokens per character; starting points until a calibration file exists
+DEFAULT_WEIGHTS: Dict[str, Dict[str, float]] = {
+    "claude": {"cjk": 1.1, "cyrillic": 0.4, "latin": 0.27, "other": 0.4},
+    "gpt": {"cjk": 0.8, "cyrillic": 0.3, "latin": 0.25, "other": 0.35},
+    "default": {"cjk": 1.0, "cyrillic": 0.35, "latin": 0.25, "other": 0.4},
+}
+
+_CJK_RE = re.compile("[\u3000-\u303f\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]")
+_CYRILLIC_RE = re.compile("[\u0400-\u04ff]")
+_LATIN_RE = re.compile("[A-Za-z\u00c0-\u024f]")
+
+
+def model_family(model: Optional[str]) -> str:
+    name = str(model or "").lower()
+    if "claude" in name:
+        return "claude"
+    if name.startswith(("gpt", "o1", "o3", "o4", "chatgpt")):
+        return "gpt"
+    return "default"
+
+
+@lru_cache(maxsize=COUNT_CACHE_SIZE)
+def script_counts(text: str) -> Tuple[int, int, int, int]:
+    """(cjk, cyrillic, latin, other) character counts; cached per string."""
+    if not text:
+        return 0, 0, 0, 0
+    total = len(text)
+    cjk = total - len(_CJK_RE.sub("", text))
+    cyrillic = total - len(_CYRILLIC_RE.sub("", text))
+    latin = total - len(_LATIN_RE.sub("", text))
+    return cjk, cyrillic, latin, total - cjk - cyrillic - latin
+
+
+def script_counts_dict(text: str) -> Dict[str, int]:
+    return dict(zip(SCRIPTS, script_counts(text or "")))
+
+
+class Chars4Estimator:
+    """Legacy heuristic: ~4 characters per token regardless of script."""
+
+    name = "chars4"
+
+    def estimate(self, text: str, model: Optional[str] = None) -> int:
+        return len(text or "") // 4
+
+    def estimate_counts(self, counts: Dict[str, int], model: Optional[str] = None) -> int:
+        return math.ceil(sum(int(counts.get(s) or 0) for s in SCRIPTS) / 4)
+
+
+class CalibratedEstimator:
+    """Per-family, per-script tokens-per-char weights (see module docstring)."""
+
+    name = "calibrated"
+
+    def __init__(self, weights: Optional[Dict[str, Dict[str, float]]] = None):
+        self.weights = {family: dict(values) for family, values in DEFAULT_WEIGHTS.items()}
+        for family, values in (weights or {}).items():
+            self.weights.setdefault(family, dict(DEFAULT_WEIGHTS["default"])).update(
+                {s: float(values[s]) for s in SCRIPTS if s in values}
+            )
+
+    @classmethod
+    def from_file(cls, path: Optional[str]) -> "CalibratedEstimator":
+        families: Dict[str, Dict[str, float]] = {}
+        if path:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    payload = json.load(f)
+                if payload.get("version") == CALIBRATION_VERSION:
+                    families = {k: v.get("weights", {}) for k, v in (payload.get("families") or {}).items()}
+            except (OSError, ValueError, AttributeError):
+                families = {}
+        return cls(families)
+
+    def _weights(self, model: Optional[str]) -> Dict[str, float]:
+        return self.weights.get(model_family(model)) or self.weights["default"]
+
+    def estimate(self, text: str, model: Optional[str] = None) -> int:
+        if not text:
+            return 0
+        weights = self._weights(model)
+        return math.ceil(sum(weights[s] * n for s, n in zip(SCRIPTS, script_counts(text))))
+
+    def estimate_counts(self, counts: Dict[str, int], model: Optional[str] = None) -> int:
+        weights = self._weights(model)
+        return math.ceil(sum(weights[s] * int(counts.get(s) or 0) for s in SCRIPTS))
+
+
+# Imported both as `token_estimator` and `scripts.token_estimator`: the copy
+# loaded second reuses the registry of the first, so register_estimator() is
+# visible to every caller whichever path it imported.
+_twin = sys.modules.get("scripts.token_estimator" if __name__ == "token_estimator" else "token_estimator")
+if _twin is not None and hasattr(_twin, "_instances_lock"):
+    _ESTIMATORS: Dict[str, Callable[[Optional[str]], Any]] = _twin._ESTIMATORS
+    _instances: Dict[Tuple[str, str], Any] = _twin._instances
+    _instances_lock = _twin._instances_lock
+else:
+    _ESTIMATORS = {
+        "calibrated": CalibratedEstimator.from_file,
+        "chars4": lambda _path: Chars4Estimator(),
+    }
+    _instances = {}
+    _instances_lock = threading.Lock()
+
+
+def register_estimator(name: str, factory: Callable[[Optional[str]], Any]) -> None:
+    """factory(calibration_path) -> object with estimate(text, model) / estimate_counts(counts, model)."""
+    with _instances_lock:
+        _ESTIMATORS[name] = factory
+        for key in [k for k in _instances if k[0] == name]:
+            _instances.pop(key)
+
+
+def calibration_path() -> str:
+    return os.getenv("TOKEN_CALIBRATION_PATH", DEFAULT_CALIBRATION_PATH).strip()
+
+
+def get_token_estimator():
+    """Estimator selected by TOKEN_ESTIMATOR, built once per (name, calibration file)."""
+    name = os.getenv("TOKEN_ESTIMATOR", "calibrated").strip().lower() or "calibrated"
+    if name not in _ESTIMATORS:
+        name = "calibrated"
+    path = calibration_path()
+    key = (name, os.path.abspath(path) if path else "")
+    estimator = _instances.get(key)
+    if estimator is None:
+        with _instances_lock:
+            estimator = _instances.get(key)
+            if estimator is None:
+                estimator = _ESTIMATORS[name](path or None)
+                _instances[key] = estimator
+    return estimator
+
+
+def reset_token_estimator() -> None:
+    """Drop built estimators so the next call re-reads env and calibration file."""
+    with _instances_lock:
+        _instances.clear()
+
+
+def estimate_tokens(text: str, model: Optional[str] = None) -> int:
+    return get_token_estimator().estimate(text or "", model)
+
+
+def estimate_tokens_from_counts(counts: Dict[str, int], model: Optional[str] = None) -> int:
+    return get_token_estimator().estimate_counts(counts or {}, model)
+
+
+# ---------------- calibration ----------------
+
+def _samples_from_trace(events: Iterable[Dict[str, Any]]) -> Dict[str, List[Tuple[List[int], int]]]:
+    """family -> [(script counts, real tokens)] from llm_call events with API usage."""
+    samples: Dict[str, List[Tuple[List[int], int]]] = {}
+    for event in events:
+        if event.get("type") != "llm_call" or event.get("usage_source") != "api_usage":
+            continue
+        family = model_family(event.get("selected_model") or event.get("model"))
+        for counts_key, tokens_key in (("req_script_chars", "prompt_tokens"), ("resp_script_chars", "completion_tokens")):
+            counts = event.get(counts_key)
+            tokens = event.get(tokens_key)
+            if not isinstance(counts, dict) or not tokens:
+                continue
+            samples.setdefault(family, []).append(([int(counts.get(s) or 0) for s in SCRIPTS], int(tokens)))
+    return samples
+
+
+def fit_weights(samples: List[Tuple[List[int], int]], prior: Dict[str, float]) -> Dict[str, float]:
+    """
+    Ridge fit of tokens ~ sum(weight[s] * chars[s]), pulled towards prior so
+    scripts with few samples keep sensible weights. No intercept: estimators
+    price arbitrary text spans (rows, prompts), not whole messages, so a
+    per-message overhead could not be applied consistently.
+    """
+    import numpy as np
+
+    x = np.array([counts for counts, _ in samples], dtype=float)
+    y = np.array([tokens for _, tokens in samples], dtype=float)
+    w0 = np.array([prior[s] for s in SCRIPTS])
+    gram = x.T @ x
+    lam = max(1.0, 1e-3 * float(np.trace(gram)) / gram.shape[0])
+    w = np.linalg.solve(gram + lam * np.eye(gram.shape[0]), x.T @ y + lam * w0)
+    return {s: float(min(4.0, max(0.02, w[i]))) for i, s in enumerate(SCRIPTS)}
+
+
+def _mape(samples: List[Tuple[List[int], int]], weights: Dict[str, float]) -> float:
+    errors = [abs(sum(weights[s] * n for s, n in zip(SCRIPTS, counts)) - tokens) / tokens
+              for counts, tokens in samples if tokens]
+    return round(sum(errors) / len(errors), 4) if errors else 0.0
+
+
+def calibrate(events: Iterable[Dict[str, Any]], min_samples: int = 20) -> Dict[str, Any]:
+    """Calibration payload (see module docstring) from trace events."""
+    chars4 = {s: 0.25 for s in SCRIPTS}
+    families: Dict[str, Any] = {}
+    for family, samples in sorted(_samples_from_trace(events).items()):
+        if len(samples) < min_samples:
+            continue
+        prior = DEFAULT_WEIGHTS.get(family, DEFAULT_WEIGHTS["default"])
+        weights = {s: round(v, 4) for s, v in fit_weights(samples, prior).items()}
+        families[family] = {
+            "weights": weights,
+            "samples": len(samples),
+            "mape_chars4": _mape(samples, chars4),
+            # 与 from_file() 加载后的估算一致 (同一组四舍五入后的权重)
+            "mape_calibrated": _mape(samples, weights),
+        }
+    return {"version": CALIBRATION_VERSION, "generated_at": datetime.now().isoformat(), "families": families}
+
+
+def _read_jsonl(path: str) -> List[Dict[str, Any]]:
+    events = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                events.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return events
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Calibrate per-script token weights from llm_trace.jsonl usage")
+    parser.add_argument("--trace", nargs="+", default=["data/llm_trace.jsonl"])
+    parser.add_argument("--out", default=calibration_path() or DEFAULT_CALIBRATION_PATH)
+    parser.add_argument("--min-samples", type=int, default=20)
+    args = parser.parse_args()
+
+    events: List[Dict[str, Any]] = []
+    for path in args.trace:
+        if os.path.exists(path):
+            events.extend(_read_jsonl(path))
+    payload = calibrate(events, min_samples=args.min_samples)
+    if not payload["families"]:
+        print(f"No family has {args.min_samples}+ llm_call samples with API usage and script counts; nothing written.")
+        return 1
+    out = Path(args.out)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(payload, indent=2, ensure_ascii=False), encoding="utf-8")
+    for family, info in payload["families"].items():
+        print(f"{family:8s} samples={info['samples']:5d} MAPE chars/4={info['mape_chars4']:.1%} "
+              f"calibrated={info['mape_calibrated']:.1%} weights={info['weights']}")
+    print(f"Wrote {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,9 +12,10 @@ import csv
 import json
 import re
 import sys
-from dataclasses import dataclass
+import threading
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 
 def configure_standard_streams() -> None:
@@ -37,11 +38,15 @@ except ImportError:
     yaml = None
 
 try:
-    from runtime_adapter import LLMClient, LLMError, batch_llm_call
+    from runtime_adapter import LLMClient, LLMError, SystemPrompt, batch_llm_call, disable_response_cache, log_llm_progress
 except ImportError:
     print("ERROR: scripts/runtime_adapter.py not found.")
     sys.exit(1)
 
+from batch_utils import BatchConfig as PackingConfig
+from glossary_matcher import get_glossary_matcher
+from glossary_artifact import load_glossary_data
+from checkpoint_journal import CheckpointJournal, read_journal_ids, read_snapshot_ids, recover_checkpoint, write_snapshot
 from style_governance_runtime import evaluate_runtime_governance, format_runtime_governance_issues
 
 
@@ -185,10 +190,10 @@ def load_text(path: str) -> str:
 
 
 def load_glossary(path: str, target_locale: str = "ru-RU") -> Tuple[List[GlossaryEntry], Optional[str]]:
-    if not path or not Path(path).exists() or yaml is None:
+    if not path or not Path(path).exists():
         return [], None
-    with open(path, "r", encoding="utf-8") as f:
-        g = yaml.safe_load(f) or {}
+    # compiled glossaries come from the binary sidecar when it matches (glossary_artifact)
+    g = load_glossary_data(path)
 
     meta = g.get("meta") or {}
     is_compiled = str(meta.get("type") or "").strip().lower() == "compiled"
@@ -378,21 +383,57 @@ def _format_gate_report(issues: List[str]) -> str:
     return "\n".join(lines)
 
 
-def build_glossary_summary(glossary: List[GlossaryEntry]) -> str:
-    if not glossary:
-        return "(无)"
-    compact = [e for e in glossary if e.status == "approved" and glossary_is_compact(e)]
-    standard = [e for e in glossary if e.status == "approved" and not glossary_is_compact(e)]
+def _render_glossary_summary(entries: List[GlossaryEntry], limit: Optional[int] = None) -> str:
+    compact = [e for e in entries if glossary_is_compact(e)]
+    standard = [e for e in entries if not glossary_is_compact(e)]
     lines: List[str] = []
     if compact:
         lines.append("[Compact UI-art priority terms]")
-        lines.extend(f"- {e.term_zh} → {e.term_ru}" for e in compact[:40])
+        lines.extend(f"- {e.term_zh} → {e.term_ru}" for e in compact[:limit])
     if standard:
         lines.append("[General approved terms]")
-        lines.extend(f"- {e.term_zh} → {e.term_ru}" for e in standard[:40])
+        lines.extend(f"- {e.term_zh} → {e.term_ru}" for e in standard[:limit])
     return "\n".join(lines) if lines else "(无)"
 
 
+def build_glossary_summary(glossary: List[GlossaryEntry]) -> str:
+    if not glossary:
+        return "(无)"
+    return _render_glossary_summary([e for e in glossary if e.status == "approved"], limit=40)
+
+
+DEFAULT_GLOSSARY_PRIORITY_BUDGET = 12
+
+GlossaryPrompt = Union[str, Callable[[List[Dict]], str]]
+
+
+def build_glossary_slicer(
+    glossary: List[GlossaryEntry],
+    priority_budget: int = DEFAULT_GLOSSARY_PRIORITY_BUDGET,
+) -> Callable[[List[Dict]], str]:
+    """Per-batch glossary section: approved terms occurring in the batch + a few priority terms.
+
+    Priority terms (compact UI-art first, then glossary order) are always listed,
+    up to priority_budget, so short UI rows keep their anchor terms.
+    """
+    by_term: Dict[str, GlossaryEntry] = {}
+    for entry in glossary:
+        if entry.status == "approved" and entry.term_zh and entry.term_ru:
+            by_term.setdefault(entry.term_zh, entry)
+    entries = list(by_term.values())
+    matcher = get_glossary_matcher(by_term)
+    ranked = sorted(range(len(entries)), key=lambda idx: (not glossary_is_compact(entries[idx]), idx))
+    priority = set(ranked[:max(0, priority_budget)])
+
+    def _slice(rows: List[Dict]) -> str:
+        hits = set(priority)
+        for row in rows:
+            hits.update(matcher.find_indices(str(row.get("source_text") or "")))
+        return _render_glossary_summary([entries[idx] for idx in sorted(hits)])
+
+    return _slice
+
+
 def build_style_contract(profile: Dict[str, Any]) -> str:
     if not profile:
         return "Style profile unavailable, apply workflow/style_guide.md only."
@@ -484,12 +525,38 @@ def build_style_contract(profile: Dict[str, Any]) -> str:
 
 def build_system_prompt_factory(
     style_guide: str,
-    glossary_summary: str,
+    glossary_summary: GlossaryPrompt,
     style_profile: Optional[Dict[str, Any]] = None,
     target_lang: str = "ru-RU",
     target_key: str = "target_ru",
 ):
-    def _builder(rows: List[Dict]) -> str:
+    # 静态前缀（规则 + style contract + style guide [+ 全局术语表]）跨批次不变，可被 provider 缓存；
+    # 逐批次的术语切片、residual 规则与长度约束放在后缀
+    static_glossary = "" if callable(glossary_summary) else f'术语表摘要:\n{glossary_summary}\n\n'
+    prefix = (
+        f'你是严谨的手游本地化译者（zh-CN → {target_lang}）。\n\n'
+        '【Output Contract】\n'
+        f'1. Output MUST be valid JSON object with "items".\n'
+        f'2. Structure: {{"items":[{{"id":"...","{target_key}":"..."}}]}}\n'
+        '3. 每个输入 id 必须出现在输出.\n\n'
+        '【Translation Rules】\n'
+        '- 术语匹配必须一致。\n'
+        '- 占位符 ⟦PH_xx⟧ / ⟦TAG_xx⟧ / {0} / %s / %d 必须保留。\n'
+        '- 保留中文方括号【】、\\n 与所有 markup，不得删除或重排。\n'
+        '- UI 美术字必须优先采用 compact glossary；若存在短译，不得回退到解释性长译。\n'
+        '- 若行带 ui_art_category，则该 category 视为硬约束：badge 只允许短词/缩写；slogan_long 必须压成 banner headline，不得展开成说明句。\n'
+        '- 若 residual_prompt_hint 存在，必须把它视为本行额外硬约束。\n'
+        '- 若 hint=badge_exact_map，仅允许批准短译，不允许自由发挥。\n'
+        '- 若 hint=promo_exact_head，仅保留最短 promo 头词，不得补 Превью / 预览类解释尾巴。\n'
+        '- 若 hint=promo_compound_pack，压成 qualifier + 核心礼包词，不得补 Выбор / Ниндзя 等泛词。\n'
+        '- 若 hint=item_compact_noun，仅允许 1-2 个实词，不得写解释性属格链。\n'
+        '- 若 hint=headline_singleline/headline_multiline/headline_nameplate，只写标题式 headline，不写完整说明句。\n'
+        f'{build_style_contract(style_profile or {})}\n\n'
+        f'style_guide:\n{style_guide}\n\n'
+        f'{static_glossary}'
+    )
+
+    def _builder(rows: List[Dict]) -> SystemPrompt:
         constraints = ""
         residual_lanes = set()
         has_residual_reference = False
@@ -548,62 +615,45 @@ def build_system_prompt_factory(
             if lane_rules:
                 residual_section += "\n".join(lane_rules) + "\n"
 
-        return (
-            f'你是严谨的手游本地化译者（zh-CN → {target_lang}）。\n\n'
-            '【Output Contract】\n'
-            f'1. Output MUST be valid JSON object with "items".\n'
-            f'2. Structure: {{"items":[{{"id":"...","{target_key}":"..."}}]}}\n'
-            '3. 每个输入 id 必须出现在输出.\n\n'
-            '【Translation Rules】\n'
-            '- 术语匹配必须一致。\n'
-            '- 占位符 ⟦PH_xx⟧ / ⟦TAG_xx⟧ / {0} / %s / %d 必须保留。\n'
-            '- 保留中文方括号【】、\\n 与所有 markup，不得删除或重排。\n'
-            '- UI 美术字必须优先采用 compact glossary；若存在短译，不得回退到解释性长译。\n'
-            '- 若行带 ui_art_category，则该 category 视为硬约束：badge 只允许短词/缩写；slogan_long 必须压成 banner headline，不得展开成说明句。\n'
-            '- 若 residual_prompt_hint 存在，必须把它视为本行额外硬约束。\n'
-            '- 若 hint=badge_exact_map，仅允许批准短译，不允许自由发挥。\n'
-            '- 若 hint=promo_exact_head，仅保留最短 promo 头词，不得补 Превью / 预览类解释尾巴。\n'
-            '- 若 hint=promo_compound_pack，压成 qualifier + 核心礼包词，不得补 Выбор / Ниндзя 等泛词。\n'
-            '- 若 hint=item_compact_noun，仅允许 1-2 个实词，不得写解释性属格链。\n'
-            '- 若 hint=headline_singleline/headline_multiline/headline_nameplate，只写标题式 headline，不写完整说明句。\n'
-            f'{build_style_contract(style_profile or {})}\n\n'
-            f'{residual_section}'
-            f'{constraint_section}\n'
-            f'术语表摘要:\n{glossary_summary}\n\n'
-            f'style_guide:\n{style_guide}\n'
-        )
+        dynamic_glossary = f'术语表摘要:\n{glossary_summary(rows)}\n\n' if callable(glossary_summary) else ""
+        return SystemPrompt(prefix, f'{dynamic_glossary}{residual_section}{constraint_section}\n')
 
     return _builder
 
 
 def build_repair_system_prompt_factory(
     style_guide: str,
-    glossary_summary: str,
+    glossary_summary: GlossaryPrompt,
     style_profile: Optional[Dict[str, Any]] = None,
     target_lang: str = "ru-RU",
     target_key: str = "target_ru",
 ):
-    def _builder(rows: List[Dict]) -> str:
-        base = build_system_prompt_factory(
-            style_guide=style_guide,
-            glossary_summary=glossary_summary,
-            style_profile=style_profile,
-            target_lang=target_lang,
-            target_key=target_key,
-        )
+    base = build_system_prompt_factory(
+        style_guide=style_guide,
+        glossary_summary=glossary_summary,
+        style_profile=style_profile,
+        target_lang=target_lang,
+        target_key=target_key,
+    )
+    repair_guard = (
+        "【Repair Guard】\n"
+        "1. 不允许改写、移除、增添任何占位符。\n"
+        "2. token 数量必须与源字符串一致。\n"
+        "3. 若无法稳定保持闭合，优先保守输出原 token 布局。\n"
+    )
+
+    def _builder(rows: List[Dict]) -> SystemPrompt:
         row_rules = []
         for r in rows:
             tokenized = r.get("source_text", "")
             signature = tokens_signature(tokenized)
             sig_text = ", ".join([f"{k}:{v}" for k, v in sorted(signature.items())]) or "none"
             row_rules.append(f"- Row {r.get('id')}: keep token multiset exactly ({sig_text}).")
-        return (
-            f"{base(rows)}\n"
-            "【Repair Guard】\n"
-            "1. 不允许改写、移除、增添任何占位符。\n"
-            "2. token 数量必须与源字符串一致。\n"
-            "3. 若无法稳定保持闭合，优先保守输出原 token 布局。\n"
-            + "\n".join(row_rules)
+        base_prompt = base(rows)
+        base_suffix = base_prompt[len(base_prompt.cacheable_prefix):]
+        return SystemPrompt(
+            f"{base_prompt.cacheable_prefix}{repair_guard}\n",
+            f"{base_suffix}\n【Repair Rows】\n" + "\n".join(row_rules),
         )
 
     return _builder
@@ -638,19 +688,52 @@ def derive_target_key(target_lang: str) -> str:
 
 
 def load_checkpoint(path: str) -> set:
-    if not Path(path).exists():
-        return set()
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return set(json.load(f).get("done_ids", []))
-    except Exception:
-        return set()
+    """Snapshot done_ids plus any ids journaled by an interrupted run."""
+    return read_snapshot_ids(path) | read_journal_ids(path)
 
 
 def save_checkpoint(path: str, done_ids: set):
-    Path(path).parent.mkdir(parents=True, exist_ok=True)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump({"done_ids": list(done_ids)}, f)
+    write_snapshot(path, done_ids)
+
+
+@dataclass
+class TranslateLanes:
+    """Pending rows routed by lane, plus a string_id index over all of them."""
+    prefill: List[Dict[str, str]] = field(default_factory=list)
+    normal: List[Dict[str, str]] = field(default_factory=list)
+    long: List[Dict[str, str]] = field(default_factory=list)
+    by_id: Dict[str, List[Dict[str, str]]] = field(default_factory=dict)
+
+
+def route_rows(rows: List[Dict[str, str]]) -> TranslateLanes:
+    """Single pass: prefill_exact (with a prefill target) > long_text > normal."""
+    lanes = TranslateLanes()
+    for row in rows:
+        lanes.by_id.setdefault(str(row.get("string_id") or ""), []).append(row)
+        if (
+            str(row.get("translation_mode") or "").strip().lower() == "prefill_exact"
+            and str(row.get("prefill_target_ru") or "").strip()
+        ):
+            lanes.prefill.append(row)
+        elif str(row.get("is_long_text", "")).lower() == "true":
+            lanes.long.append(row)
+        else:
+            lanes.normal.append(row)
+    return lanes
+
+
+def _row_source(row: Dict[str, str]) -> str:
+    return row.get("tokenized_zh") or row.get("source_zh") or ""
+
+
+def apply_translation_fields(row: Dict[str, str], translated: str, target_key: str, ok: bool, err: str) -> Dict[str, str]:
+    row["translate_validation"] = "ok" if ok else err
+    row["translate_status"] = "ok" if ok else "validation_failed"
+    if target_key:
+        row[target_key] = translated
+    row["target_text"] = translated
+    row["target"] = translated
+    return row
 
 
 def build_batch_row_payload(row: Dict[str, str]) -> Dict[str, str]:
@@ -669,15 +752,66 @@ def build_batch_row_payload(row: Dict[str, str]) -> Dict[str, str]:
     }
 
 
+# Payload fields that shape the prompt for a row; rows agreeing on all of them
+# (plus the stripped source text) receive the same translation.
+DEDUP_KEY_FIELDS = (
+    "ui_art_category",
+    "ui_art_strategy_hint",
+    "ui_art_compact_term",
+    "max_len_target",
+    "max_len_review_limit",
+    "residual_lane",
+    "residual_prompt_hint",
+    "current_target_text",
+)
+
+
+def dedup_key(payload: Dict[str, str]) -> Tuple[str, ...]:
+    source = str(payload.get("source_text") or "").strip()
+    return (source,) + tuple(str(payload.get(field) or "").strip() for field in DEDUP_KEY_FIELDS)
+
+
+def dedup_batch_rows(payloads: List[Dict[str, str]]) -> Tuple[List[Dict[str, str]], Dict[str, List[str]]]:
+    """Keep one representative per dedup key; return (representatives, rep_id -> duplicate ids)."""
+    representatives: List[Dict[str, str]] = []
+    fanout: Dict[str, List[str]] = {}
+    rep_by_key: Dict[Tuple[str, ...], str] = {}
+    for payload in payloads:
+        key = dedup_key(payload)
+        rep_id = rep_by_key.get(key)
+        if rep_id is None:
+            rep_by_key[key] = payload["id"]
+            fanout[payload["id"]] = []
+            representatives.append(payload)
+        elif payload["id"] != rep_id:
+            fanout[rep_id].append(payload["id"])
+    return representatives, fanout
+
+
+def fan_out_results(res_map: Dict[str, str], fanout: Dict[str, List[str]]) -> int:
+    """Copy each representative's translation to its duplicates; returns rows filled."""
+    filled = 0
+    for rep_id, members in fanout.items():
+        if rep_id not in res_map:
+            continue
+        for member_id in members:
+            res_map[member_id] = res_map[rep_id]
+            filled += 1
+    return filled
+
+
 def _batch_translate(
     rows: List[Dict],
     args: argparse.Namespace,
     style_guide: str,
-    glossary_summary: str,
+    glossary_summary: GlossaryPrompt,
     style_profile: Optional[Dict[str, Any]],
     target_key: str,
     content_type: str,
     system_prompt_builder,
+    on_batch: Optional[Callable[[Dict[str, str]], None]] = None,
+    concurrency: Optional[int] = None,
+    max_batch_tokens: Optional[int] = None,
 ) -> Dict[str, str]:
     if not rows:
         return {}
@@ -691,10 +825,16 @@ def _batch_translate(
         content_type=content_type,
         retry=2,
         allow_fallback=True,
+        on_batch_complete=(lambda items: on_batch(_extract_targets(items, target_key))) if on_batch else None,
+        concurrency=concurrency,
+        max_batch_tokens=max_batch_tokens,
     )
+    return _extract_targets(results, target_key)
+
 
+def _extract_targets(items: List[Dict[str, Any]], target_key: str) -> Dict[str, str]:
     out: Dict[str, str] = {}
-    for it in results:
+    for it in items:
         sid = str(it.get("id") or it.get("string_id") or "")
         if not sid:
             continue
@@ -708,7 +848,7 @@ def _single_row_retry(
     args: argparse.Namespace,
     target_key: str,
     style_guide: str,
-    glossary_summary: str,
+    glossary_summary: GlossaryPrompt,
     style_profile: Optional[Dict[str, Any]],
     content_type: str,
 ) -> Tuple[str, bool, str]:
@@ -762,7 +902,38 @@ def main():
     parser.add_argument("--target-key", default="", help="target_ru / target_en")
     parser.add_argument("--checkpoint", default="data/translate_checkpoint.json")
     parser.add_argument("--dry-run", action="store_true", help="Validate resolved assets and gates without performing translation.")
+    parser.add_argument("--no-llm-cache", action="store_true", help="Bypass the LLM response cache (LLM_CACHE_PATH).")
+    parser.add_argument(
+        "--long-text-concurrency",
+        type=int,
+        default=0,
+        help="Parallel long-text batches (0 = max_concurrency_long_text from batch_runtime_v2.json).",
+    )
+    parser.add_argument(
+        "--long-text-max-tokens",
+        type=int,
+        default=PackingConfig().max_tokens,
+        help=(
+            "Estimated token budget when packing long-text rows into one batch. Budgets are in "
+            "calibrated token_estimator units, not chars/4 (zh-CN text costs ~4.4x the old estimate)."
+        ),
+    )
+    parser.add_argument("--no-dedup", action="store_true", help="Send every pending row to the LLM, even identical ones.")
+    parser.add_argument(
+        "--glossary-prompt",
+        choices=["sliced", "full"],
+        default="sliced",
+        help="sliced: per-batch glossary terms found in the rows; full: the global glossary summary in every prompt.",
+    )
+    parser.add_argument(
+        "--glossary-priority-budget",
+        type=int,
+        default=DEFAULT_GLOSSARY_PRIORITY_BUDGET,
+        help="Priority glossary terms always kept in sliced prompts.",
+    )
     args = parser.parse_args()
+    if args.no_llm_cache:
+        disable_response_cache()
 
     args.glossary = resolve_glossary_path(args.glossary)
     args.style_profile = resolve_style_profile_path(args.style_profile)
@@ -771,7 +942,9 @@ def main():
     style_guide = load_text(args.style)
     style_profile = load_style_profile(args.style_profile)
     glossary, _ = load_glossary(args.glossary, args.target_lang)
-    glossary_summary = build_glossary_summary(glossary)
+    glossary_summary: GlossaryPrompt = build_glossary_summary(glossary)
+    if args.glossary_prompt == "sliced":
+        glossary_summary = build_glossary_slicer(glossary, args.glossary_priority_budget)
 
     runtime_governance = {"passed": True, "issues": [], "mode": "external_fixture"}
     if _is_repo_managed_path(args.style_profile):
@@ -826,7 +999,7 @@ def main():
         if col and col not in headers:
             headers.append(col)
 
-    done_ids = load_checkpoint(args.checkpoint)
+    done_ids = recover_checkpoint(args.output, args.checkpoint)
     pending_rows = [r for r in all_rows if str(r.get("string_id") or "") not in done_ids]
     if not pending_rows:
         print("✅ No pending rows to process.")
@@ -834,17 +1007,11 @@ def main():
 
     print(f"   Total rows: {len(all_rows)}, Pending: {len(pending_rows)}")
 
-    exact_rows = [
-        r for r in pending_rows
-        if str(r.get("translation_mode") or "").strip().lower() == "prefill_exact"
-        and str(r.get("prefill_target_ru") or "").strip()
-    ]
-    llm_rows = [r for r in pending_rows if r not in exact_rows]
-    long_rows = [r for r in llm_rows if str(r.get("is_long_text", "")).lower() == "true"]
-    normal_rows = [r for r in llm_rows if r not in long_rows]
-
-    batch_inputs_normal = [build_batch_row_payload(r) for r in normal_rows]
-    batch_inputs_long = [build_batch_row_payload(r) for r in long_rows]
+    lanes = route_rows(pending_rows)
+    exact_rows = lanes.prefill
+    rows_by_sid = lanes.by_id
+    batch_inputs_normal = [build_batch_row_payload(r) for r in lanes.normal]
+    batch_inputs_long = [build_batch_row_payload(r) for r in lanes.long]
 
     try:
         system_prompt_builder = build_system_prompt_factory(
@@ -855,15 +1022,35 @@ def main():
             target_key=target_key,
         )
 
-        res_map = {}
-        prefilled = 0
+        # 每个批次校验通过即追加写入 CSV + journal; 校验失败的行留给最后的单行修复
+        journal = CheckpointJournal(args.output, args.checkpoint, headers, done_ids=done_ids)
+        res_map: Dict[str, str] = {}
+        fanout: Dict[str, List[str]] = {}
+        committed: set = set()
+        commit_lock = threading.Lock()
+
+        def commit_validated(translations: Dict[str, str]) -> None:
+            ready: List[Dict[str, str]] = []
+            with commit_lock:
+                res_map.update(translations)
+                for rep_id, translated in translations.items():
+                    for sid in [rep_id] + fanout.get(rep_id, []):
+                        rows = rows_by_sid.get(sid, [])
+                        if sid in committed or not rows:
+                            continue
+                        if not all(validate_translation(_row_source(r), translated)[0] for r in rows):
+                            continue
+                        committed.add(sid)
+                        ready.extend(apply_translation_fields(r, translated, target_key, True, "ok") for r in rows)
+            journal.commit(ready)
+
+        prefilled_map: Dict[str, str] = {}
         for row in exact_rows:
             sid = str(row.get("string_id") or "")
             target_text = str(row.get("prefill_target_ru") or "").strip()
-            ok, err = validate_translation(row.get("tokenized_zh") or row.get("source_zh") or "", target_text)
+            ok, err = validate_translation(_row_source(row), target_text)
             if ok:
-                res_map[sid] = target_text
-                prefilled += 1
+                prefilled_map[sid] = target_text
             else:
                 print(f"⚠️ Prefill validation failed for {sid}: {err}; falling back to LLM.")
                 batch_row = build_batch_row_payload(row)
@@ -871,7 +1058,26 @@ def main():
                     batch_inputs_long.append(batch_row)
                 else:
                     batch_inputs_normal.append(batch_row)
-        res_map.update(_batch_translate(
+        prefilled = len(prefilled_map)
+        commit_validated(prefilled_map)
+
+        llm_input_count = len(batch_inputs_normal) + len(batch_inputs_long)
+        if not args.no_dedup:
+            batch_inputs_normal, fanout_normal = dedup_batch_rows(batch_inputs_normal)
+            batch_inputs_long, fanout_long = dedup_batch_rows(batch_inputs_long)
+            fanout.update(fanout_normal)
+            fanout.update(fanout_long)
+        unique_count = len(batch_inputs_normal) + len(batch_inputs_long)
+        dedup_ratio = (1 - unique_count / llm_input_count) if llm_input_count else 0.0
+        if unique_count < llm_input_count:
+            print(f"   Dedup: {llm_input_count} LLM rows -> {unique_count} unique ({dedup_ratio:.1%} saved)")
+        log_llm_progress("translate", "dedup_summary", {
+            "llm_rows": llm_input_count,
+            "unique_rows": unique_count,
+            "dedup_ratio": round(dedup_ratio, 4),
+        }, silent=True)
+
+        commit_validated(_batch_translate(
             rows=batch_inputs_normal,
             args=args,
             style_guide=style_guide,
@@ -880,83 +1086,65 @@ def main():
             target_key=target_key,
             content_type="normal",
             system_prompt_builder=system_prompt_builder,
+            on_batch=commit_validated,
         ))
 
-        for row in batch_inputs_long:
-            row_res = _batch_translate(
-                rows=[row],
-                args=args,
-                style_guide=style_guide,
-                glossary_summary=glossary_summary,
-                style_profile=style_profile,
-                target_key=target_key,
-                content_type="long_text",
-                system_prompt_builder=system_prompt_builder,
-            )
-            res_map.update(row_res)
+        # 长文本: 按 token 装箱, 以独立并发上限并行, 完成即写入 checkpoint
+        commit_validated(_batch_translate(
+            rows=batch_inputs_long,
+            args=args,
+            style_guide=style_guide,
+            glossary_summary=glossary_summary,
+            style_profile=style_profile,
+            target_key=target_key,
+            content_type="long_text",
+            system_prompt_builder=system_prompt_builder,
+            on_batch=commit_validated,
+            concurrency=args.long_text_concurrency or None,
+            max_batch_tokens=args.long_text_max_tokens,
+        ))
 
-        final_rows = []
-        new_done = set()
-        for row in pending_rows:
-            sid = str(row.get("string_id") or "")
-            translated = res_map.get(sid, "")
-            ok, err = validate_translation(row.get("tokenized_zh") or row.get("source_zh") or "", translated)
-            if not ok:
-                row_content_type = "long_text" if str(row.get("is_long_text", "")).lower() == "true" else "normal"
-                repair_text, repaired_ok, repair_err = _single_row_retry(
-                    row=row,
-                    args=args,
-                    target_key=target_key,
-                    style_guide=style_guide,
-                    glossary_summary=glossary_summary,
-                    style_profile=style_profile,
-                    content_type=row_content_type,
-                )
-                if repaired_ok:
-                    translated = repair_text
-                    ok = True
-                    err = "ok"
-                else:
-                    if repair_err:
-                        print(f"    Repair check: {repair_err}")
-                    translated = row.get("tokenized_zh") or translated or ""
-                    err = "fallback_tokenized_layout"
-
-            row["translate_validation"] = err if not ok else "ok"
-            row["translate_status"] = "ok" if ok else "validation_failed"
-            if target_key and target_key not in row:
-                row[target_key] = ""
-            if "target_text" not in row:
-                row["target_text"] = ""
-            if "target" not in row:
-                row["target"] = ""
+        fan_out_results(res_map, fanout)
 
-            if ok:
-                if target_key:
-                    row[target_key] = translated
-                row["target"] = translated
-                row["target_text"] = translated
-            else:
-                print(f"⚠️ Validation failed for {sid}: {err}")
-                print(f"   Target was: {translated[:80]}...")
-                if target_key:
-                    row[target_key] = translated
-                row["target_text"] = translated
-                row["target"] = translated
-
-            final_rows.append(row)
-            new_done.add(sid)
-
-        write_mode = "a" if Path(args.output).exists() else "w"
-        with open(args.output, write_mode, encoding="utf-8-sig", newline="") as f:
-            writer = csv.DictWriter(f, fieldnames=headers)
-            if write_mode == "w":
-                writer.writeheader()
-            writer.writerows(final_rows)
-
-        done_ids.update(new_done)
-        save_checkpoint(args.checkpoint, done_ids)
-        print(f"✅ Translated {len(new_done)} / {len(pending_rows)} rows (prefill_exact={prefilled}).")
+        # 剩余行: 批次失败或校验失败, 逐行修复后提交
+        for sid, rows in rows_by_sid.items():
+            if sid in committed:
+                continue
+            finalized = []
+            for row in rows:
+                translated = res_map.get(sid, "")
+                ok, err = validate_translation(_row_source(row), translated)
+                if not ok:
+                    row_content_type = "long_text" if str(row.get("is_long_text", "")).lower() == "true" else "normal"
+                    repair_text, repaired_ok, repair_err = _single_row_retry(
+                        row=row,
+                        args=args,
+                        target_key=target_key,
+                        style_guide=style_guide,
+                        glossary_summary=glossary_summary,
+                        style_profile=style_profile,
+                        content_type=row_content_type,
+                    )
+                    if repaired_ok:
+                        translated = repair_text
+                        ok = True
+                        err = "ok"
+                    else:
+                        if repair_err:
+                            print(f"    Repair check: {repair_err}")
+                        translated = row.get("tokenized_zh") or translated or ""
+                        err = "fallback_tokenized_layout"
+                        print(f"⚠️ Validation failed for {sid}: {err}")
+                        print(f"   Target was: {translated[:80]}...")
+                finalized.append(apply_translation_fields(row, translated, target_key, ok, err))
+            committed.add(sid)
+            journal.commit(finalized)
+
+        journal.close(order=[str(r.get("string_id") or "") for r in all_rows])
+        print(
+            f"✅ Translated {journal.committed_rows} / {len(pending_rows)} rows "
+            f"(prefill_exact={prefilled}, llm_unique={unique_count}, dedup_ratio={dedup_ratio:.1%})."
+        )
     except Exception as e:
         print(f"❌ Translation failed: {e}")
         sys.exit(1)
@@ -13,8 +13,9 @@ from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
 
+from glossary_matcher import GlossaryMatcher, get_glossary_matcher
 from qa_hard import QAHardValidator
-from runtime_adapter import batch_llm_call
+from runtime_adapter import batch_llm_call, disable_response_cache
 from translate_llm import (
     build_glossary_summary,
     build_system_prompt_factory,
@@ -383,11 +384,13 @@ def build_glossary_resources(glossary_path: str, locales: Iterable[str]) -> Tupl
     return locale_maps, locale_summaries
 
 
-def relevant_glossary_terms(source_text: str, glossary_map: Dict[str, str]) -> List[Dict[str, str]]:
-    hints = []
-    for term_zh, target_text in glossary_map.items():
-        if term_zh and term_zh in source_text:
-            hints.append({"term_zh": term_zh, "target_text": target_text})
+def relevant_glossary_terms(
+    source_text: str,
+    glossary_map: Dict[str, str],
+    matcher: Optional[GlossaryMatcher] = None,
+) -> List[Dict[str, str]]:
+    matcher = matcher or get_glossary_matcher(glossary_map)
+    hints = [{"term_zh": term_zh, "target_text": glossary_map[term_zh]} for term_zh in matcher.find_all(source_text)]
     hints.sort(key=lambda item: item["term_zh"])
     return hints[:20]
 
@@ -397,6 +400,7 @@ def build_task(
     row: Dict[str, str],
     source_artifacts: Dict[str, str],
     glossary_map: Dict[str, str],
+    glossary_matcher: Optional[GlossaryMatcher] = None,
 ) -> Dict[str, Any]:
     action = str(impact["recommended_action"])
     task_type = RECOMMENDED_ACTION_TO_TASK.get(action)
@@ -435,7 +439,7 @@ def build_task(
         "recommended_action": action,
         "content_class": impact["content_class"],
         "risk_level": impact["risk_level"],
-        "relevant_glossary_terms": relevant_glossary_terms(source_text, glossary_map),
+        "relevant_glossary_terms": relevant_glossary_terms(source_text, glossary_map, glossary_matcher),
     }
     return task
 
@@ -447,6 +451,7 @@ def generate_tasks(
     glossary_maps_by_locale: Dict[str, Dict[str, str]],
 ) -> List[Dict[str, Any]]:
     rows_by_id = {str(row.get("string_id") or ""): row for row in translated_rows}
+    matchers = {locale: get_glossary_matcher(glossary_map) for locale, glossary_map in glossary_maps_by_locale.items()}
     tasks: List[Dict[str, Any]] = []
     for impact in delta_rows:
         string_id = str(impact["string_id"])
@@ -454,7 +459,7 @@ def generate_tasks(
         if row is None:
             raise ValueError(f"Impacted string_id {string_id} not found in translated CSV")
         locale = str(impact.get("target_locale") or "").strip()
-        tasks.append(build_task(impact, row, source_artifacts, glossary_maps_by_locale.get(locale, {})))
+        tasks.append(build_task(impact, row, source_artifacts, glossary_maps_by_locale.get(locale, {}), matchers.get(locale)))
     return validate_tasks(tasks)
 
 
@@ -1161,12 +1166,15 @@ def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
     parser.add_argument("--forbidden", default="workflow/forbidden_patterns.txt")
     parser.add_argument("--qa-report", default="data/qa_refresh_report.json")
     parser.add_argument("--model", default="claude-haiku-4-5-20251001")
+    parser.add_argument("--no-llm-cache", action="store_true", help="Bypass the LLM response cache (LLM_CACHE_PATH)")
     return parser.parse_args(argv)
 
 
 def main(argv: Optional[Sequence[str]] = None) -> int:
     configure_standard_streams()
     args = parse_args(argv)
+    if args.no_llm_cache:
+        disable_response_cache()
     delta_report_path = args.delta_report or args.impact
 
     if Path(args.translated).resolve() == Path(args.out_csv).resolve():
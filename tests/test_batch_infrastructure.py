@@ -12,6 +12,7 @@ from tempfile import TemporaryDirectory
 sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
 
 from runtime_adapter import BatchConfig, LLMClient, log_llm_progress, parse_llm_response, get_batch_config
+from event_sink import flush_events
 
 
 class TestBatchConfig(unittest.TestCase):
@@ -98,6 +99,7 @@ class TestLogProgress(unittest.TestCase):
             "status": "SUCCESS",
             "latency_ms": 12000
         }, silent=True)
+        flush_events()
 
         self.assertTrue(self.test_log.exists())
 
@@ -108,6 +110,7 @@ class TestLogProgress(unittest.TestCase):
             "total_batches": 5,
             "status": "SUCCESS"
         }, silent=True)
+        flush_events()
 
         with self.test_log.open("r", encoding="utf-8") as f:
             line = f.readline()
@@ -0,0 +1,117 @@
+import sys
+import zlib
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import embedding_store
+import runtime_adapter
+from glossary_vectorstore import GlossaryVectorStore
+from semantic_scorer import SemanticScorer
+
+DIM = runtime_adapter.EMBEDDING_DIMENSIONS
+
+
+def _vector(text: str) -> np.ndarray:
+    return np.random.default_rng(zlib.crc32(text.encode("utf-8"))).standard_normal(DIM).astype(np.float32)
+
+
+@pytest.fixture(autouse=True)
+def _fresh_stores():
+    embedding_store.reset_embedding_stores()
+    yield
+    embedding_store.reset_embedding_stores()
+
+
+def test_store_bulk_lookup_append_reopen_and_compact(tmp_path):
+    store = embedding_store.EmbeddingStore(str(tmp_path / "emb"), dim=4)
+    vectors = np.arange(12, dtype=np.float32).reshape(3, 4)
+    store.put_many(["a", "b", "c"], vectors)
+    store.put_many(["b"], np.full((1, 4), 9, dtype=np.float32))  # re-write appends, old row is garbage
+
+    found_vectors, found = store.get_many(["c", "missing", "b", "a", "c"])
+    assert found.tolist() == [True, False, True, True, True]
+    assert found_vectors[0].tolist() == [8, 9, 10, 11] and found_vectors[4].tolist() == [8, 9, 10, 11]
+    assert found_vectors[1].tolist() == [0, 0, 0, 0]
+    assert found_vectors[2].tolist() == [9, 9, 9, 9]
+    assert store.stats()["rows"] == 4 and store.stats()["dead"] == 1
+
+    # a second handle (another process in practice) sees committed rows and later appends
+    other = embedding_store.EmbeddingStore(str(tmp_path / "emb"), dim=4)
+    assert other.get_many(["a"])[1].tolist() == [True]
+    result = store.compact()
+    assert result == {"rows_before": 4, "rows_after": 3}
+    assert sorted(p.name for p in (tmp_path / "emb").glob("vectors.*.bin")) == ["vectors.1.bin"]
+    other.put_many(["d"], np.ones((1, 4), dtype=np.float32))
+    after, found = store.get_many(["a", "b", "c", "d"])
+    assert found.all()
+    assert after.tolist() == [[0, 1, 2, 3], [9, 9, 9, 9], [8, 9, 10, 11], [1, 1, 1, 1]]
+
+    with pytest.raises(ValueError):
+        embedding_store.EmbeddingStore(str(tmp_path / "emb"), dim=8)
+
+    legacy = tmp_path / "legacy"
+    legacy.mkdir()
+    np.save(legacy / "k1.npy", np.array([1.5, 2.5, 3.5, 4.5]))
+    half = embedding_store.EmbeddingStore(str(tmp_path / "half"), dim=4, dtype="float16")
+    assert half.import_npy_dir(str(legacy)) == 1
+    assert half.get_many(["k1"])[0][0].tolist() == [1.5, 2.5, 3.5, 4.5]
+    assert (tmp_path / "half" / "vectors.0.bin").stat().st_size == 4 * 2
+
+
+def test_embedding_client_shares_one_store_across_scorer_and_glossary(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("LLM_API_KEY", "test-key")
+    requests_sent = []
+
+    class FakeResponse:
+        def __init__(self, texts):
+            self.texts = texts
+
+        def raise_for_status(self):
+            return None
+
+        def json(self):
+            return {"data": [{"embedding": _vector(text).tolist()} for text in self.texts]}
+
+    def fake_post(url, headers=None, payload=None, timeout=None):
+        requests_sent.append(list(payload["input"]))
+        return FakeResponse(payload["input"])
+
+    monkeypatch.setattr(runtime_adapter, "_http_post", fake_post)
+
+    glossary = tmp_path / "glossary.yaml"
+    glossary.write_text(
+        "entries:\n"
+        "  - {term_zh: 攻击力, term_ru: Атака, status: approved}\n"
+        "  - {term_zh: 防御力, term_ru: Защита, status: approved}\n",
+        encoding="utf-8",
+    )
+    store = GlossaryVectorStore(str(glossary))
+    store.load_glossary()
+    store.build_index()
+    assert requests_sent == [["攻击力", "防御力"]]
+
+    scorer = SemanticScorer()
+    results = scorer.score_batch([
+        {"id": "1", "source_zh": "攻击力", "target_ru": "Атака"},
+        {"id": "2", "source_zh": "攻击力", "target_ru": ""},
+    ])
+    # one request for both sides; glossary terms come from the store, duplicates are fetched once
+    assert requests_sent[1:] == [["Атака"]]
+    expected = runtime_adapter.EmbeddingClient().cosine_similarity(_vector("攻击力"), _vector("Атака"))
+    assert results[0]["semantic_score"] == round(expected, 4)
+    assert results[1] == {"id": "2", "semantic_score": 0.0, "semantic_status": "error"}
+
+    assert scorer.client.store is store.client.store
+    assert len(scorer.client.store) == 3
+    assert list(Path("cache/embeddings").glob("*.npy")) == []
+
+    again = runtime_adapter.EmbeddingClient().embed_batch(["防御力", "", "Атака"])
+    assert len(requests_sent) == 2
+    assert again.dtype == np.float32 and again.shape == (3, DIM)
+    assert np.allclose(again[0], _vector("防御力")) and not again[1].any()
+    assert np.allclose(runtime_adapter.EmbeddingClient().embed_single("Атака"), _vector("Атака"))
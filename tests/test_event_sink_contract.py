@@ -0,0 +1,113 @@
+import gzip
+import json
+import sys
+import threading
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import event_sink
+import runtime_adapter
+
+
+def _lines(path: Path):
+    return [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+
+
+def test_buffered_sink_writes_whole_lines_from_many_threads_on_flush(tmp_path):
+    sink = event_sink.EventSink(flush_bytes=10**9, flush_interval_ms=60_000)
+    path = tmp_path / "nested" / "trace.jsonl"
+
+    def produce(worker):
+        for i in range(200):
+            sink.emit(str(path), {"worker": worker, "i": i, "pad": "x" * 50})
+
+    threads = [threading.Thread(target=produce, args=(w,)) for w in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert sink.flush()
+    records = _lines(path)
+    assert len(records) == 1600
+    for worker in range(8):
+        assert [r["i"] for r in records if r["worker"] == worker] == list(range(200))
+    sink.close()
+
+
+def test_sink_flushes_on_size_threshold_and_keeps_one_handle_per_file(tmp_path):
+    sink = event_sink.EventSink(flush_bytes=1, flush_interval_ms=60_000)
+    first, second = tmp_path / "a.jsonl", tmp_path / "b.jsonl"
+    sink.emit(str(first), {"n": 1})
+    sink.emit(str(second), {"n": 2})
+    sink.emit(str(first), {"n": 3})
+    sink.flush()
+
+    assert [r["n"] for r in _lines(first)] == [1, 3]
+    assert set(sink._handles) == {str(first), str(second)}
+    sink.close()
+    assert sink._handles == {}
+
+
+def test_sink_rotates_and_compresses_full_files(tmp_path):
+    sink = event_sink.EventSink(mode="sync", rotate_bytes=200, compress=True)
+    path = tmp_path / "progress.jsonl"
+    for i in range(10):
+        sink.emit(str(path), {"i": i, "pad": "y" * 60})
+    sink.close()
+
+    assert sink.rotations and all(name.endswith(".gz") for name in sink.rotations)
+    rotated = []
+    for name in sink.rotations:
+        with gzip.open(name, "rt", encoding="utf-8") as f:
+            rotated.extend(json.loads(line)["i"] for line in f)
+    current = [r["i"] for r in _lines(path)] if path.exists() else []
+    assert rotated + current == list(range(10))
+
+
+def test_trace_and_progress_producers_share_the_sink(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv("LLM_TRACE_PATH", "data/trace.jsonl")
+    monkeypatch.setenv("EVENT_SINK_FLUSH_INTERVAL_MS", "60000")
+    event_sink.reset_event_sink()
+    try:
+        runtime_adapter._trace({"type": "llm_call", "step": "translate"})
+        runtime_adapter.log_llm_progress("translate", "batch_start", {"batch_num": 1}, silent=True)
+        assert event_sink.get_event_sink().mode == "buffered"
+        event_sink.flush_events()
+    finally:
+        event_sink.reset_event_sink()
+
+    assert _lines(tmp_path / "data" / "trace.jsonl")[0]["type"] == "llm_call"
+    assert _lines(tmp_path / "reports" / "translate_progress.jsonl")[0]["event"] == "batch_start"
+
+
+def test_sink_reopens_files_removed_between_flushes(tmp_path):
+    sink = event_sink.EventSink(mode="sync")
+    path = tmp_path / "trace.jsonl"
+    sink.emit(str(path), {"n": 1})
+    path.unlink()
+    sink.emit(str(path), {"n": 2})
+    sink.close()
+
+    assert [r["n"] for r in _lines(path)] == [2]
+
+
+def test_both_import_paths_share_one_sink(monkeypatch, tmp_path):
+    import importlib
+
+    monkeypatch.syspath_prepend(str(Path(__file__).parent.parent))
+    package_sink = importlib.import_module("scripts.event_sink")
+    assert package_sink is not event_sink
+    monkeypatch.setenv("EVENT_SINK_FLUSH_INTERVAL_MS", "60000")
+    event_sink.reset_event_sink()
+    path = tmp_path / "events.jsonl"
+    try:
+        package_sink.emit_event(str(path), {"n": 1})
+        assert event_sink.get_event_sink() is package_sink.get_event_sink()
+        # flushing through the other import path makes the event visible
+        assert event_sink.flush_events()
+        assert _lines(path) == [{"n": 1}]
+    finally:
+        event_sink.reset_event_sink()
@@ -0,0 +1,72 @@
+import json
+import sys
+from pathlib import Path
+
+import pytest
+import yaml
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import glossary_artifact
+import glossary_autopromote
+import glossary_delta
+import translate_llm
+from glossary_vectorstore import GlossaryVectorStore
+
+
+def _write_compiled(tmp_path: Path, entries) -> Path:
+    path = tmp_path / "compiled.yaml"
+    path.write_text(yaml.safe_dump({"meta": {"type": "compiled"}, "entries": entries}, allow_unicode=True), encoding="utf-8")
+    path.with_suffix(".lock.json").write_text(json.dumps({"hash": "sha256:abc"}), encoding="utf-8")
+    return path
+
+
+ENTRIES = [
+    {"term_zh": "攻击", "term_ru": "Атака", "scope": "base"},
+    {"term_zh": "忍者", "term_ru": "Ниндзя", "targets": {"en_us": "Ninja", "ru-ru": "Шиноби"}, "status": "approved"},
+    {"term_zh": "奖励", "term_ru": "Награда", "tags": ["ui"], "preferred_compact": True},
+]
+
+
+def test_loaders_read_the_sidecar_without_parsing_yaml(monkeypatch, tmp_path):
+    path = _write_compiled(tmp_path, ENTRIES)
+    expected_glossary = translate_llm.load_glossary(str(path))
+    expected_delta = glossary_delta.load_compiled(str(path), "en-US")
+    expected_autopromote = glossary_autopromote.load_glossary_entries(str(path))
+
+    sidecar = glossary_artifact.write_sidecar(str(path))
+    assert sidecar == tmp_path / "compiled.bin"
+    artifact = glossary_artifact.load_glossary_artifact(str(path))
+    assert artifact["compiled_hash"] == "sha256:abc"
+    assert set(artifact) == {"format", "compiled_hash", "source_sha256", "data", "locale_maps"}
+    assert artifact["locale_maps"]["ru-RU"] == {"攻击": "Атака", "忍者": "Шиноби", "奖励": "Награда"}
+    assert artifact["locale_maps"]["en-US"] == {"忍者": "Ninja"}
+
+    def no_yaml(*args, **kwargs):
+        raise AssertionError("YAML parsed although the sidecar is current")
+
+    monkeypatch.setattr(yaml, "safe_load", no_yaml)
+    monkeypatch.setattr(yaml, "load", no_yaml)
+    assert translate_llm.load_glossary(str(path)) == expected_glossary
+    assert glossary_delta.load_compiled(str(path), "en-US") == expected_delta
+    assert glossary_delta.load_compiled(str(path), "ru_RU")[0]["忍者"] == "Шиноби"
+    assert glossary_autopromote.load_glossary_entries(str(path)) == expected_autopromote
+    store = GlossaryVectorStore(str(path))
+    assert store.load_glossary() == 1 and store.term_texts == ["忍者"]
+
+
+@pytest.mark.parametrize("change", ["yaml", "lock", "disabled"])
+def test_stale_or_disabled_sidecar_falls_back_to_yaml(monkeypatch, tmp_path, change):
+    path = _write_compiled(tmp_path, ENTRIES)
+    glossary_artifact.write_sidecar(str(path))
+
+    if change == "yaml":
+        _write_compiled(tmp_path, ENTRIES + [{"term_zh": "回合", "term_ru": "Ход"}])
+    elif change == "lock":
+        path.with_suffix(".lock.json").write_text(json.dumps({"hash": "sha256:def"}), encoding="utf-8")
+    else:
+        monkeypatch.setenv("GLOSSARY_SIDECAR", "0")
+
+    assert glossary_artifact.load_glossary_artifact(str(path)) is None
+    entries, _ = translate_llm.load_glossary(str(path))
+    assert len(entries) == (4 if change == "yaml" else 3)
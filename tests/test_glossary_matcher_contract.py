@@ -0,0 +1,45 @@
+import random
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import glossary_matcher
+import translate_refresh
+
+
+def test_matcher_returns_same_hits_as_substring_loop_in_registration_order():
+    rng = random.Random(3)
+    alphabet = "ab攻击力"
+    for _ in range(500):
+        terms = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(0, 10))]
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 16)))
+        expected = [term for term in dict.fromkeys(terms) if term in text]
+        assert glossary_matcher.GlossaryMatcher(terms).find_all(text) == expected
+
+
+def test_overlapping_and_nested_terms_are_all_reported():
+    matcher = glossary_matcher.GlossaryMatcher(["攻击力", "攻击", "击力", "", "力量"])
+
+    assert matcher.terms == ["攻击力", "攻击", "击力", "力量"]
+    assert matcher.find_all("提升攻击力量") == ["攻击力", "攻击", "击力", "力量"]
+    assert matcher.find_all("") == []
+
+
+def test_matcher_is_compiled_once_per_term_set():
+    first = glossary_matcher.get_glossary_matcher({"灵渊": "Линъюань", "试炼": "Испытание"})
+    again = glossary_matcher.get_glossary_matcher(["灵渊", "试炼"])
+    reordered = glossary_matcher.get_glossary_matcher(["试炼", "灵渊"])
+
+    assert first is again
+    assert reordered is not first
+
+
+def test_translate_refresh_relevant_terms_use_matcher():
+    glossary_map = {"试炼": "Испытание", "灵渊": "Линъюань", "火影": "Хокаге"}
+    hints = translate_refresh.relevant_glossary_terms("进入灵渊试炼", glossary_map)
+
+    assert hints == [
+        {"term_zh": "灵渊", "target_text": "Линъюань"},
+        {"term_zh": "试炼", "target_text": "Испытание"},
+    ]
@@ -68,3 +68,51 @@ def test_color_tag_and_short_closing_tag_is_tokenized(freezer):
     # 至少出现这两个可识别的闭合/开标签原样映射
     assert '</c>' in local_map.values()
     assert any(value.startswith('<color=#') for value in local_map.values())
+
+
+def test_segmentation_does_not_duplicate_frozen_blocks(freezer):
+    frozen, local_map = freezer.freeze_text("<b>{0}</b>造成伤害", source_lang='zh-CN')
+
+    assert frozen.count("⟦PH_1⟧") == 1
+    assert frozen.count("⟦TAG_1⟧") == 1
+    assert local_map == {"PH_1": "{0}", "TAG_1": "<b>", "TAG_2": "</b>"}
+
+
+# freeze_text output of the baseline per-pattern implementation on the repo schema
+# (source_lang=en-US, one freezer, in order). Later patterns run on the text left by
+# earlier ones, so a tag wrapping a placeholder keeps the frozen PH inside the TAG.
+BASELINE_FREEZE_GOLDEN = [
+    ("<color={0}>攻击</color> {0}",
+     "⟦TAG_1⟧攻击⟦TAG_2⟧ ⟦PH_1⟧",
+     {"PH_1": "{0}", "TAG_1": "<color=⟦PH_1⟧>", "TAG_2": "</color>"}),
+    ("<color=#FFD700>{playerName}</color>获得%d奖励",
+     "⟦TAG_3⟧⟦PH_2⟧⟦TAG_2⟧获得⟦PH_3⟧奖励",
+     {"PH_2": "{playerName}", "PH_3": "%d", "TAG_3": "<color=#FFD700>"}),
+    ("Deal %1$d to {target} <i>now</i>",
+     "Deal ⟦PH_5⟧ to ⟦PH_4⟧ ⟦TAG_4⟧now⟦TAG_5⟧",
+     {"PH_4": "{target}", "PH_5": "%1$d", "TAG_4": "<i>", "TAG_5": "</i>"}),
+    ("<b>{0}</b> %s {name} [NAME]\\n【x】",
+     "⟦TAG_6⟧⟦PH_1⟧⟦TAG_7⟧ ⟦PH_7⟧ ⟦PH_6⟧ ⟦PH_8⟧⟦PH_9⟧⟦PH_10⟧x⟦PH_11⟧",
+     {"PH_6": "{name}", "PH_7": "%s", "TAG_6": "<b>", "TAG_7": "</b>", "PH_8": "[NAME]",
+      "PH_9": "\\n", "PH_10": "【", "PH_11": "】"}),
+    ("{target} again %d <size={1}>",
+     "⟦PH_4⟧ again ⟦PH_3⟧ ⟦TAG_8⟧",
+     {"PH_12": "{1}", "TAG_8": "<size=⟦PH_12⟧>"}),
+    ("<c={color}>[ITEM]</c>",
+     "⟦TAG_9⟧⟦PH_14⟧⟦TAG_10⟧",
+     {"PH_13": "{color}", "TAG_9": "<c=⟦PH_13⟧>", "TAG_10": "</c>", "PH_14": "[ITEM]"}),
+    ("plain text without tokens", "plain text without tokens", {}),
+]
+
+
+def test_freeze_text_matches_baseline_per_pattern_golden(freezer):
+    for text, frozen, local_map in BASELINE_FREEZE_GOLDEN:
+        assert freezer.freeze_text(text, source_lang='en-US') == (frozen, local_map)
+    assert freezer.placeholder_map["TAG_1"] == "<color=⟦PH_1⟧>"
+    assert freezer.reverse_map["{target}"] == "PH_4"
+
+    parallel = PlaceholderFreezer(SCHEMA_PATH)
+    texts = [text for text, _, _ in BASELINE_FREEZE_GOLDEN]
+    results = parallel.freeze_many(texts, source_lang='en-US', workers=2)
+    assert results == [(frozen, local_map) for _, frozen, local_map in BASELINE_FREEZE_GOLDEN]
+    assert parallel.placeholder_map == freezer.placeholder_map
@@ -197,3 +197,155 @@ def test_check_length_overflow_uses_headline_budget_for_slogan_nameplate(tmp_pat
     )
 
     assert validator.errors[0]["type"] == "headline_budget_overflow"
+
+
+def _write_streaming_fixture(tmp_path, rows=60):
+    (tmp_path / "placeholder_map.json").write_text(
+        json.dumps({"mappings": {"PH_1": "{0}", "TAG_1": "<b>", "TAG_2": "</b>"}}), encoding="utf-8"
+    )
+    (tmp_path / "schema.yaml").write_text(
+        "version: 2\npatterns:\n  - name: brace\n    regex: '\\{\\d+\\}'\n"
+        "paired_tags:\n  - open: '<b'\n    close: '</b'\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "forbidden.txt").write_text("TODO\n", encoding="utf-8")
+    lines = ["string_id,tokenized_zh,source_zh,target_text"]
+    targets = [
+        "Атака ⟦PH_1⟧",
+        "Атака",
+        "⟦TAG_1⟧Сила",
+        "TODO текст",
+        "Урон {1} ⟦PH_1⟧",
+        "",
+    ]
+    for i in range(rows):
+        lines.append(f"s{i},攻击⟦PH_1⟧,攻击,{targets[i % len(targets)]}")
+    lines.append("empty,,,")
+    (tmp_path / "translated.csv").write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+
+def _validator(tmp_path, report_name, **kwargs):
+    return QAHardValidator(
+        translated_csv=str(tmp_path / "translated.csv"),
+        placeholder_map=str(tmp_path / "placeholder_map.json"),
+        schema_yaml=str(tmp_path / "schema.yaml"),
+        forbidden_txt=str(tmp_path / "forbidden.txt"),
+        report_json=str(tmp_path / report_name),
+        **kwargs,
+    )
+
+
+def test_streaming_mode_matches_in_memory_results_with_bounded_sample(tmp_path):
+    _write_streaming_fixture(tmp_path)
+
+    baseline = _validator(tmp_path, "baseline.json")
+    assert baseline.run() is False
+    streamed = _validator(tmp_path, "streamed.json", stream=True, workers=2, chunk_rows=7, sample_limit=5)
+    assert streamed.run() is False
+
+    base_report = json.loads((tmp_path / "baseline.json").read_text(encoding="utf-8"))
+    report = json.loads((tmp_path / "streamed.json").read_text(encoding="utf-8"))
+    assert report["total_rows"] == base_report["total_rows"] == 61
+    assert report["error_counts"] == base_report["error_counts"]
+    assert report["warning_counts"] == base_report["warning_counts"]
+    assert report["warning_policy"] == base_report["warning_policy"]
+    assert report["metadata"]["total_errors"] == base_report["metadata"]["total_errors"] > 5
+    assert report["metadata"]["errors_truncated"] is True
+    assert report["errors"] == base_report["errors"][:5]
+
+    findings = [json.loads(line) for line in (tmp_path / "streamed.findings.jsonl").read_text(encoding="utf-8").splitlines()]
+    assert report["metadata"]["findings_jsonl"] == str(tmp_path / "streamed.findings.jsonl")
+    errors = [{k: v for k, v in f.items() if k != "kind"} for f in findings if f["kind"] == "error"]
+    warnings = [f for f in findings if f["kind"] == "warning"]
+    assert errors == baseline.errors
+    assert len(warnings) == len(baseline.warnings)
+    assert len(streamed.errors) == 5
+
+
+def test_checks_work_on_a_fresh_validator_and_follow_resource_changes(tmp_path):
+    import re
+
+    validator = _validator(tmp_path, "qa_report.json")
+    validator.placeholder_map = {"TAG_1": "<b>", "TAG_2": "</b>"}
+    validator.compiled_forbidden = [re.compile("TODO")]
+    validator.compiled_patterns = [re.compile(r"\{\d+\}")]
+
+    # no run(): each check builds the rule engine on first use
+    validator.check_forbidden_patterns("forbidden", "TODO text", 2)
+    validator.check_new_placeholders("raw", "Урон {1}", "攻击", 3)
+    validator.check_tag_balance("count", "⟦TAG_1⟧Атака", "<b>攻击</b>", 4)
+    validator.check_token_mismatch("tokens", "⟦TAG_1⟧攻击⟦TAG_2⟧", "⟦TAG_1⟧Атака", 5)
+    # paired_tags loaded later: the engine is rebuilt with the new rules
+    validator.paired_tags = [{"open": "<b", "close": "</b"}]
+    validator.check_tag_balance("paired", "⟦TAG_1⟧Атака", "<b>攻击</b>", 6)
+    # another forbidden pattern appended by a second load_* call is picked up
+    validator.compiled_forbidden.append(re.compile("FIXME"))
+    validator.check_forbidden_patterns("forbidden_2", "FIXME later", 7)
+
+    assert [(e["string_id"], e["type"]) for e in validator.errors] == [
+        ("forbidden", "forbidden_hit"),
+        ("raw", "new_placeholder_found"),
+        ("count", "tag_unbalanced"),
+        ("tokens", "token_mismatch"),
+        ("paired", "tag_unbalanced"),
+        ("forbidden_2", "forbidden_hit"),
+    ]
+    assert validator.rule_engine.tag_family == {"TAG_1": ("bold", False), "TAG_2": ("bold", True)}
+
+
+def test_rule_engine_scans_once_and_keeps_per_rule_semantics(tmp_path):
+    from scripts.qa_hard import _fuse_patterns
+    import re
+
+    (tmp_path / "placeholder_map.json").write_text(json.dumps({"mappings": {
+        "PH_1": "{0}", "TAG_1": "<color=#fff>", "TAG_2": "</c>", "TAG_3": "<b>", "TAG_4": "</b>",
+    }}), encoding="utf-8")
+    (tmp_path / "schema.yaml").write_text(
+        "version: 2\npatterns:\n  - name: brace\n    regex: '\\{\\d+\\}'\n"
+        "paired_tags:\n  - open: '<color'\n    close: '</color'\n  - open: '<b'\n    close: '</b'\n",
+        encoding="utf-8",
+    )
+    (tmp_path / "forbidden.txt").write_text("Ошибка\nTODO\n", encoding="utf-8")
+    (tmp_path / "translated.csv").write_text(
+        "string_id,tokenized_zh,source_zh,target_text\n"
+        "clean,⟦TAG_1⟧攻击⟦TAG_2⟧,<color=#fff>攻击</c>,⟦TAG_1⟧Атака⟦TAG_2⟧\n"
+        "unbalanced,⟦TAG_3⟧攻击⟦TAG_4⟧,<b>攻击</b>,⟦TAG_3⟧Атака\n"
+        "forbidden,攻击,攻击,TODO Ошибка\n"
+        "raw,攻击⟦PH_1⟧,攻击{0},Урон {1} ⟦PH_1⟧ ⟦PH_9⟧\n",
+        encoding="utf-8",
+    )
+
+    validator = _validator(tmp_path, "qa_report.json")
+    assert validator.run() is False
+
+    engine = validator.rule_engine
+    assert engine.tag_family == {"TAG_1": ("color", False), "TAG_2": ("color", True),
+                                 "TAG_3": ("bold", False), "TAG_4": ("bold", True)}
+    assert engine.pattern_gate is not None
+    assert engine.scan("⟦TAG_1⟧Атака⟦TAG_2⟧") == (["TAG_1", "TAG_2"], False)
+
+    by_id = {}
+    for error in validator.errors:
+        if error["type"] not in {"tag_unbalanced", "forbidden_hit", "new_placeholder_found"}:
+            continue
+        by_id.setdefault(error["string_id"], []).append(error)
+    assert "clean" not in by_id
+    assert [e["type"] for e in by_id["unbalanced"]] == ["tag_unbalanced"]
+    # the first listed forbidden pattern is reported even though a later one matches earlier in the text
+    assert by_id["forbidden"][0]["detail"] == "matched forbidden pattern: Ошибка"
+    assert sorted(e["detail"] for e in by_id["raw"]) == [
+        "found unfrozen placeholder: {1}", "found unknown token placeholder: ⟦PH_9⟧",
+    ]
+
+    timings = json.loads((tmp_path / "qa_report.json").read_text(encoding="utf-8"))["metadata"]["rule_timings"]
+    assert set(timings) == {"scan", "token_mismatch", "tag_balance", "forbidden_hit", "new_placeholder", "length_overflow"}
+    assert all(entry["calls"] == 4 for entry in timings.values())
+
+    # built once after the load_* calls; validating again reuses it
+    assert validator.validate_csv() is True
+    assert validator.rule_engine is engine
+
+    # patterns that cannot be fused safely fall back to per-pattern scans
+    assert _fuse_patterns([re.compile(r"(a)\1"), re.compile("b")]) is None
+    assert _fuse_patterns([re.compile("(?i)todo")]) is None
+    assert _fuse_patterns([re.compile("a"), re.compile("b|c")]).pattern == "(?:a)|(?:b|c)"
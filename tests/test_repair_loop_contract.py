@@ -464,3 +464,161 @@ def test_repair_loop_apply_repair_updates_target_value_columns_only():
     assert repaired.loc[0, "target_text"] == "исправлено"
     assert repaired.loc[0, "target"] == "исправлено"
     assert repaired.loc[0, "max_length_target"] == 42
+
+
+def test_repair_loop_batches_tasks_concurrently_with_one_client(monkeypatch, tmp_path):
+    import threading
+    import time
+
+    lock = threading.Lock()
+    state = {"clients": 0, "active": 0, "peak": 0}
+    calls = []
+
+    class FakeClient:
+        def __init__(self):
+            state["clients"] += 1
+
+        def chat(self, **kwargs):
+            with lock:
+                calls.append(kwargs)
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            time.sleep(0.05)
+            with lock:
+                state["active"] -= 1
+            user = kwargs["user"]
+            if "Items:" not in user:
+                # dropped batch items and lone retries go out as single-task prompts
+                return SimpleNamespace(text="{name} single fix" if "{name}" in user else "single fix")
+            items = json.loads(user.split("Items:\n", 1)[1].rsplit("\n\nReturn", 1)[0])
+            answers = []
+            for item in items:
+                if item["source"] == "drop me":
+                    continue
+                fix = "bad" if item["source"] == "{name} left" else item["source"] + " ok"
+                answers.append({"id": item["id"], "translation": fix})
+            return SimpleNamespace(text=json.dumps({"items": answers}))
+
+    monkeypatch.setattr(runtime_adapter, "LLMClient", FakeClient)
+    monkeypatch.setattr(runtime_adapter, "_dispatch_gates", {"test-model": runtime_adapter._DispatchGate(2)})
+
+    sources = ["a", "b", "c", "drop me", "{name} left", "d"]
+    tasks = [
+        repair_loop.RepairTask({"string_id": str(n), "source_text": src, "current_translation": "old", "issues": []})
+        for n, src in enumerate(sources)
+    ]
+    data = pd.DataFrame([{"string_id": str(n), "target_ru": "old"} for n in range(len(sources))])
+    loop = repair_loop.RepairLoop(
+        {
+            "repair_loop": {
+                "max_rounds": 2,
+                "rounds": {
+                    1: {"model": "test-model", "prompt_variant": "standard"},
+                    2: {"model": "test-model", "prompt_variant": "detailed"},
+                },
+            }
+        },
+        qa_type="soft",
+        concurrency=2,
+        batch_size=3,
+    )
+
+    repaired_df, escalations = loop.run(tasks, data, str(tmp_path))
+
+    assert state["clients"] == 1
+    assert state["peak"] == 2
+    batch_calls = [c for c in calls if "Items:" in c["user"]]
+    assert [c["metadata"]["batch_size"] for c in batch_calls] == [3, 3]
+    # requests are pinned to the round model whose dispatch gate they were charged to
+    assert {c["metadata"]["model_override"] for c in calls} == {"test-model"}
+    assert "JSON object" in batch_calls[0]["system"]
+    assert sum("Items:" not in c["user"] for c in calls) == 2
+    assert list(repaired_df["target_ru"]) == ["a ok", "b ok", "c ok", "single fix", "{name} single fix", "d ok"]
+    assert escalations == []
+    assert loop.stats["by_round"][1] == 5 and loop.stats["by_round"][2] == 1
+    checkpoint = json.loads((tmp_path / "repair_checkpoint.json").read_text(encoding="utf-8"))
+    assert checkpoint["round"] == 2 and checkpoint["pending_tasks"] == 1
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_repair_loop_batch_item_errors_are_failed_attempts_and_requests_pass_the_dispatch_gate(
+    monkeypatch, tmp_path
+):
+    import threading
+    import time
+
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0}
+
+    class FakeClient:
+        def chat(self, **kwargs):
+            with lock:
+                state["active"] += 1
+                state["peak"] = max(state["peak"], state["active"])
+            time.sleep(0.02)
+            with lock:
+                state["active"] -= 1
+            items = json.loads(kwargs["user"].split("Items:\n", 1)[1].rsplit("\n\nReturn", 1)[0])
+            return SimpleNamespace(text=json.dumps({
+                "items": [{"id": item["id"], "translation": item["source"] + " ok"} for item in items]
+            }))
+
+    monkeypatch.setattr(runtime_adapter, "LLMClient", FakeClient)
+    # the model's gate (shared with batch_llm_call) allows one request in flight, whatever the worker count
+    monkeypatch.setattr(runtime_adapter, "_dispatch_gates", {"test-model": runtime_adapter._DispatchGate(1)})
+    loop = repair_loop.RepairLoop(
+        {"repair_loop": {"max_rounds": 1, "rounds": {1: {"model": "test-model", "prompt_variant": "standard"}}}},
+        qa_type="soft",
+        concurrency=4,
+        batch_size=2,
+    )
+    validate = loop._validate_repair
+
+    def flaky_validate(repair_result, task):
+        if task.source_text == "boom":
+            raise ValueError("validator crashed")
+        return validate(repair_result, task)
+
+    monkeypatch.setattr(loop, "_validate_repair", flaky_validate)
+    sources = ["a", "boom", "c", "d", "e", "f", "g", "h"]
+    tasks = [
+        repair_loop.RepairTask({"string_id": str(n), "source_text": src, "current_translation": "old", "issues": []})
+        for n, src in enumerate(sources)
+    ]
+    data = pd.DataFrame([{"string_id": str(n), "target_ru": "old"} for n in range(len(sources))])
+
+    repaired_df, escalations = loop.run(tasks, data, str(tmp_path))
+
+    assert state["peak"] == 1
+    assert list(repaired_df["target_ru"]) == ["a ok", "old", "c ok", "d ok", "e ok", "f ok", "g ok", "h ok"]
+    assert [e["string_id"] for e in escalations] == ["1"]
+    assert [(h["round"], h.get("success")) for h in tasks[1].repair_history] == [(1, False), ("escalation", None)]
+
+
+def test_repair_loop_applies_round_repairs_through_row_index():
+    df = pd.DataFrame(
+        [
+            {"string_id": 7, "target_ru": "old 7", "target_text": float("nan")},
+            {"string_id": " 8 ", "target_ru": "old 8", "target_text": float("nan")},
+            {"string_id": 7, "target_ru": "dup 7", "target_text": float("nan")},
+            {"string_id": 9, "target_ru": "old 9", "target_text": float("nan")},
+        ]
+    )
+    row_index = repair_loop.build_row_index(df)
+    assert row_index == {"7": 0, "8": 1, "9": 3}
+
+    tasks = []
+    for string_id, fix in (("8", "fix 8"), ("7", "first 7"), ("7", "second 7"), ("404", "missing")):
+        task = repair_loop.RepairTask({"string_id": string_id})
+        task.final_translation = fix
+        tasks.append(task)
+
+    repaired = repair_loop.RepairLoop({"repair_loop": {"max_rounds": 1}})._apply_repairs(df, tasks, row_index)
+
+    # first matching row only, later repairs of the same id win, all-empty target columns accept text
+    assert list(repaired["target_ru"]) == ["second 7", "fix 8", "dup 7", "old 9"]
+    assert list(repaired["target_text"].fillna("")) == ["second 7", "fix 8", "", ""]
+
+    hydrated = repair_loop.RepairTask({"string_id": "9"})
+    repair_loop.hydrate_task_from_frame(hydrated, df, row_index)
+    assert hydrated.current_translation == "old 9"
@@ -2,6 +2,7 @@
 """Contract tests for Batch 2 runtime_adapter stabilization."""
 
 import json
+import os
 import sys
 from pathlib import Path
 
@@ -171,7 +172,7 @@ def test_single_model_call_classifies_errors_and_emits_trace(monkeypatch):
     def raise_timeout(*args, **kwargs):
         raise requests.Timeout("slow")
 
-    monkeypatch.setattr(runtime_adapter.requests, "post", raise_timeout)
+    monkeypatch.setattr(runtime_adapter, "_http_post", raise_timeout)
     with pytest.raises(LLMError) as exc:
         client._call_single_model(
             model="gpt-4.1-mini",
@@ -196,7 +197,7 @@ def test_single_model_call_classifies_errors_and_emits_trace(monkeypatch):
     def raise_network(*args, **kwargs):
         raise requests.RequestException("offline")
 
-    monkeypatch.setattr(runtime_adapter.requests, "post", raise_network)
+    monkeypatch.setattr(runtime_adapter, "_http_post", raise_network)
     with pytest.raises(LLMError) as exc:
         client._call_single_model(
             model="gpt-4.1-mini",
@@ -217,8 +218,8 @@ def test_single_model_call_classifies_errors_and_emits_trace(monkeypatch):
     assert exc.value.kind == "network"
 
     monkeypatch.setattr(
-        runtime_adapter.requests,
-        "post",
+        runtime_adapter,
+        "_http_post",
         lambda *args, **kwargs: _FakeResponse(503, payload={"error": "retry"}, text="server fail"),
     )
     with pytest.raises(LLMError) as exc:
@@ -242,8 +243,8 @@ def test_single_model_call_classifies_errors_and_emits_trace(monkeypatch):
     assert exc.value.http_status == 503
 
     monkeypatch.setattr(
-        runtime_adapter.requests,
-        "post",
+        runtime_adapter,
+        "_http_post",
         lambda *args, **kwargs: _FakeResponse(401, payload={"error": "denied"}, text="unauthorized"),
     )
     with pytest.raises(LLMError) as exc:
@@ -267,8 +268,8 @@ def test_single_model_call_classifies_errors_and_emits_trace(monkeypatch):
     assert exc.value.retryable is False
 
     monkeypatch.setattr(
-        runtime_adapter.requests,
-        "post",
+        runtime_adapter,
+        "_http_post",
         lambda *args, **kwargs: _FakeResponse(200, payload=ValueError("bad json"), text="oops"),
     )
     with pytest.raises(LLMError) as exc:
@@ -292,8 +293,8 @@ def test_single_model_call_classifies_errors_and_emits_trace(monkeypatch):
 
     monkeypatch.setattr(runtime_adapter, "_estimate_cost", lambda *args, **kwargs: 0.123456)
     monkeypatch.setattr(
-        runtime_adapter.requests,
-        "post",
+        runtime_adapter,
+        "_http_post",
         lambda *args, **kwargs: _FakeResponse(
             200,
             payload={
@@ -334,6 +335,81 @@ def test_single_model_call_classifies_errors_and_emits_trace(monkeypatch):
     assert trace["cost_usd_est"] == 0.123456
 
 
+def test_prompt_cache_is_opt_in_and_default_system_message_is_plain_string(monkeypatch):
+    sent_payloads = []
+    monkeypatch.delenv("LLM_PROMPT_CACHE", raising=False)
+    monkeypatch.setattr(runtime_adapter, "_trace", lambda event: None)
+
+    def fake_post(url, headers, payload, timeout):
+        sent_payloads.append(payload)
+        return _FakeResponse(200, payload={"id": "req", "choices": [{"message": {"content": "ok"}}]})
+
+    monkeypatch.setattr(runtime_adapter, "_http_post", fake_post)
+    client = LLMClient(
+        base_url="https://example.invalid/v1",
+        api_key="test-key",
+        model="env-default",
+        router=_make_router({"routing": {}, "capabilities": {}, "fallback_triggers": {}}),
+    )
+    client._call_single_model(
+        model="claude-haiku-4-5-20251001", system=runtime_adapter.SystemPrompt("STATIC\n", "rows"),
+        user="u", temperature=0.0, max_tokens=None, response_format=None, metadata=None, step="translate",
+        attempt_no=0, router_default=None, router_chain_len=1, model_override=None, fallback_used=False,
+        fallback_reason=None,
+    )
+
+    assert sent_payloads[0]["messages"][0] == {"role": "system", "content": "STATIC\nrows"}
+
+
+def test_system_prompt_prefix_is_marked_cacheable_and_cached_tokens_are_billed(monkeypatch):
+    trace_events = []
+    sent_payloads = []
+    monkeypatch.setattr(runtime_adapter, "_trace", trace_events.append)
+    monkeypatch.setattr(runtime_adapter, "_pricing_cache", {
+        "billing": {"mode": "per_1m"},
+        "models": {"claude-x": {"input_per_1M": 1.0, "output_per_1M": 0.0, "cached_prompt_ratio": 0.1}},
+    })
+
+    def fake_post(url, headers, payload, timeout):
+        sent_payloads.append(payload)
+        return _FakeResponse(200, payload={
+            "id": "req-cache",
+            "choices": [{"message": {"content": "ok"}}],
+            "usage": {"prompt_tokens": 1000, "completion_tokens": 0, "prompt_tokens_details": {"cached_tokens": 800}},
+        })
+
+    monkeypatch.setattr(runtime_adapter, "_http_post", fake_post)
+    client = LLMClient(
+        base_url="https://example.invalid/v1",
+        api_key="test-key",
+        model="env-default",
+        router=_make_router({"routing": {}, "capabilities": {}, "fallback_triggers": {}}),
+    )
+    system = runtime_adapter.SystemPrompt("STATIC RULES\n", "batch rows")
+    assert system == "STATIC RULES\nbatch rows"
+
+    call = dict(
+        user="u", temperature=0.0, max_tokens=None, response_format=None, metadata=None, step="translate",
+        attempt_no=0, router_default=None, router_chain_len=1, model_override=None, fallback_used=False,
+        fallback_reason=None,
+    )
+    monkeypatch.setenv("LLM_PROMPT_CACHE", "auto")
+    client._call_single_model(model="claude-x", system=system, **call)
+    monkeypatch.setenv("LLM_PROMPT_CACHE", "off")
+    client._call_single_model(model="claude-x", system=system, **call)
+
+    assert sent_payloads[0]["messages"][0]["content"] == [
+        {"type": "text", "text": "STATIC RULES\n", "cache_control": {"type": "ephemeral"}},
+        {"type": "text", "text": "batch rows"},
+    ]
+    assert sent_payloads[1]["messages"][0]["content"] == "STATIC RULES\nbatch rows"
+    trace = trace_events[-1]
+    assert trace["cached_tokens"] == 800
+    # 200 uncached + 800 cached at 10%
+    assert trace["cost_usd_est"] == pytest.approx(280 / 1_000_000)
+    assert runtime_adapter._extract_usage({"usage": {"prompt_tokens": 5, "cache_read_input_tokens": 4}})["cached_tokens"] == 4
+
+
 def test_batch_llm_call_retries_and_partial_match_forwarding(monkeypatch, tmp_path):
     class FakeConfig:
         def get_batch_size(self, model, content_type="normal"):
@@ -424,3 +500,560 @@ def test_batch_llm_call_writes_failed_batch_report_when_enabled(monkeypatch, tmp
     )
     assert result == []
     assert (tmp_path / "reports" / "soft_qa_failed_batches.json").exists()
+
+
+def test_batch_llm_call_concurrent_dispatch_keeps_input_order(monkeypatch, tmp_path):
+    import threading
+    import time as real_time
+
+    class FakeConfig:
+        def get_batch_size(self, model, content_type="normal"):
+            return 1
+
+        def get_timeout(self, model, content_type="normal"):
+            return 5
+
+        def get_cooldown(self, model):
+            return 0
+
+        def get_concurrency(self, model, content_type="normal"):
+            return 3
+
+        def get_rate_limits(self, model):
+            return 0, 0
+
+    lock = threading.Lock()
+    in_flight = {"now": 0, "peak": 0}
+
+    class SlowClient:
+        def chat(self, **kwargs):
+            items = json.loads(kwargs["user"])
+            with lock:
+                in_flight["now"] += 1
+                in_flight["peak"] = max(in_flight["peak"], in_flight["now"])
+            # Later batches finish first so completion order != input order
+            real_time.sleep(0.01 * (10 - int(items[0]["id"])))
+            with lock:
+                in_flight["now"] -= 1
+            payload = [{"id": it["id"], "target_ru": f"ru-{it['id']}"} for it in items]
+            return type("Resp", (), {"text": json.dumps(payload), "request_id": "r", "usage": None})()
+
+    monkeypatch.setattr(runtime_adapter, "get_batch_config", lambda: FakeConfig())
+    monkeypatch.setattr(runtime_adapter, "LLMClient", SlowClient)
+    monkeypatch.setattr(runtime_adapter, "_dispatch_gates", {})
+    monkeypatch.chdir(tmp_path)
+
+    rows = [{"id": str(i), "source_text": f"src{i}"} for i in range(8)]
+    result = runtime_adapter.batch_llm_call(
+        step="translate",
+        rows=rows,
+        model="concurrent-model",
+        system_prompt="sys",
+        user_prompt_template=lambda items: json.dumps(items),
+        retry=0,
+        output_dir=str(tmp_path / "out"),
+    )
+
+    assert [it["id"] for it in result] == [str(i) for i in range(8)]
+    assert 1 < in_flight["peak"] <= 3
+    checkpoint = json.loads((tmp_path / "out" / "translate_checkpoint.json").read_text(encoding="utf-8"))
+    assert checkpoint["batch_num"] == 8
+    assert checkpoint["rows_processed"] == 8
+
+
+def test_batch_config_exposes_concurrency_and_rate_limits():
+    config = runtime_adapter.BatchConfig()
+    assert config.get_concurrency("claude-haiku-4-5-20251001") > 1
+    assert config.get_concurrency("unknown-model") == 1
+    rpm, tpm = config.get_rate_limits("claude-haiku-4-5-20251001")
+    assert rpm > 0 and tpm > 0
+    assert config.get_rate_limits("unknown-model") == (0, 0)
+    haiku = "claude-haiku-4-5-20251001"
+    assert 1 <= config.get_concurrency(haiku, "long_text") < config.get_concurrency(haiku)
+    # long text has no adaptive ceiling in the repo config: shrink-only
+    assert config.get_batch_size_bounds(haiku, "long_text") == (1, config.get_batch_size(haiku, "long_text"))
+
+
+def test_batch_llm_call_packs_long_text_by_token_budget(monkeypatch, tmp_path):
+    class FakeConfig:
+        def get_batch_size(self, model, content_type="normal"):
+            return 4
+
+        def get_timeout(self, model, content_type="normal"):
+            return 5
+
+        def get_cooldown(self, model):
+            return 0
+
+        def get_concurrency(self, model, content_type="normal"):
+            return 2 if content_type == "long_text" else 6
+
+        def get_rate_limits(self, model):
+            return 0, 0
+
+    sent_batches = []
+
+    class RecordingClient:
+        def chat(self, **kwargs):
+            items = json.loads(kwargs["user"])
+            sent_batches.append([it["id"] for it in items])
+            payload = [{"id": it["id"], "target_ru": "ru"} for it in items]
+            return type("Resp", (), {"text": json.dumps(payload), "request_id": "r", "usage": None})()
+
+    monkeypatch.setattr(runtime_adapter, "get_batch_config", lambda: FakeConfig())
+    monkeypatch.setattr(runtime_adapter, "LLMClient", RecordingClient)
+    monkeypatch.setattr(runtime_adapter, "_dispatch_gates", {})
+    monkeypatch.chdir(tmp_path)
+    events = []
+    monkeypatch.setattr(runtime_adapter, "log_llm_progress", lambda step, event, data, **_kw: events.append((event, data)))
+
+    # ~520 estimated tokens each under the chars/4 estimator: two fit into a 1200-token budget,
+    # the short ones pack by item cap
+    monkeypatch.setenv("TOKEN_ESTIMATOR", "chars4")
+    rows = [{"id": f"L{i}", "source_text": "长" * 2000} for i in range(3)]
+    rows += [{"id": f"S{i}", "source_text": "短"} for i in range(5)]
+    batches_done = []
+    result = runtime_adapter.batch_llm_call(
+        step="translate",
+        rows=rows,
+        model="long-model",
+        system_prompt="sys",
+        user_prompt_template=lambda items: json.dumps(items),
+        content_type="long_text",
+        retry=0,
+        max_batch_tokens=1200,
+        on_batch_complete=lambda items: batches_done.append(len(items)),
+    )
+
+    assert [it["id"] for it in result] == [r["id"] for r in rows]
+    assert sorted(sent_batches) == sorted([["L0", "L1"], ["L2", "S0", "S1", "S2"], ["S3", "S4"]])
+    assert sorted(batches_done) == [2, 2, 4]
+    starts = [data for event, data in events if event == "batch_start"]
+    assert len(starts) == 3
+    assert all(data["system_prompt_chars"] == 3 and data["user_prompt_chars"] > 0 for data in starts)
+    assert max(data["prompt_tokens_est"] for data in starts) > 1000
+
+
+def test_token_bucket_blocks_until_refill(monkeypatch):
+    clock = {"now": 100.0}
+    sleeps = []
+
+    def fake_sleep(seconds):
+        sleeps.append(seconds)
+        clock["now"] += seconds
+
+    monkeypatch.setattr(runtime_adapter.time, "monotonic", lambda: clock["now"])
+    monkeypatch.setattr(runtime_adapter.time, "sleep", fake_sleep)
+
+    bucket = runtime_adapter._TokenBucket(60)  # 1 unit per second
+    assert bucket.acquire(60) == 0.0
+    waited = bucket.acquire(2)
+    assert waited == pytest.approx(2.0)
+    assert sum(sleeps) == pytest.approx(2.0)
+
+
+def _start_mock_openai_server():
+    import gzip
+    import threading
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    seen = {"connections": set(), "bodies": []}
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            raw = self.rfile.read(int(self.headers.get("Content-Length", "0")))
+            if self.headers.get("Content-Encoding") == "gzip":
+                raw = gzip.decompress(raw)
+            seen["connections"].add(self.client_address)
+            seen["bodies"].append(json.loads(raw.decode("utf-8")))
+            body = json.dumps({
+                "id": "mock-1",
+                "choices": [{"message": {"content": "ok"}}],
+                "usage": {"prompt_tokens": 3, "completion_tokens": 1, "total_tokens": 4},
+            }).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, seen
+
+
+def test_llm_clients_share_pooled_keep_alive_session(monkeypatch, tmp_path):
+    server, seen = _start_mock_openai_server()
+    monkeypatch.setenv("LLM_TRACE_PATH", str(tmp_path / "trace.jsonl"))
+    monkeypatch.setenv("LLM_HTTP_GZIP_REQUEST", "1")
+    runtime_adapter._reset_http_session()
+    try:
+        base_url = f"http://127.0.0.1:{server.server_address[1]}/v1"
+        router = _make_router({"routing": {}, "capabilities": {}, "fallback_triggers": {}})
+        for _ in range(4):
+            # A fresh client per call, like RepairLoop.run creates each round
+            client = LLMClient(base_url=base_url, api_key="k", model="mock-model", router=router)
+            assert client.chat("sys", "пользователь " * 200).text == "ok"
+    finally:
+        server.shutdown()
+        runtime_adapter._reset_http_session()
+
+    assert len(seen["bodies"]) == 4
+    assert seen["bodies"][0]["model"] == "mock-model"
+    assert len(seen["connections"]) == 1
+
+
+def test_llm_response_cache_replays_identical_requests(monkeypatch, tmp_path):
+    import llm_cache
+
+    trace_events = []
+    monkeypatch.setattr(runtime_adapter, "_trace", trace_events.append)
+    monkeypatch.setattr(llm_cache, "_cache_instances", {})
+    monkeypatch.setenv("LLM_CACHE_PATH", str(tmp_path / "llm_cache.sqlite"))
+
+    calls = []
+
+    def fake_call(self, **kwargs):
+        calls.append(kwargs["model"])
+        return LLMResult(text=f"out-{len(calls)}", latency_ms=5, request_id="req", model=kwargs["model"],
+                         usage={"prompt_tokens": 3, "completion_tokens": 1, "total_tokens": 4})
+
+    monkeypatch.setattr(LLMClient, "_call_single_model", fake_call)
+    client = LLMClient(
+        base_url="https://example.invalid/v1",
+        api_key="test-key",
+        model="cache-model",
+        router=_make_router({"routing": {}, "capabilities": {}, "fallback_triggers": {}}),
+    )
+
+    first = client.chat("sys", "user", temperature=0)
+    second = client.chat("sys", "user", temperature=0)
+    assert first.text == second.text == "out-1"
+    assert second.latency_ms == 0
+    assert second.usage["total_tokens"] == 4
+    assert len(calls) == 1
+
+    # Any change to the keyed inputs is a miss
+    assert client.chat("sys", "user", temperature=0.7).text == "out-2"
+    # Parse-failure retries refresh instead of replaying the cached text
+    assert client.chat("sys", "user", temperature=0, metadata={"cache_refresh": True}).text == "out-3"
+    assert client.chat("sys", "user", temperature=0).text == "out-3"
+
+    cache_events = [e for e in trace_events if e["type"] == "llm_cache"]
+    assert [e["event"] for e in cache_events] == ["miss", "hit", "miss", "refresh", "hit"]
+    assert cache_events[-1]["hits"] == 2
+
+    cache_module = sys.modules[runtime_adapter.get_response_cache.__module__]
+    monkeypatch.setattr(cache_module, "_cache_disabled", False)
+    runtime_adapter.disable_response_cache()
+    assert client.chat("sys", "user", temperature=0).text == "out-4"
+    # --no-llm-cache is an in-process override; LLM_CACHE_PATH stays set for other stages/children
+    assert os.environ["LLM_CACHE_PATH"] == str(tmp_path / "llm_cache.sqlite")
+
+
+def test_llm_response_cache_skips_answers_from_fallback_models(monkeypatch, tmp_path):
+    cache_module = sys.modules[runtime_adapter.get_response_cache.__module__]
+    monkeypatch.setattr(cache_module, "_cache_instances", {})
+    monkeypatch.setattr(cache_module, "_cache_disabled", False)
+    monkeypatch.setattr(runtime_adapter, "_trace", lambda event: None)
+    monkeypatch.setenv("LLM_CACHE_PATH", str(tmp_path / "llm_cache.sqlite"))
+
+    calls = []
+    primary_down = {"value": True}
+
+    def fake_call(self, **kwargs):
+        calls.append(kwargs["model"])
+        if kwargs["model"] == "primary" and primary_down["value"]:
+            raise LLMError("http", "unavailable", retryable=False, http_status=503)
+        return LLMResult(text=f"{kwargs['model']}-{len(calls)}", latency_ms=5, model=kwargs["model"])
+
+    monkeypatch.setattr(LLMClient, "_call_single_model", fake_call)
+    client = LLMClient(
+        base_url="https://example.invalid/v1",
+        api_key="test-key",
+        model="primary",
+        router=_make_router({
+            "routing": {"translate": {"default": "primary", "fallback": ["backup"]}},
+            "capabilities": {},
+            "fallback_triggers": {"http_codes": [503]},
+        }),
+    )
+    meta = {"step": "translate"}
+
+    assert client.chat("sys", "user", temperature=0, metadata=meta).text == "backup-2"
+    primary_down["value"] = False
+    # the fallback answer was not stored under the primary model's key
+    assert client.chat("sys", "user", temperature=0, metadata=meta).text == "primary-3"
+    assert client.chat("sys", "user", temperature=0, metadata=meta).text == "primary-3"
+    assert calls == ["primary", "backup", "primary"]
+
+
+def test_llm_response_cache_expires_and_trims_lru(tmp_path, monkeypatch):
+    import llm_cache
+
+    cache = llm_cache.LLMResponseCache(str(tmp_path / "c.sqlite"), ttl_s=100, max_entries=2)
+    clock = {"now": 1000.0}
+    monkeypatch.setattr(llm_cache.time, "time", lambda: clock["now"])
+    for name in ("a", "b", "c"):
+        clock["now"] += 1
+        cache.put(name, "m", {"text": name})
+    clock["now"] += 1
+    assert cache.get("a")["text"] == "a"  # refresh "a" so "b" is least recent
+    cache.evict()
+    assert cache.get("b") is None
+    assert cache.get("c")["text"] == "c"
+    clock["now"] += 500
+    assert cache.get("a") is None
+    cache.close()
+
+
+def test_batch_llm_call_adapts_batch_size_and_persists_it(monkeypatch, tmp_path):
+    class FakeConfig:
+        def get_batch_size(self, model, content_type="normal"):
+            return 2
+
+        def get_batch_size_bounds(self, model, content_type="normal"):
+            return 1, 4
+
+        def get_timeout(self, model, content_type="normal"):
+            return 5
+
+        def get_cooldown(self, model):
+            return 0
+
+        def get_concurrency(self, model, content_type="normal"):
+            return 1
+
+        def get_rate_limits(self, model):
+            return 0, 0
+
+    sent_batches = []
+    fail_on = {"r12"}
+
+    class FlakyClient:
+        def chat(self, **kwargs):
+            items = json.loads(kwargs["user"])
+            ids = [it["id"] for it in items]
+            sent_batches.append(ids)
+            if fail_on.intersection(ids):
+                fail_on.clear()
+                raise LLMError("timeout", "request timed out", retryable=True)
+            payload = [{"id": i, "target_ru": "ru"} for i in ids]
+            return type("Resp", (), {"text": json.dumps(payload), "request_id": "r", "usage": None})()
+
+    state_path = tmp_path / "adaptive.json"
+    monkeypatch.setenv("BATCH_ADAPTIVE_STATE", str(state_path))
+    monkeypatch.setenv("BATCH_ADAPTIVE", "1")
+    monkeypatch.setattr(runtime_adapter, "get_batch_config", lambda: FakeConfig())
+    monkeypatch.setattr(runtime_adapter, "LLMClient", FlakyClient)
+    monkeypatch.setattr(runtime_adapter, "_dispatch_gates", {})
+    monkeypatch.setattr(runtime_adapter.time, "sleep", lambda *_args, **_kwargs: None)
+    events = []
+    monkeypatch.setattr(runtime_adapter, "log_llm_progress", lambda step, event, data, **_kw: events.append((event, data)))
+
+    rows = [{"id": f"r{i}", "source_text": "x"} for i in range(30)]
+    result = runtime_adapter.batch_llm_call(
+        step="translate",
+        rows=rows,
+        model="adaptive-model",
+        system_prompt="sys",
+        user_prompt_template=lambda items: json.dumps(items),
+        retry=1,
+    )
+
+    assert [it["id"] for it in result] == [r["id"] for r in rows]
+    # grows after three healthy full batches, halves on the timeout (the retry resends the same span)
+    assert sent_batches[:7] == [
+        ["r0", "r1"], ["r2", "r3"], ["r4", "r5"],
+        ["r6", "r7", "r8"], ["r9", "r10", "r11"], ["r12", "r13", "r14"], ["r12", "r13", "r14"],
+    ]
+    assert [len(b) for b in sent_batches[7:10]] == [1, 1, 2]
+    complete = [data for event, data in events if event == "step_complete"][0]
+    assert [a["outcome"] for a in complete["batch_size_adjustments"]].count("timeout") == 1
+
+    persisted = json.loads(state_path.read_text(encoding="utf-8"))["entries"]["adaptive-model|translate|normal"]
+    assert persisted["batch_size"] == complete["batch_size_final"]
+    assert persisted["samples"] == len(sent_batches)
+
+    # The next run starts from the learned size; BATCH_ADAPTIVE=0 pins the static size
+    sent_batches.clear()
+    runtime_adapter.batch_llm_call(step="translate", rows=rows[:4], model="adaptive-model", system_prompt="sys",
+                                   user_prompt_template=lambda items: json.dumps(items), retry=0)
+    assert len(sent_batches[0]) == min(4, persisted["batch_size"])
+    monkeypatch.setenv("BATCH_ADAPTIVE", "0")
+    sent_batches.clear()
+    runtime_adapter.batch_llm_call(step="translate", rows=rows[:4], model="adaptive-model", system_prompt="sys",
+                                   user_prompt_template=lambda items: json.dumps(items), retry=0)
+    assert sent_batches == [["r0", "r1"], ["r2", "r3"]]
+
+
+def test_adaptive_batching_is_opt_in_and_capped_at_static_batch_size(monkeypatch, tmp_path):
+    config = runtime_adapter.BatchConfig()
+    assert config.get_batch_size_bounds("claude-haiku-4-5-20251001") == (1, 40)
+    # models without an adaptive_max_batch_size ceiling never grow past the static size
+    assert config.get_batch_size_bounds("gpt-4.1") == (1, 5)
+    config.models = {"m": {"max_batch_size": 20, "adaptive_max_batch_size": 40}}
+    assert config.get_batch_size_bounds("m") == (1, 40)
+
+    sent_batches = []
+
+    class EchoClient:
+        def chat(self, **kwargs):
+            ids = [it["id"] for it in json.loads(kwargs["user"])]
+            sent_batches.append(ids)
+            payload = [{"id": i, "target_ru": "ru"} for i in ids]
+            return type("Resp", (), {"text": json.dumps(payload), "request_id": "r", "usage": None})()
+
+    state_path = tmp_path / "adaptive.json"
+    monkeypatch.setenv("BATCH_ADAPTIVE_STATE", str(state_path))
+    monkeypatch.delenv("BATCH_ADAPTIVE", raising=False)
+    monkeypatch.setattr(runtime_adapter, "LLMClient", EchoClient)
+    monkeypatch.setattr(runtime_adapter, "_dispatch_gates", {})
+    monkeypatch.chdir(tmp_path)
+    rows = [{"id": f"r{i}", "source_text": "x"} for i in range(60)]
+    runtime_adapter.batch_llm_call(step="translate", rows=rows, model="claude-haiku-4-5-20251001",
+                                   system_prompt="sys", user_prompt_template=lambda items: json.dumps(items),
+                                   retry=0, concurrency=1)
+
+    assert [len(b) for b in sent_batches] == [25, 25, 10]
+    assert not state_path.exists()
+
+    # opted in with healthy latency, haiku grows from the static 25 up to its configured ceiling of 40
+    monkeypatch.setenv("BATCH_ADAPTIVE", "1")
+    sent_batches.clear()
+    rows = [{"id": f"r{i}", "source_text": "x"} for i in range(400)]
+    runtime_adapter.batch_llm_call(step="translate", rows=rows, model="claude-haiku-4-5-20251001",
+                                   system_prompt="sys", user_prompt_template=lambda items: json.dumps(items),
+                                   retry=0, concurrency=1)
+    sizes = [len(b) for b in sent_batches]
+    assert sizes[:4] == [25, 25, 25, 31]
+    assert max(sizes) == 40 and sizes == sorted(sizes[:-1]) + sizes[-1:]
+    assert sum(sizes) == 400
+    persisted = json.loads(state_path.read_text(encoding="utf-8"))["entries"]
+    assert persisted["claude-haiku-4-5-20251001|translate|normal"]["batch_size"] == 40
+
+
+def test_batch_llm_call_recovers_failed_batches_by_resending_missing_ids_and_bisecting(monkeypatch, tmp_path):
+    class FakeConfig:
+        def get_batch_size(self, model, content_type="normal"):
+            return 8
+
+        def get_timeout(self, model, content_type="normal"):
+            return 5
+
+        def get_cooldown(self, model):
+            return 0
+
+        def get_concurrency(self, model, content_type="normal"):
+            return 1
+
+        def get_rate_limits(self, model):
+            return 0, 0
+
+    sent_batches = []
+
+    class PickyClient:
+        def chat(self, **kwargs):
+            ids = [it["id"] for it in json.loads(kwargs["user"])]
+            sent_batches.append(ids)
+            if "bad" in ids:
+                return type("Resp", (), {"text": "not json at all", "request_id": "r", "usage": None})()
+            # "drop" is silently omitted while it shares a batch with other rows
+            kept = [i for i in ids if i != "drop" or len(ids) == 1]
+            payload = [{"id": i, "target_ru": f"ru-{i}"} for i in kept]
+            return type("Resp", (), {"text": json.dumps(payload), "request_id": "r", "usage": None})()
+
+    monkeypatch.setenv("BATCH_ADAPTIVE", "0")
+    monkeypatch.setattr(runtime_adapter, "get_batch_config", lambda: FakeConfig())
+    monkeypatch.setattr(runtime_adapter, "LLMClient", PickyClient)
+    monkeypatch.setattr(runtime_adapter, "_dispatch_gates", {})
+    monkeypatch.setattr(runtime_adapter.time, "sleep", lambda *_args, **_kwargs: None)
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "reports").mkdir()
+    completed = []
+
+    ids = ["a", "drop", "c", "d"]
+    result = runtime_adapter.batch_llm_call(
+        step="translate", rows=[{"id": i, "source_text": i} for i in ids], model="picky-model",
+        system_prompt="sys", user_prompt_template=lambda items: json.dumps(items), retry=1,
+        on_batch_complete=lambda items: completed.append([it["id"] for it in items]),
+    )
+    # two full attempts, then only the missing id is resent
+    assert sent_batches == [ids, ids, ["drop"]]
+    assert [it["id"] for it in result] == ids
+    assert completed == [ids]
+
+    sent_batches.clear()
+    ids = ["a", "b", "c", "bad", "e", "f"]
+    result = runtime_adapter.batch_llm_call(
+        step="translate", rows=[{"id": i, "source_text": i} for i in ids], model="picky-model",
+        system_prompt="sys", user_prompt_template=lambda items: json.dumps(items), retry=0,
+    )
+    assert sent_batches == [ids, ["a", "b", "c"], ["bad", "e", "f"], ["bad"], ["e", "f"]]
+    assert [it["id"] for it in result] == ["a", "b", "c", "e", "f"]
+    report = json.loads((tmp_path / "reports" / "translate_failed_batches.json").read_text(encoding="utf-8"))
+    assert report["failed_batches"][0]["failed_ids"] == ["bad"]
+
+    # partial_match: absent ids are a valid answer, so extra ids are dropped without resending
+    class ExtraIdClient:
+        def chat(self, **kwargs):
+            ids = [it["id"] for it in json.loads(kwargs["user"])]
+            sent_batches.append(ids)
+            payload = [{"id": ids[0], "issue": "x"}, {"id": "ghost", "issue": "y"}]
+            return type("Resp", (), {"text": json.dumps(payload), "request_id": "r", "usage": None})()
+
+    monkeypatch.setattr(runtime_adapter, "LLMClient", ExtraIdClient)
+    sent_batches.clear()
+    result = runtime_adapter.batch_llm_call(
+        step="soft_qa", rows=[{"id": i, "source_text": i} for i in ["p", "q"]], model="picky-model",
+        system_prompt="sys", user_prompt_template=lambda items: json.dumps(items), retry=0, partial_match=True,
+    )
+    assert sent_batches == [["p", "q"]]
+    assert result == [{"id": "p", "issue": "x"}]
+
+
+    # partial_match with a truncated response: ids after the last salvaged item were never reviewed
+    class TruncatingClient:
+        def chat(self, **kwargs):
+            ids = [it["id"] for it in json.loads(kwargs["user"])]
+            sent_batches.append(ids)
+            if len(ids) == 6:
+                text = '{"items": [{"id": "p1", "issue": "x"}, {"id": "p3", "issue": "y"}], "summary": "cut o'
+            else:
+                text = json.dumps([{"id": "p5", "issue": "z"}])
+            return type("Resp", (), {"text": text, "request_id": "r", "usage": None})()
+
+    monkeypatch.setattr(runtime_adapter, "LLMClient", TruncatingClient)
+    sent_batches.clear()
+    rows = [{"id": f"p{n}", "source_text": str(n)} for n in range(1, 7)]
+    result = runtime_adapter.batch_llm_call(
+        step="soft_qa", rows=rows, model="picky-model",
+        system_prompt="sys", user_prompt_template=lambda items: json.dumps(items), retry=0, partial_match=True,
+    )
+    # p2 was skipped before the cut (no finding); p4-p6 are resent, not reported clean
+    assert sent_batches == [["p1", "p2", "p3", "p4", "p5", "p6"], ["p4", "p5", "p6"]]
+    assert [it["id"] for it in result] == ["p1", "p3", "p5"]
+
+    # partial_match timeout: nothing was reviewed, so the batch is bisected instead of counted as clean
+    class SlowClient:
+        def chat(self, **kwargs):
+            ids = [it["id"] for it in json.loads(kwargs["user"])]
+            sent_batches.append(ids)
+            if len(ids) > 3:
+                raise LLMError("timeout", "too slow", retryable=True)
+            return type("Resp", (), {"text": json.dumps([{"id": ids[0], "issue": "t"}]), "request_id": "r", "usage": None})()
+
+    monkeypatch.setattr(runtime_adapter, "LLMClient", SlowClient)
+    sent_batches.clear()
+    result = runtime_adapter.batch_llm_call(
+        step="soft_qa", rows=rows, model="picky-model",
+        system_prompt="sys", user_prompt_template=lambda items: json.dumps(items), retry=0, partial_match=True,
+    )
+    assert sent_batches == [["p1", "p2", "p3", "p4", "p5", "p6"], ["p1", "p2", "p3"], ["p4", "p5", "p6"]]
+    assert [it["id"] for it in result] == ["p1", "p4"]
@@ -0,0 +1,71 @@
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import segmenter_factory
+
+
+def test_segmentation_cache_is_bounded_lru_with_hit_rate():
+    cache = segmenter_factory.SegmentationCache(max_entries=2)
+    calls = []
+
+    def compute(text):
+        calls.append(text)
+        return list(text)
+
+    assert cache.get_or_compute(("b", "", "攻击"), lambda: compute("攻击")) == ["攻", "击"]
+    cache.get_or_compute(("b", "", "防御"), lambda: compute("防御"))
+    cache.get_or_compute(("b", "", "攻击"), lambda: compute("攻击"))  # hit, refreshes recency
+    cache.get_or_compute(("b", "", "生命"), lambda: compute("生命"))  # evicts 防御
+    cache.get_or_compute(("b", "", "防御"), lambda: compute("防御"))
+
+    assert calls == ["攻击", "防御", "生命", "防御"]
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 4
+    assert stats["size"] == 2
+    assert stats["hit_rate"] == 0.2
+
+
+def test_segmentation_cache_disk_tier_round_trips(tmp_path):
+    path = tmp_path / "seg_cache.pkl"
+    first = segmenter_factory.SegmentationCache(max_entries=10, path=str(path))
+    first.get_or_compute(("jieba.lcut", "", "提升攻击力"), lambda: ["提升", "攻击力"])
+    first.save()
+
+    second = segmenter_factory.SegmentationCache(max_entries=10, path=str(path))
+    assert second.stats()["loaded_from_disk"] == 1
+    assert second.get_or_compute(("jieba.lcut", "", "提升攻击力"), lambda: ["unexpected"]) == ["提升", "攻击力"]
+    assert second.stats()["hits"] == 1
+
+
+def test_segment_text_reuses_cached_result_per_backend_and_hint(monkeypatch):
+    cache = segmenter_factory.configure_segmentation_cache(max_entries=100)
+    calls = []
+
+    def fake_uncached(text, backend, hint):
+        calls.append((text, backend, hint))
+        return [text]
+
+    monkeypatch.setattr(segmenter_factory, "_segment_uncached", fake_uncached)
+    try:
+        for _ in range(3):
+            segmenter_factory.segment_text("灵渊试炼", "heuristic", "ui")
+        segmenter_factory.segment_text("灵渊试炼", "heuristic", "dialogue")
+
+        assert calls == [("灵渊试炼", "heuristic", "ui"), ("灵渊试炼", "heuristic", "dialogue")]
+        assert cache.stats()["hits"] == 2
+    finally:
+        segmenter_factory.configure_segmentation_cache()
+
+
+def test_importing_segmentation_modules_does_not_load_jieba():
+    scripts_dir = Path(__file__).parent.parent / "scripts"
+    code = (
+        "import sys; sys.path.insert(0, %r); "
+        "import segmenter_factory, normalize_guard, extract_terms; "
+        "print('jieba' in sys.modules)"
+    ) % str(scripts_dir)
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert out.stdout.strip().splitlines()[-1] == "False"
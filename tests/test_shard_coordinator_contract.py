@@ -0,0 +1,111 @@
+import csv
+import json
+import sys
+import textwrap
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import runtime_adapter
+import shard_coordinator
+
+# Stand-in for translate_llm.py: same CLI and checkpoint files, no LLM.
+# Shards listed in the FAIL_MARKER file die halfway through.
+FAKE_WORKER = textwrap.dedent('''
+    import argparse, csv, json, os, sys
+    from pathlib import Path
+    sys.path.insert(0, os.environ["SCRIPTS_DIR"])
+    from checkpoint_journal import read_snapshot_ids, write_snapshot
+
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--input"); ap.add_argument("--output"); ap.add_argument("--checkpoint")
+    ap.add_argument("--model"); ap.add_argument("--target-lang")
+    args = ap.parse_args()
+    with open(os.environ["CALLS_LOG"], "a", encoding="utf-8") as log:
+        log.write(json.dumps({"input": args.input, "share": os.environ.get("LLM_DISPATCH_SHARE"),
+                              "model": args.model, "lang": args.target_lang}) + "\\n")
+    with open(args.input, encoding="utf-8-sig", newline="") as f:
+        rows = list(csv.DictReader(f))
+    done = read_snapshot_ids(args.checkpoint)
+    pending_ids = list(dict.fromkeys(r["string_id"] for r in rows if r["string_id"] not in done))
+    marker = Path(os.environ["FAIL_MARKER"])
+    fail = marker.exists() and Path(args.input).parent.name in marker.read_text()
+    if fail:
+        pending_ids = pending_ids[: len(pending_ids) // 2]
+    pending = [r for r in rows if r["string_id"] in set(pending_ids)]
+    new_file = not Path(args.output).exists()
+    with open(args.output, "a", encoding="utf-8-sig", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["string_id", "tokenized_zh", "target_text"])
+        if new_file:
+            writer.writeheader()
+        for r in pending:
+            writer.writerow({**r, "target_text": "ru:" + r["tokenized_zh"]})
+    write_snapshot(args.checkpoint, done | {r["string_id"] for r in pending})
+    sys.exit(3 if fail else 0)
+''')
+
+
+def _read(path):
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        return list(csv.DictReader(f))
+
+
+def test_shard_of_is_stable_and_budget_share_splits_limits(monkeypatch):
+    assert shard_coordinator.shard_of("UI_0001", 4) == shard_coordinator.shard_of("UI_0001", 4)
+    assert shard_coordinator.shard_of("UI_0001", 4) == 0  # crc32, not the salted hash()
+
+    config = runtime_adapter.BatchConfig()
+    config.models = {"m": {"max_concurrency": 8, "rpm_limit": 100, "tpm_limit": 0}}
+    monkeypatch.setenv("LLM_DISPATCH_SHARE", "0.25")
+    assert config.get_concurrency("m") == 2
+    assert config.get_rate_limits("m") == (25, 0)
+    monkeypatch.setenv("LLM_DISPATCH_SHARE", "0.01")
+    assert config.get_concurrency("m") == 1
+    assert config.get_rate_limits("m") == (1, 0)
+
+
+def test_coordinator_splits_runs_resumes_dead_shard_and_merges_in_input_order(monkeypatch, tmp_path):
+    worker = tmp_path / "fake_translate.py"
+    worker.write_text(FAKE_WORKER, encoding="utf-8")
+    calls = tmp_path / "calls.jsonl"
+    marker = tmp_path / "fail.txt"
+    monkeypatch.setenv("SCRIPTS_DIR", str(Path(shard_coordinator.__file__).parent))
+    monkeypatch.setenv("CALLS_LOG", str(calls))
+    monkeypatch.setenv("FAIL_MARKER", str(marker))
+    monkeypatch.setattr(shard_coordinator, "POLL_INTERVAL_S", 0.02)
+    monkeypatch.setattr(shard_coordinator, "global_concurrency", lambda model: 2)
+
+    source = tmp_path / "tokenized.csv"
+    ids = [f"id_{i:03d}" for i in range(40)] + ["id_005"]  # duplicate ids stay in one shard
+    with open(source, "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["string_id", "tokenized_zh"])
+        writer.writeheader()
+        writer.writerows({"string_id": sid, "tokenized_zh": f"文本{n}"} for n, sid in enumerate(ids))
+
+    work_dir = tmp_path / "shards"
+    argv = [
+        "--input", str(source), "--output", str(tmp_path / "translated.csv"),
+        "--checkpoint", str(tmp_path / "checkpoint.json"), "--shards", "3",
+        "--work-dir", str(work_dir), "--worker-script", str(worker), "--", "--target-lang", "ru-RU",
+    ]
+    marker.write_text("shard_001", encoding="utf-8")
+    assert shard_coordinator.main(argv) == 1
+    assert not (tmp_path / "translated.csv").exists()
+    manifest = json.loads((work_dir / "manifest.json").read_text(encoding="utf-8"))
+    assert [s["status"] for s in manifest["shards"]] == ["done", "partial", "done"]
+    assert manifest["shards"][1]["last_returncode"] == 3
+    assert sum(s["rows"] for s in manifest["shards"]) == len(ids)
+
+    marker.unlink()
+    assert shard_coordinator.main(argv) == 0
+    launched = [json.loads(line) for line in calls.read_text(encoding="utf-8").splitlines()]
+    assert [Path(c["input"]).parent.name for c in launched].count("shard_001") == 2
+    assert [Path(c["input"]).parent.name for c in launched].count("shard_000") == 1
+    assert {c["share"] for c in launched} <= {"0.5", "1"}
+    assert all(c["lang"] == "ru-RU" and c["model"] == shard_coordinator.DEFAULT_MODEL for c in launched)
+
+    merged = _read(tmp_path / "translated.csv")
+    assert [r["string_id"] for r in merged] == ids
+    assert [r["target_text"] for r in merged] == [f"ru:文本{n}" for n in range(len(ids))]
+    done = json.loads((tmp_path / "checkpoint.json").read_text(encoding="utf-8"))["done_ids"]
+    assert done == sorted(set(ids))
@@ -0,0 +1,121 @@
+import os
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import run_smoke_pipeline as smoke_pipeline
+import stage_engine
+
+
+STAGE_SOURCE = """
+import os
+import sys
+
+IMPORTS = globals().get("IMPORTS", 0) + 1
+
+
+def main():
+    print("argv", sys.argv[1:], "trace", os.environ.get("STAGE_ENGINE_TEST_TRACE"), "imports", IMPORTS)
+    print("stage warning", file=sys.stderr)
+    if "--fail" in sys.argv:
+        sys.exit(3)
+"""
+
+
+def _install_stage(monkeypatch, tmp_path: Path, name: str, source: str) -> Path:
+    script = tmp_path / f"{name}.py"
+    script.write_text(source, encoding="utf-8")
+    monkeypatch.setattr(stage_engine, "SCRIPTS_DIR", tmp_path.resolve())
+    monkeypatch.setitem(stage_engine.INPROCESS_STAGES, name, False)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.delitem(sys.modules, name, raising=False)
+    return script
+
+
+def test_inprocess_engine_runs_main_with_patched_argv_env_and_records_runtime(monkeypatch, tmp_path):
+    script = _install_stage(monkeypatch, tmp_path, "engine_stage_ok", STAGE_SOURCE)
+    monkeypatch.delenv("STAGE_ENGINE_TEST_TRACE", raising=False)
+    engine = stage_engine.StageEngine("inprocess")
+    argv_before = list(sys.argv)
+
+    first = engine.run([sys.executable, str(script), "a.csv"], tmp_path / "01.log", env={"STAGE_ENGINE_TEST_TRACE": "t.jsonl"})
+    second = engine.run([sys.executable, str(script), "--fail"], tmp_path / "02.log")
+
+    assert first.returncode == 0
+    assert "argv ['a.csv'] trace t.jsonl imports 1" in first.stdout
+    assert first.stderr.strip() == "stage warning"
+    assert second.returncode == 3
+    assert "imports 1" in second.stdout  # module imported once per engine
+    assert sys.argv == argv_before
+    assert "STAGE_ENGINE_TEST_TRACE" not in os.environ
+
+    log_text = (tmp_path / "02.log").read_text(encoding="utf-8")
+    assert "engine: inprocess" in log_text and "stage warning" in log_text and "returncode: 3" in log_text
+    assert [r["mode"] for r in engine.records] == ["inprocess", "inprocess"]
+    assert all(r["duration_ms"] >= 0 and r["peak_rss_mb"] for r in engine.records)
+
+
+LEAKY_STAGE_SOURCE = """
+import os
+import sys
+
+
+def main():
+    print("seen", os.environ.get("STAGE_ENGINE_TEST_LEAK"), os.environ.get("STAGE_ENGINE_TEST_KEEP"))
+    os.environ["STAGE_ENGINE_TEST_LEAK"] = "set-by-stage"
+    os.environ["STAGE_ENGINE_TEST_KEEP"] = "changed-by-stage"
+    if "--no-llm-cache" in sys.argv:
+        from runtime_adapter import disable_response_cache
+        disable_response_cache()
+"""
+
+
+def test_inprocess_engine_restores_env_and_cache_override_after_each_stage(monkeypatch, tmp_path):
+    script = _install_stage(monkeypatch, tmp_path, "engine_stage_leaky", LEAKY_STAGE_SOURCE)
+    monkeypatch.syspath_prepend(str(Path(__file__).parent.parent / "scripts"))
+    monkeypatch.delenv("STAGE_ENGINE_TEST_LEAK", raising=False)
+    monkeypatch.setenv("STAGE_ENGINE_TEST_KEEP", "pipeline")
+    engine = stage_engine.StageEngine("inprocess")
+
+    first = engine.run([sys.executable, str(script), "--no-llm-cache"], tmp_path / "01.log")
+    assert stage_engine.response_cache_disabled() is False
+    second = engine.run([sys.executable, str(script)], tmp_path / "02.log")
+
+    assert first.returncode == 0 and second.returncode == 0
+    assert "seen None pipeline" in first.stdout
+    assert "seen None pipeline" in second.stdout
+    assert "STAGE_ENGINE_TEST_LEAK" not in os.environ
+    assert os.environ["STAGE_ENGINE_TEST_KEEP"] == "pipeline"
+
+
+def test_engine_falls_back_to_subprocess_and_streams_output_to_log(monkeypatch, tmp_path):
+    script = _install_stage(monkeypatch, tmp_path, "engine_stage_broken", "raise ImportError('no deps here')\n")
+    other = tmp_path / "not_a_stage.py"
+    other.write_text("import sys\nprint('x' * 10000)\nsys.exit(2)\n", encoding="utf-8")
+    engine = stage_engine.StageEngine("inprocess")
+
+    broken = engine.run([sys.executable, str(script)], tmp_path / "broken.log")
+    result = engine.run([sys.executable, str(other)], tmp_path / "other.log")
+
+    assert broken.returncode == 1 and "no deps here" in broken.stderr
+    assert result.returncode == 2
+    assert len(result.stdout) <= stage_engine.OUTPUT_TAIL_CHARS
+    assert ("x" * 10000) in (tmp_path / "other.log").read_text(encoding="utf-8")
+    assert [r["mode"] for r in engine.records] == ["subprocess", "subprocess"]
+    assert engine.records[1]["peak_rss_mb"] > 0
+
+
+def test_smoke_pipeline_stage_entries_carry_engine_runtime(monkeypatch, tmp_path):
+    script = _install_stage(monkeypatch, tmp_path, "engine_stage_manifest", STAGE_SOURCE)
+    manifest = {"stages": [], "stage_runs": []}
+    monkeypatch.setattr(smoke_pipeline, "_STAGE_ENGINE", stage_engine.StageEngine("inprocess", records=manifest["stage_runs"]))
+    log_path = tmp_path / "03_qa_hard.log"
+
+    result = smoke_pipeline._run_step([sys.executable, str(script)], log_path)
+    smoke_pipeline._append_stage(manifest, "QA Hard", [log_path], "pass")
+
+    assert result.returncode == 0
+    assert manifest["stage_runs"][0]["log"] == str(log_path)
+    assert manifest["stages"][0]["runtime"]["mode"] == "inprocess"
+    assert set(manifest["stages"][0]["runtime"]) == {"mode", "duration_ms", "peak_rss_mb"}
@@ -0,0 +1,105 @@
+import json
+import random
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import batch_utils
+import metrics_aggregator
+import runtime_adapter
+import token_estimator
+
+
+@pytest.fixture(autouse=True)
+def _fresh_estimator(monkeypatch, tmp_path):
+    monkeypatch.setenv("TOKEN_CALIBRATION_PATH", str(tmp_path / "missing.json"))
+    monkeypatch.delenv("TOKEN_ESTIMATOR", raising=False)
+    token_estimator.reset_token_estimator()
+    yield
+    token_estimator.reset_token_estimator()
+
+
+def test_estimates_follow_script_and_model_family():
+    zh = "攻击力提升，暴击率提高"
+    ru = "Сила атаки повышена"
+
+    assert token_estimator.script_counts("攻击 Атака ATK 10%") == (2, 5, 3, 6)
+    # one CJK character is about one token, far above chars/4
+    assert token_estimator.estimate_tokens(zh, "claude-haiku-4-5-20251001") > len(zh) // 4 * 3
+    assert token_estimator.estimate_tokens(zh, "gpt-4.1-mini") < token_estimator.estimate_tokens(zh, "claude-haiku-4-5-20251001")
+    assert token_estimator.estimate_tokens(ru, "gpt-4.1-mini") < len(ru)
+    assert batch_utils.estimate_tokens("") == 1
+    assert runtime_adapter._estimate_tokens(zh, "claude-x") == token_estimator.estimate_tokens(zh, "claude-x")
+    assert runtime_adapter._script_chars(zh, ru)["cyrillic"] == 17
+
+
+def test_calibration_fits_trace_usage_and_is_picked_up(monkeypatch, tmp_path):
+    rng = random.Random(5)
+    truth = {"cjk": 1.3, "cyrillic": 0.45, "latin": 0.3, "other": 0.5}
+    events = []
+    for _ in range(80):
+        req = {s: rng.randint(0, 3000) for s in token_estimator.SCRIPTS}
+        resp = {s: rng.randint(0, 800) for s in token_estimator.SCRIPTS}
+        events.append({
+            "type": "llm_call",
+            "usage_source": "api_usage",
+            "selected_model": "claude-sonnet-4-5-20250929",
+            "req_script_chars": req,
+            "resp_script_chars": resp,
+            "prompt_tokens": round(sum(truth[s] * n for s, n in req.items())),
+            "completion_tokens": round(sum(truth[s] * n for s, n in resp.items())),
+        })
+    events.append({"type": "llm_call", "usage_source": "local_estimate", "selected_model": "gpt-4.1"})
+
+    payload = token_estimator.calibrate(events)
+    claude = payload["families"]["claude"]
+    assert set(payload["families"]) == {"claude"}
+    assert claude["samples"] == 160
+    assert claude["weights"] == pytest.approx(truth, abs=0.02)
+    assert claude["mape_calibrated"] < 0.01 < claude["mape_chars4"]
+
+    path = tmp_path / "calibration.json"
+    path.write_text(json.dumps(payload), encoding="utf-8")
+    monkeypatch.setenv("TOKEN_CALIBRATION_PATH", str(path))
+    token_estimator.reset_token_estimator()
+    assert token_estimator.estimate_tokens("一" * 100, "claude-haiku") == pytest.approx(130, abs=2)
+    # the reported MAPE is the error of the estimator that is actually loaded
+    loaded = token_estimator.get_token_estimator()
+    errors = [
+        abs(loaded.estimate_counts(e[counts], e["selected_model"]) - e[tokens]) / e[tokens]
+        for e in events if e["usage_source"] == "api_usage"
+        for counts, tokens in (("req_script_chars", "prompt_tokens"), ("resp_script_chars", "completion_tokens"))
+    ]
+    assert sum(errors) / len(errors) == pytest.approx(claude["mape_calibrated"], abs=0.002)
+
+
+def test_estimator_is_pluggable_and_feeds_batch_packing_and_metrics(monkeypatch):
+    rows = [{"id": str(i), "source_text": "长" * 300} for i in range(6)]
+    packing = batch_utils.BatchConfig(max_items=10, max_tokens=1000, text_fields=["source_text"], model="claude-x")
+    assert [len(b) for b in batch_utils.split_into_batches(rows, packing)] == [2, 2, 2]
+
+    monkeypatch.setenv("TOKEN_ESTIMATOR", "chars4")
+    assert [len(b) for b in batch_utils.split_into_batches(rows, packing)] == [6]
+
+    class FixedEstimator:
+        def estimate(self, text, model=None):
+            return 7
+
+        def estimate_counts(self, counts, model=None):
+            return 11
+
+    token_estimator.register_estimator("fixed", lambda _path: FixedEstimator())
+    monkeypatch.setenv("TOKEN_ESTIMATOR", "fixed")
+    assert batch_utils.estimate_tokens("anything") == 7
+    usage = metrics_aggregator._normalize_usage_record({
+        "req_chars": 40,
+        "resp_chars": 20,
+        "req_script_chars": {"cjk": 40},
+        "resp_script_chars": {"cjk": 20},
+    })
+    assert usage == {"prompt_tokens": 11, "completion_tokens": 11, "total_tokens": 22, "estimated": True}
+    # records without script counts keep the chars/4 fallback
+    assert metrics_aggregator._normalize_usage_record({"req_chars": 40})["prompt_tokens"] == 10
@@ -155,3 +155,234 @@ def test_translate_llm_system_prompt_mentions_v2_residual_lanes():
 
     assert "residual_lane=canonical_title_compact" in prompt
     assert "residual_lane=lore_skill_compact" in prompt
+
+
+def test_translate_llm_sliced_glossary_keeps_batch_terms_and_priority_budget():
+    glossary = [
+        translate_llm.GlossaryEntry("试炼", "Испытание", "approved"),
+        translate_llm.GlossaryEntry("灵渊", "Линъюань", "approved"),
+        translate_llm.GlossaryEntry("火影", "Хокаге", "approved"),
+        translate_llm.GlossaryEntry("忍者", "Ниндзя", "proposed"),
+        translate_llm.GlossaryEntry("商城", "Магазин", "approved", tags=["ui"]),
+    ]
+    builder = translate_llm.build_system_prompt_factory(
+        style_guide="compact style",
+        glossary_summary=translate_llm.build_glossary_slicer(glossary, priority_budget=1),
+        target_lang="ru-RU",
+        style_profile={},
+    )
+
+    prompt = builder([{"id": "S1", "source_text": "进入灵渊试炼，忍者"}])
+
+    assert "- 试炼 → Испытание" in prompt and "- 灵渊 → Линъюань" in prompt
+    assert "- 商城 → Магазин" in prompt  # compact entry fills the priority budget
+    assert "火影" not in prompt and "忍者 →" not in prompt
+    assert prompt.index("[Compact UI-art priority terms]") < prompt.index("- 试炼 → Испытание")
+
+
+def test_translate_llm_prompts_share_static_prefix_across_batches():
+    glossary = [translate_llm.GlossaryEntry("试炼", "Испытание", "approved")]
+    builder = translate_llm.build_repair_system_prompt_factory(
+        style_guide="compact style",
+        glossary_summary=translate_llm.build_glossary_slicer(glossary, priority_budget=0),
+        target_lang="ru-RU",
+        style_profile={},
+    )
+
+    first = builder([{"id": "A", "source_text": "灵渊试炼", "max_len_target": "10"}])
+    second = builder([{"id": "B", "source_text": "元素之门", "residual_lane": "lore_skill_compact"}])
+
+    assert first.cacheable_prefix == second.cacheable_prefix
+    assert "style_guide:\ncompact style" in first.cacheable_prefix
+    assert "【Repair Guard】" in first.cacheable_prefix
+    assert "Row A" not in first.cacheable_prefix and "- 试炼 → Испытание" not in first.cacheable_prefix
+    assert "- 试炼 → Испытание" in first and "target<=10" in first
+    assert "residual_lane=lore_skill_compact" in second[len(second.cacheable_prefix):]
+
+
+def test_translate_llm_dedups_identical_sources_and_fans_out(monkeypatch, tmp_path):
+    input_csv = tmp_path / "prepared.csv"
+    output_csv = tmp_path / "translated.csv"
+    checkpoint = tmp_path / "checkpoint.json"
+    style = tmp_path / "style.md"
+    style_profile = tmp_path / "style_profile.yaml"
+    glossary = tmp_path / "glossary.yaml"
+
+    base = {
+        "translation_mode": "llm",
+        "ui_art_category": "label_generic_short",
+        "max_len_target": "12",
+        "max_len_review_limit": "14",
+    }
+    _write_csv(
+        input_csv,
+        [
+            {**base, "string_id": "UI_1", "source_zh": "确定", "tokenized_zh": "确定"},
+            {**base, "string_id": "UI_2", "source_zh": "确定 ", "tokenized_zh": "确定 "},
+            {**base, "string_id": "UI_3", "source_zh": "取消", "tokenized_zh": "取消"},
+            {**base, "string_id": "UI_4", "source_zh": "确定", "tokenized_zh": "确定", "max_len_target": "4"},
+        ],
+    )
+    style.write_text("compact ui art", encoding="utf-8")
+    _write_style_profile(style_profile)
+    glossary.write_text("entries: []\n", encoding="utf-8")
+
+    sent_ids = []
+    events = []
+    translations = {"确定": "ОК", "取消": "Отмена"}
+
+    def fake_batch_call(**kwargs):
+        sent_ids.extend(row["id"] for row in kwargs["rows"])
+        return [
+            {"id": row["id"], "target_ru": translations[row["source_text"].strip()]}
+            for row in kwargs["rows"]
+        ]
+
+    monkeypatch.setattr(translate_llm, "batch_llm_call", fake_batch_call)
+    monkeypatch.setattr(translate_llm, "log_llm_progress", lambda step, event, data, silent=False: events.append((event, data)))
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "translate_llm.py",
+            "--input", str(input_csv),
+            "--output", str(output_csv),
+            "--checkpoint", str(checkpoint),
+            "--style", str(style),
+            "--style-profile", str(style_profile),
+            "--glossary", str(glossary),
+        ],
+    )
+
+    translate_llm.main()
+
+    assert sent_ids == ["UI_1", "UI_3", "UI_4"]
+    rows = {row["string_id"]: row for row in csv.DictReader(output_csv.open("r", encoding="utf-8-sig", newline=""))}
+    assert rows["UI_2"]["target_text"] == "ОК"
+    assert all(row["translate_status"] == "ok" for row in rows.values())
+    summary = dict(events)["dedup_summary"]
+    assert summary["llm_rows"] == 4
+    assert summary["unique_rows"] == 3
+    assert summary["dedup_ratio"] == 0.25
+
+
+def test_translate_llm_resume_after_crash_keeps_committed_batches(monkeypatch, tmp_path):
+    input_csv = tmp_path / "prepared.csv"
+    output_csv = tmp_path / "translated.csv"
+    checkpoint = tmp_path / "checkpoint.json"
+    style = tmp_path / "style.md"
+    style_profile = tmp_path / "style_profile.yaml"
+    glossary = tmp_path / "glossary.yaml"
+
+    sources = ["攻击", "防御", "生命", "速度"]
+    _write_csv(
+        input_csv,
+        [
+            {"string_id": f"UI_{i}", "source_zh": src, "tokenized_zh": src, "translation_mode": "llm"}
+            for i, src in enumerate(sources)
+        ],
+    )
+    style.write_text("compact ui art", encoding="utf-8")
+    _write_style_profile(style_profile)
+    glossary.write_text("entries: []\n", encoding="utf-8")
+    monkeypatch.setattr(translate_llm, "log_llm_progress", lambda *args, **kwargs: None)
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "translate_llm.py",
+            "--input", str(input_csv),
+            "--output", str(output_csv),
+            "--checkpoint", str(checkpoint),
+            "--style", str(style),
+            "--style-profile", str(style_profile),
+            "--glossary", str(glossary),
+        ],
+    )
+
+    def crash_after_first_batch(**kwargs):
+        first = kwargs["rows"][:2]
+        kwargs["on_batch_complete"]([{"id": r["id"], "target_ru": f"RU-{r['id']}"} for r in first])
+        raise RuntimeError("simulated crash")
+
+    monkeypatch.setattr(translate_llm, "batch_llm_call", crash_after_first_batch)
+    try:
+        translate_llm.main()
+    except SystemExit:
+        pass
+
+    assert translate_llm.load_checkpoint(str(checkpoint)) == {"UI_0", "UI_1"}
+    # Torn write from the crash: a partial row that was never journaled
+    with output_csv.open("a", encoding="utf-8") as fh:
+        fh.write("UI_2,防")
+
+    sent_ids = []
+
+    def finish(**kwargs):
+        sent_ids.extend(r["id"] for r in kwargs["rows"])
+        return [{"id": r["id"], "target_ru": f"RU-{r['id']}"} for r in kwargs["rows"]]
+
+    monkeypatch.setattr(translate_llm, "batch_llm_call", finish)
+    translate_llm.main()
+
+    assert sent_ids == ["UI_2", "UI_3"]
+    rows = list(csv.DictReader(output_csv.open("r", encoding="utf-8-sig", newline="")))
+    assert [r["string_id"] for r in rows] == ["UI_0", "UI_1", "UI_2", "UI_3"]
+    assert [r["target_text"] for r in rows] == ["RU-UI_0", "RU-UI_1", "RU-UI_2", "RU-UI_3"]
+    assert not (tmp_path / "checkpoint.journal.jsonl").exists()
+    assert translate_llm.load_checkpoint(str(checkpoint)) == {"UI_0", "UI_1", "UI_2", "UI_3"}
+
+
+def test_translate_llm_long_text_lane_is_one_packed_concurrent_call(monkeypatch, tmp_path):
+    input_csv = tmp_path / "prepared.csv"
+    output_csv = tmp_path / "translated.csv"
+    style = tmp_path / "style.md"
+    style_profile = tmp_path / "style_profile.yaml"
+    glossary = tmp_path / "glossary.yaml"
+
+    _write_csv(
+        input_csv,
+        [
+            {"string_id": f"LORE_{i}", "source_zh": f"传说{i}", "tokenized_zh": f"传说{i}", "is_long_text": "true"}
+            for i in range(3)
+        ],
+    )
+    style.write_text("compact ui art", encoding="utf-8")
+    _write_style_profile(style_profile)
+    glossary.write_text("entries: []\n", encoding="utf-8")
+
+    calls = []
+
+    def fake_batch_call(**kwargs):
+        calls.append(kwargs)
+        items = [{"id": r["id"], "target_ru": f"Легенда {r['id'][-1]}"} for r in kwargs["rows"]]
+        kwargs["on_batch_complete"](items)
+        return items
+
+    monkeypatch.setattr(translate_llm, "batch_llm_call", fake_batch_call)
+    monkeypatch.setattr(translate_llm, "log_llm_progress", lambda *args, **kwargs: None)
+    monkeypatch.setattr(
+        sys,
+        "argv",
+        [
+            "translate_llm.py",
+            "--input", str(input_csv),
+            "--output", str(output_csv),
+            "--checkpoint", str(tmp_path / "checkpoint.json"),
+            "--style", str(style),
+            "--style-profile", str(style_profile),
+            "--glossary", str(glossary),
+            "--long-text-concurrency", "3",
+            "--long-text-max-tokens", "4000",
+        ],
+    )
+
+    translate_llm.main()
+
+    long_calls = [c for c in calls if c["content_type"] == "long_text"]
+    assert len(long_calls) == 1
+    assert [r["id"] for r in long_calls[0]["rows"]] == ["LORE_0", "LORE_1", "LORE_2"]
+    assert long_calls[0]["concurrency"] == 3
+    assert long_calls[0]["max_batch_tokens"] == 4000
+    rows = list(csv.DictReader(output_csv.open("r", encoding="utf-8-sig", newline="")))
+    assert [r["translate_status"] for r in rows] == ["ok", "ok", "ok"]
@@ -0,0 +1,84 @@
+import os
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "scripts"))
+
+import translate_llm
+
+
+class _CountingRow(dict):
+    """Row that counts field reads, to check the pre-LLM path touches each row a bounded number of times."""
+
+    reads = 0
+
+    def get(self, key, default=None):
+        _CountingRow.reads += 1
+        return super().get(key, default)
+
+    def __getitem__(self, key):
+        _CountingRow.reads += 1
+        return super().__getitem__(key)
+
+
+def _make_rows(n: int, row_type=dict) -> list[dict]:
+    rows = []
+    for i in range(n):
+        row = row_type({"string_id": f"S{i:07d}", "tokenized_zh": f"文本{i % 997}", "translation_mode": "llm", "is_long_text": "false"})
+        if i % 10 == 0:
+            row["translation_mode"] = "prefill_exact"
+            row["prefill_target_ru"] = "Текст"
+        elif i % 7 == 0:
+            row["is_long_text"] = "true"
+        rows.append(row)
+    return rows
+
+
+def _time_pre_llm_path(rows: list[dict]) -> float:
+    best = float("inf")
+    for _ in range(3):
+        t0 = time.perf_counter()
+        lanes = translate_llm.route_rows(rows)
+        translate_llm.dedup_batch_rows([translate_llm.build_batch_row_payload(r) for r in lanes.normal])
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def test_route_rows_assigns_each_row_to_one_lane():
+    rows = _make_rows(70)
+    lanes = translate_llm.route_rows(rows)
+
+    assert len(lanes.prefill) + len(lanes.normal) + len(lanes.long) == 70
+    assert all(r["translation_mode"] == "prefill_exact" for r in lanes.prefill)
+    assert all(r["is_long_text"] == "true" for r in lanes.long)
+    assert lanes.by_id["S0000007"] == [rows[7]]
+    assert lanes.normal[-1] is rows[69]
+
+
+def _count_pre_llm_reads(n: int) -> int:
+    rows = _make_rows(n, _CountingRow)
+    _CountingRow.reads = 0
+    lanes = translate_llm.route_rows(rows)
+    translate_llm.dedup_batch_rows([translate_llm.build_batch_row_payload(r) for r in lanes.normal])
+    return _CountingRow.reads
+
+
+def test_pre_llm_partitioning_reads_each_row_a_constant_number_of_times():
+    # linear work: reads per row do not grow with the table (a per-row scan of the table would be ~8x here)
+    small = _count_pre_llm_reads(1_000) / 1_000
+    large = _count_pre_llm_reads(8_000) / 8_000
+    assert large == pytest.approx(small, rel=0.02)
+    assert large < 20
+
+
+@pytest.mark.skipif(not os.getenv("RUN_BENCHMARKS"), reason="wall-clock benchmark; set RUN_BENCHMARKS=1")
+def test_pre_llm_partitioning_scales_linearly_to_200k_rows():
+    small = _time_pre_llm_path(_make_rows(25_000))
+    large = _time_pre_llm_path(_make_rows(200_000))
+
+    # 8x the rows: linear work stays near 8x, the old quadratic scan was ~64x
+    assert large / small < 20, f"25k={small:.3f}s 200k={large:.3f}s"
+    assert large < 10.0